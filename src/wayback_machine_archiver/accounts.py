@@ -0,0 +1,291 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from .clients import AsyncSPN2Client, CaptureRejectedError, SPN2Client
+from .concurrency import ConcurrencyController, ConcurrencyWindow
+from .coordination import Coordinator
+from .journal import RunJournal
+from .polling import MAX_POLL_INTERVAL_SEC
+from .ratelimit import RateLimiter
+from .workflow import CAPACITY_ERRORS
+
+# A job the workflow has not polled for this long has been given up on (timed
+# out, or failed after repeated poll errors), and its slot is freed.
+ABANDONED_JOB_SEC = 5 * MAX_POLL_INTERVAL_SEC
+
+
+@dataclass(eq=False, slots=True)
+class Account:
+    """One Internet Archive account, with its own submission rate and window."""
+
+    name: str
+    client: SPN2Client
+    rate_limiter: RateLimiter
+    concurrency: ConcurrencyController
+    # Shares the window with other processes using this account, if set.
+    coordinator: Coordinator | None = None
+    # Captures this process has in flight with the account.
+    in_flight: int = 0
+
+    def others_in_flight(self) -> int:
+        """Captures other processes have in flight with this account."""
+        if self.coordinator is None:
+            return 0
+        return self.coordinator.others_in_flight()
+
+    @property
+    def window(self) -> int:
+        """The part of the account's window this process may use."""
+        return max(0, self.concurrency.limit - self.others_in_flight())
+
+    @property
+    def spare(self) -> int:
+        """How many more captures this account may have in flight right now."""
+        return self.window - self.in_flight
+
+    def add_in_flight(self, delta: int) -> None:
+        self.in_flight += delta
+        if self.coordinator is not None:
+            self.coordinator.publish_in_flight(self.in_flight)
+
+
+class _PooledWindow:
+    """
+    The run-wide in-flight window of an AccountPool: the sum of its accounts'
+    windows, less what other processes sharing them have in flight. Feedback
+    is applied to each account's own controller by the pool, which knows
+    which account a job belongs to, so it is ignored here.
+    """
+
+    def __init__(self, pool: "AccountPool") -> None:
+        self._pool = pool
+
+    @property
+    def limit(self) -> int:
+        return sum(account.window for account in self._pool.accounts)
+
+    def record_success(self) -> None:
+        pass
+
+    def record_capacity_error(self) -> None:
+        pass
+
+
+class AccountPool:
+    """
+    Several Internet Archive accounts used as a single SPN2 client.
+
+    Each capture goes to an account with room in its in-flight window: the
+    one whose next rate-limit slot comes soonest, ties going to the one with
+    the most room. It then waits on that account's rate limiter only. Status checks go to the
+    account that submitted the job, and their outcomes grow or shrink that
+    account's window, as does an account refusing a capture for lack of capacity. Pass `window` to the workflow as its concurrency
+    controller so the run keeps the sum of the accounts' windows in flight.
+
+    The rate_limiter argument of submit_capture is ignored in favor of the
+    accounts' own limiters. With a journal, the name of the account each
+    capture went to is recorded, and jobs a resumed run restores from it are
+    polled through that account again. Jobs whose account is not known (from
+    a journal written before accounts were recorded, or an account no longer
+    configured) are polled through the first account, and logged when they are.
+    """
+
+    def __init__(
+        self,
+        accounts: Sequence[Account],
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        journal: RunJournal | None = None,
+    ) -> None:
+        if not accounts:
+            raise ValueError("An account pool needs at least one account.")
+        self.accounts = list(accounts)
+        self.window: ConcurrencyWindow = _PooledWindow(self)
+        self.journal = journal
+        self._clock = clock
+        self._lock = threading.Lock()
+        # job_id -> (account that submitted it, when it was last submitted or
+        # polled)
+        self._jobs: dict[str, tuple[Account, float]] = {}
+        # Jobs from before this run already logged as polled by accounts[0].
+        self._unowned: set[str] = set()
+        if journal is not None:
+            self._restore(journal.job_accounts())
+
+    def _restore(self, job_accounts: dict[str, str]) -> None:
+        """Gives jobs from an earlier run back to the accounts that submitted them."""
+        by_name = {account.name: account for account in self.accounts}
+        now = self._clock()
+        for job_id, name in job_accounts.items():
+            account = by_name.get(name)
+            if account is not None:
+                self._jobs[job_id] = (account, now)
+                account.add_in_flight(1)
+
+    def close(self) -> None:
+        """Closes the coordinators of accounts shared with other processes."""
+        for account in self.accounts:
+            if account.coordinator is not None:
+                account.coordinator.close()
+
+    def _expire_jobs(self) -> None:
+        """
+        Frees the slots of jobs the workflow has given up on (timed out, or
+        failed after repeated poll errors) and so will never poll again.
+        """
+        cutoff = self._clock() - ABANDONED_JOB_SEC
+        for job_id, (account, active_at) in list(self._jobs.items()):
+            if active_at < cutoff:
+                del self._jobs[job_id]
+                account.add_in_flight(-1)
+
+    def _reserve(self) -> Account:
+        """Picks the account for the next capture and takes a slot in its window."""
+        with self._lock:
+            self._expire_jobs()
+            account = min(
+                self.accounts,
+                key=lambda a: (a.spare <= 0, a.rate_limiter.delay(), -a.spare),
+            )
+            account.add_in_flight(1)
+        return account
+
+    def _submitted(self, account: Account, url: str, job_id: str | None) -> None:
+        """Records the job an account's submission started, or frees its slot."""
+        with self._lock:
+            if job_id:
+                self._jobs[job_id] = (account, self._clock())
+            else:
+                account.add_in_flight(-1)
+        if job_id and self.journal is not None:
+            self.journal.record_account(url, account.name)
+
+    def _rejected(self, account: Account, error: CaptureRejectedError) -> None:
+        """Shrinks an account's window if it refused a capture for lack of capacity."""
+        if error.status_ext in CAPACITY_ERRORS:
+            logging.warning("Account %s is at capacity.", account.name)
+            with self._lock:
+                account.concurrency.record_capacity_error()
+
+    def _by_account(self, job_ids: list[str]) -> dict[Account, list[str]]:
+        """Groups job_ids by the account to poll them with, marking them active."""
+        groups: dict[Account, list[str]] = {}
+        unowned = []
+        with self._lock:
+            now = self._clock()
+            for job_id in job_ids:
+                owner = self._jobs.get(job_id)
+                if owner is None:
+                    account = self.accounts[0]
+                    if job_id not in self._unowned:
+                        self._unowned.add(job_id)
+                        unowned.append(job_id)
+                else:
+                    account = owner[0]
+                    self._jobs[job_id] = (account, now)
+                groups.setdefault(account, []).append(job_id)
+        if unowned:
+            logging.info(
+                "Polling %d job(s) from an earlier run through account %s.",
+                len(unowned),
+                self.accounts[0].name,
+            )
+        return groups
+
+    def _settle(self, statuses: list[dict[str, Any]]) -> None:
+        """Frees the slots of finished jobs and feeds their outcome to their account."""
+        with self._lock:
+            for status_data in statuses:
+                status = status_data.get("status")
+                if status not in ("success", "error"):
+                    continue
+                job_id = status_data.get("job_id", "")
+                owner = self._jobs.pop(job_id, None)
+                if owner is None:
+                    self._unowned.discard(job_id)
+                    continue
+                account = owner[0]
+                account.add_in_flight(-1)
+                if status == "success":
+                    account.concurrency.record_success()
+                elif status_data.get("status_ext") in CAPACITY_ERRORS:
+                    logging.warning("Account %s is at capacity.", account.name)
+                    account.concurrency.record_capacity_error()
+
+    def submit_capture(
+        self,
+        url_to_archive: str,
+        rate_limiter: RateLimiter | None = None,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None:
+        """Submits a capture through the account with the most capacity free."""
+        account = self._reserve()
+        logging.debug("Submitting %s with account %s", url_to_archive, account.name)
+        job_id = None
+        try:
+            job_id = account.client.submit_capture(
+                url_to_archive, account.rate_limiter, api_params
+            )
+        except CaptureRejectedError as e:
+            self._rejected(account, e)
+            raise
+        finally:
+            self._submitted(account, url_to_archive, job_id)
+        return job_id
+
+    def check_status_batch(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        """Checks the status of jobs, asking the account that submitted each one."""
+        statuses: list[dict[str, Any]] = []
+        for account, account_job_ids in self._by_account(job_ids).items():
+            statuses.extend(account.client.check_status_batch(account_job_ids))
+        self._settle(statuses)
+        return statuses
+
+
+class AsyncAccountPool:
+    """Asyncio front-end for AccountPool; accounts are polled concurrently."""
+
+    def __init__(self, pool: AccountPool) -> None:
+        self.pool = pool
+        self._clients = {
+            account: AsyncSPN2Client(account.client) for account in pool.accounts
+        }
+
+    async def submit_capture(
+        self,
+        url_to_archive: str,
+        rate_limiter: RateLimiter | None = None,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None:
+        """Submits a capture through the account with the most capacity free."""
+        account = self.pool._reserve()
+        logging.debug("Submitting %s with account %s", url_to_archive, account.name)
+        job_id = None
+        try:
+            job_id = await self._clients[account].submit_capture(
+                url_to_archive, account.rate_limiter, api_params
+            )
+        except CaptureRejectedError as e:
+            self.pool._rejected(account, e)
+            raise
+        finally:
+            self.pool._submitted(account, url_to_archive, job_id)
+        return job_id
+
+    async def check_status_batch(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        """Checks the status of jobs, asking the account that submitted each one."""
+        groups = self.pool._by_account(job_ids)
+        results = await asyncio.gather(
+            *(
+                self._clients[account].check_status_batch(account_job_ids)
+                for account, account_job_ids in groups.items()
+            )
+        )
+        statuses = [status for result in results for status in result]
+        self.pool._settle(statuses)
+        return statuses
@@ -1,21 +1,48 @@
 import argparse
+import asyncio
+import itertools
 import json
 import logging
 import os
 import random
+import socket
 import sys
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager, nullcontext
 from datetime import datetime, timezone
-from urllib.parse import urlparse
 
 import requests
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .accounts import Account, AccountPool, AsyncAccountPool
+from .async_workflow import run_archive_workflow_async
+from .cache import SitemapCache
 from .cli import create_parser
-from .clients import SPN2Client
-from .sitemaps import process_sitemaps
-from .workflow import _NOOP_CALLBACK, ArchiveResult, run_archive_workflow
+from .clients import AsyncCaptureClient, AsyncSPN2Client, CaptureClient, SPN2Client
+from .concurrency import ConcurrencyController, ConcurrencyWindow
+from .coordination import Coordinator, SharedRateLimiter
+from .discovery import DiscoveryCache, discover_sitemaps
+from .history import ResultsHistory, url_digest
+from .journal import RunJournal
+from .politeness import HostPoliteness
+from .ratelimit import RateLimiter
+from .server import ArchiveServer
+from .sharding import in_shard
+from .shared_queue import SQLiteSharedQueue, drain, keeping_leases
+from .sitemaps import iter_sitemap_pages, iter_sitemap_urls
+from .state import SitemapState
+from .urls import is_valid_url
+from .work_queue import SourceWait
+from .workflow import (
+    _NOOP_CALLBACK,
+    MAX_PENDING_JOBS,
+    ArchiveResult,
+    ResultCallback,
+    result_record,
+    run_archive_workflow,
+)
 
 _DEFAULT_RETRY_COUNT = 5
 
@@ -38,22 +65,64 @@ def _create_session_with_retries(
     return session
 
 
-def _is_valid_url(url: str) -> bool:
-    """Check if a URL has a valid structure for archiving."""
-    try:
-        parsed = urlparse(url)
-        # Must have http or https scheme and a network location (domain)
-        return parsed.scheme in ("http", "https") and bool(parsed.netloc)
-    except ValueError:
-        return False
+Credentials = tuple[str, str]
 
 
-def _load_credentials() -> tuple[str, str]:
-    """Load and validate API credentials from environment."""
+def _env_credentials() -> list[Credentials]:
+    """
+    Reads INTERNET_ARCHIVE_ACCESS_KEY/SECRET_KEY, then any numbered pairs
+    (INTERNET_ARCHIVE_ACCESS_KEY_2, ..._3, ...) for additional accounts.
+    """
+    credentials = []
     access_key = os.getenv("INTERNET_ARCHIVE_ACCESS_KEY")
     secret_key = os.getenv("INTERNET_ARCHIVE_SECRET_KEY")
-
-    if not (access_key and secret_key):
+    if access_key and secret_key:
+        credentials.append((access_key, secret_key))
+    for n in itertools.count(2):
+        access_key = os.getenv(f"INTERNET_ARCHIVE_ACCESS_KEY_{n}")
+        secret_key = os.getenv(f"INTERNET_ARCHIVE_SECRET_KEY_{n}")
+        if not (access_key and secret_key):
+            break
+        credentials.append((access_key, secret_key))
+    return credentials
+
+
+def _file_credentials(path: str) -> list[Credentials]:
+    """Reads one ACCESS_KEY:SECRET_KEY pair per line, skipping blanks and # comments."""
+    credentials = []
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError as e:
+        logging.error("Could not read credentials file %s: %s", path, e)
+        sys.exit(1)
+    for line_num, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        access_key, _, secret_key = line.partition(":")
+        if not (access_key.strip() and secret_key.strip()):
+            logging.error(
+                "Line %d of %s is not an ACCESS_KEY:SECRET_KEY pair.",
+                line_num,
+                path,
+            )
+            sys.exit(1)
+        credentials.append((access_key.strip(), secret_key.strip()))
+    return credentials
+
+
+def _load_credentials(credentials_file: str | None = None) -> list[Credentials]:
+    """
+    Load and validate API credentials from the environment and, if given, a
+    credentials file. Each distinct access key is one account.
+    """
+    credentials = _env_credentials()
+    if credentials_file:
+        credentials += _file_credentials(credentials_file)
+    credentials = list(dict(credentials).items())
+
+    if not credentials:
         logging.error(
             "Authentication required. Please provide your Internet Archive S3-style keys."
         )
@@ -62,7 +131,7 @@ def _load_credentials() -> tuple[str, str]:
         logging.error("INTERNET_ARCHIVE_ACCESS_KEY and INTERNET_ARCHIVE_SECRET_KEY")
         sys.exit(1)
 
-    return access_key, secret_key
+    return credentials
 
 
 _MIN_RATE_LIMIT_SEC = 9
@@ -82,6 +151,25 @@ def _enforce_rate_limit(rate_limit: int) -> int:
     return rate_limit
 
 
+# Submissions that may go out back to back before --rate-limit-wait applies;
+# larger bursts would undo the minimum wait.
+_MAX_RATE_LIMIT_BURST = 3
+
+
+def _enforce_rate_limit_burst(burst: int) -> int:
+    """Cap the rate limit burst so the minimum wait still holds on average."""
+    if burst > _MAX_RATE_LIMIT_BURST:
+        logging.warning(
+            "Provided rate limit burst of %d is above the maximum of %d. "
+            "Overriding to %d.",
+            burst,
+            _MAX_RATE_LIMIT_BURST,
+            _MAX_RATE_LIMIT_BURST,
+        )
+        return _MAX_RATE_LIMIT_BURST
+    return burst
+
+
 def _build_api_params(args: argparse.Namespace) -> dict[str, str | int]:
     """Build API parameters dictionary from CLI args."""
     api_params: dict[str, str | int] = {}
@@ -110,63 +198,235 @@ def _build_api_params(args: argparse.Namespace) -> dict[str, str | int]:
     return api_params
 
 
-def _gather_urls(args: argparse.Namespace) -> set[str]:
-    """Collect URLs from all sources (CLI, sitemaps, file)."""
-    urls: set[str] = set()
+def _iter_source_urls(
+    args: argparse.Namespace, state: SitemapState | None = None
+) -> Iterator[str]:
+    """
+    Yield URLs from every source (CLI, file, sitemaps) as they become
+    available. Sitemaps come last since they are the slowest to produce;
+    those found by --discover-sitemaps follow the ones listed explicitly.
+    With a sitemap state, only sitemap pages that are new or changed since
+    they were last archived are yielded.
+    """
     logging.info("Gathering URLs to archive...")
 
     if args.urls:
         logging.info("Found %d URLs from command-line arguments.", len(args.urls))
-        urls.update(args.urls)
+        yield from args.urls
 
-    if args.sitemaps:
+    if args.file:
+        with open(args.file) as f:
+            for line in f:
+                if line.strip():
+                    yield line.strip()
+
+    sitemaps = list(args.sitemaps)
+    session = None
+    if args.discover_sitemaps:
         session = _create_session_with_retries()
-        logging.info("Processing %d sitemap(s)...", len(args.sitemaps))
-        sitemap_urls = process_sitemaps(args.sitemaps, session)
-        logging.info("Found %d URLs from sitemaps.", len(sitemap_urls))
-        urls.update(sitemap_urls)
+        discovery_cache = None
+        if args.discovery_cache:
+            discovery_cache = DiscoveryCache(
+                args.discovery_cache, args.discovery_ttl.total_seconds()
+            )
+        sitemaps += discover_sitemaps(
+            args.discover_sitemaps, session, cache=discovery_cache
+        )
+
+    if sitemaps:
         if args.archive_sitemap:
-            remote_sitemaps = {s for s in args.sitemaps if not s.startswith("file://")}
-            urls.update(remote_sitemaps)
+            yield from (s for s in sitemaps if not s.startswith("file://"))
+        session = session or _create_session_with_retries()
+        cache = SitemapCache(args.sitemap_cache) if args.sitemap_cache else None
+        max_bytes = args.sitemap_max_bytes
+        logging.info("Processing %d sitemap(s)...", len(sitemaps))
+        if state is None:
+            yield from iter_sitemap_urls(
+                sitemaps, session, cache=cache, max_bytes=max_bytes
+            )
+        else:
+            pages = iter_sitemap_pages(
+                sitemaps, session, cache=cache, state=state, max_bytes=max_bytes
+            )
+            yield from state.changed_pages(pages)
 
-    if args.file:
-        with open(args.file) as f:
-            urls_from_file = {line.strip() for line in f if line.strip()}
-            logging.info("Found %d URLs from file: %s", len(urls_from_file), args.file)
-            urls.update(urls_from_file)
 
-    return urls
+def _unique_urls(urls: Iterable[str]) -> Iterator[str]:
+    """Yield each URL the first time it is seen."""
+    seen: set[int] = set()
+    for url in urls:
+        digest = url_digest(url)
+        if digest not in seen:
+            seen.add(digest)
+            yield url
 
 
-def _filter_valid_urls(urls: set[str]) -> set[str]:
-    """Filter out invalid URLs and log warnings for them."""
-    invalid_urls = {url for url in urls if not _is_valid_url(url)}
-    if invalid_urls:
-        for url in invalid_urls:
+def _valid_urls(urls: Iterable[str]) -> Iterator[str]:
+    """Yield only URLs with a valid structure, logging a warning for the rest."""
+    for url in urls:
+        if is_valid_url(url):
+            yield url
+        else:
             logging.warning(
                 "Skipping invalid URL '%s': must have http:// or https:// scheme.",
                 url,
             )
-    return urls - invalid_urls
+
+
+def _load_results_history(args: argparse.Namespace) -> ResultsHistory | None:
+    """Loads --results-history, if given, exiting if a file cannot be read."""
+    if not args.results_history:
+        return None
+    since = None
+    if args.skip_archived_since is not None:
+        since = datetime.now(timezone.utc) - args.skip_archived_since
+    try:
+        return ResultsHistory.load(args.results_history, since)
+    except (OSError, EOFError) as e:
+        logging.error("Could not read --results-history: %s", e)
+        sys.exit(1)
+
+
+def _skip_previously_archived(
+    urls: Iterable[str], history: ResultsHistory
+) -> Iterator[str]:
+    """Drop URLs that history records as archived within the window."""
+    skipped = 0
+    for url in urls:
+        if url in history:
+            skipped += 1
+        else:
+            yield url
+    logging.info(
+        "Skipped %d URLs already archived according to previous results.", skipped
+    )
+
+
+def _url_pipeline(
+    args: argparse.Namespace, state: SitemapState | None = None
+) -> Iterator[str]:
+    """Chain the URL sources through de-duplication and filtering."""
+    urls = _iter_source_urls(args, state)
+    urls = _unique_urls(urls)
+    urls = _valid_urls(urls)
+    if args.shard_count is not None:
+        urls = in_shard(urls, args.shard_index, args.shard_count)
+    history = _load_results_history(args)
+    if history is not None:
+        urls = _skip_previously_archived(urls, history)
+    return urls
 
 
 def _write_json_result(result: ArchiveResult) -> None:
-    record = {
-        "url": result.url,
-        "job_id": result.job_id,
-        "status": result.status,
-        "archive_url": result.archive_url,
-        "error_code": result.error_code,
-        "recorded_at": datetime.now(timezone.utc).isoformat(),
-    }
-    sys.stdout.write(json.dumps(record) + "\n")
+    sys.stdout.write(json.dumps(result_record(result)) + "\n")
     sys.stdout.flush()
 
 
+def _recorded_in_state(
+    on_result: ResultCallback, state: SitemapState
+) -> ResultCallback:
+    """Wraps on_result so successful captures are also recorded in the sitemap state."""
+
+    def record_and_report(result: ArchiveResult) -> None:
+        state.record_result(result)
+        on_result(result)
+
+    return record_and_report
+
+
+def _completed_in_queue(
+    on_result: ResultCallback, shared_queue: SQLiteSharedQueue
+) -> ResultCallback:
+    """Wraps on_result so each final result is recorded in the shared queue."""
+
+    def complete_and_report(result: ArchiveResult) -> None:
+        shared_queue.complete(result.url, result.status)
+        on_result(result)
+
+    return complete_and_report
+
+
+def _open_shared_queue(args: argparse.Namespace) -> SQLiteSharedQueue | None:
+    """Opens the shared queue this process drains, if one was requested."""
+    if not args.shared_queue:
+        return None
+    worker_id = args.worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    logging.info("Draining shared queue %s as worker %s.", args.shared_queue, worker_id)
+    return SQLiteSharedQueue(args.shared_queue, worker_id)
+
+
+def _journal_urls(
+    journal: RunJournal, urls: Iterable[str | SourceWait]
+) -> Iterator[str | SourceWait]:
+    """
+    Yield the URLs a resumed run left queued, then each URL from urls that the
+    journal has not seen before, recording it as queued. Waits asked for by
+    the source are passed on.
+    """
+    yield from journal.queued_urls()
+    for url in urls:
+        if isinstance(url, SourceWait) or journal.record_queued([url]):
+            yield url
+
+
+def _open_journal(
+    args: argparse.Namespace, urls: Iterable[str | SourceWait]
+) -> tuple[RunJournal | None, Iterable[str | SourceWait]]:
+    """
+    Opens the run journal, if one was requested, and returns it with the URLs
+    still to be submitted: every URL for a fresh run, or the journal's queued
+    URLs plus any new ones when resuming.
+    """
+    if not args.journal:
+        return None, urls
+
+    journal = RunJournal(args.journal)
+    if args.resume:
+        logging.info("Resuming from journal %s.", args.journal)
+    else:
+        journal.reset()
+    return journal, _journal_urls(journal, urls)
+
+
+# Options that only apply to `archiver serve`, by destination.
+_SERVER_OPTIONS = {
+    "bind": "--bind",
+    "port": "--port",
+    "unix_socket": "--unix-socket",
+    "max_queue": "--max-queue",
+}
+
+
 def main() -> None:
     """Main entry point for the archiver script."""
     parser = create_parser()
-    args = parser.parse_args()
+    # `serve` is read as the first positional, so options may come before it
+    # and URLs may follow them.
+    args = parser.parse_intermixed_args(sys.argv[1:])
+    serving = args.urls[:1] == ["serve"]
+    if serving:
+        args.urls = args.urls[1:]
+    if args.resume and not args.journal:
+        parser.error("--resume requires --journal")
+    if args.skip_archived_since is not None and not args.results_history:
+        parser.error("--skip-archived-since requires --results-history")
+    if (args.shard_index is None) != (args.shard_count is None):
+        parser.error("--shard-index and --shard-count must be used together")
+    if args.shard_count is not None and not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be at least 0 and less than --shard-count")
+    if args.shared_queue and args.random_order:
+        parser.error("--random-order cannot be used with --shared-queue")
+    if serving and (args.journal or args.shared_queue or args.random_order):
+        parser.error(
+            "--journal, --shared-queue and --random-order cannot be used with serve"
+        )
+    server_options = [
+        flag
+        for dest, flag in _SERVER_OPTIONS.items()
+        if getattr(args, dest) != parser.get_default(dest)
+    ]
+    if server_options and not serving:
+        parser.error(f"{', '.join(server_options)} can only be used with serve")
 
     logging.basicConfig(
         level=args.log_level,
@@ -176,45 +436,266 @@ def main() -> None:
     )
     load_dotenv()
 
-    access_key, secret_key = _load_credentials()
+    credentials = _load_credentials(args.credentials_file)
     rate_limit = _enforce_rate_limit(args.rate_limit_in_sec)
+    args.rate_limit_burst = _enforce_rate_limit_burst(args.rate_limit_burst)
     api_params = _build_api_params(args)
 
     if api_params:
         logging.info("Using the following API parameters: %s", api_params)
 
-    urls_to_archive = _gather_urls(args)
-    urls_to_archive = _filter_valid_urls(urls_to_archive)
-
-    urls_to_process: list[str] = list(urls_to_archive)
-    if not urls_to_process:
-        logging.warning("No unique URLs found to archive. Exiting.")
+    state = SitemapState(args.sitemap_state) if args.sitemap_state else None
+    if serving:
+        try:
+            failure_count = _serve(
+                args,
+                _url_pipeline(args, state),
+                rate_limit,
+                credentials,
+                api_params,
+                state,
+            )
+        finally:
+            if state is not None:
+                state.close()
+        if failure_count > 0:
+            sys.exit(1)
         return
 
-    logging.info("Found a total of %d unique URLs to archive.", len(urls_to_process))
-    if args.random_order:
-        logging.info("Randomizing the order of URLs.")
-        random.shuffle(urls_to_process)
-
-    logging.info("SPN2 credentials found. Using authenticated API workflow.")
-    client_session = _create_session_with_retries()
-    client = SPN2Client(
-        session=client_session, access_key=access_key, secret_key=secret_key
+    shared_queue = _open_shared_queue(args)
+    inputs = _url_pipeline(args, state)
+    urls: Iterable[str | SourceWait] = (
+        inputs if shared_queue is None else drain(shared_queue, inputs)
     )
-    on_result = _write_json_result if args.json_output else _NOOP_CALLBACK
+    journal, urls_to_process = _open_journal(args, urls)
     try:
-        _, failure_count = run_archive_workflow(
-            client, urls_to_process, rate_limit, api_params, on_result=on_result
-        )
-    except BrokenPipeError:
-        devnull = os.open(os.devnull, os.O_WRONLY)
-        os.dup2(devnull, sys.stdout.fileno())
-        os.close(devnull)
-        sys.exit(1)
+        with keeping_leases(shared_queue) if shared_queue else nullcontext():
+            failure_count = _run_workflow(
+                args,
+                urls_to_process,
+                rate_limit,
+                credentials,
+                api_params,
+                journal,
+                state,
+                shared_queue,
+            )
+    finally:
+        if journal is not None:
+            journal.log_summary()
+            journal.close()
+        if state is not None:
+            state.close()
+        if shared_queue is not None:
+            logging.info("Shared queue: %s", shared_queue.counts())
+            shared_queue.close()
 
     if failure_count > 0:
         sys.exit(1)
 
 
+def _spn2_client(access_key: str, secret_key: str) -> SPN2Client:
+    return SPN2Client(
+        session=_create_session_with_retries(),
+        access_key=access_key,
+        secret_key=secret_key,
+    )
+
+
+def _concurrency_controller(args: argparse.Namespace) -> ConcurrencyController:
+    return ConcurrencyController(
+        min(MAX_PENDING_JOBS, args.max_pending_jobs), maximum=args.max_pending_jobs
+    )
+
+
+def _account_pool(
+    args: argparse.Namespace,
+    credentials: list[Credentials],
+    rate_limit: int,
+    journal: RunJournal | None = None,
+) -> AccountPool:
+    """
+    Builds an AccountPool with a client, rate limiter and in-flight window of
+    its own for each account, each limited as a lone account would be. With
+    --share-rate-limit, each account's limiter and window are also shared
+    with other processes using the account. With a journal, the pool records
+    which account each capture went to there.
+    """
+    accounts = []
+    for n, (access_key, secret_key) in enumerate(credentials, 1):
+        coordinator = None
+        rate_limiter = RateLimiter(rate_limit, burst=args.rate_limit_burst)
+        if args.share_rate_limit:
+            coordinator = Coordinator(args.share_rate_limit, access_key)
+            rate_limiter = SharedRateLimiter(
+                coordinator, rate_limit, burst=args.rate_limit_burst
+            )
+        accounts.append(
+            Account(
+                name=f"#{n}",
+                client=_spn2_client(access_key, secret_key),
+                rate_limiter=rate_limiter,
+                concurrency=_concurrency_controller(args),
+                coordinator=coordinator,
+            )
+        )
+    if len(accounts) > 1:
+        logging.info("Spreading captures across %d accounts.", len(accounts))
+    if args.share_rate_limit:
+        logging.info(
+            "Sharing rate limits and in-flight windows through %s.",
+            args.share_rate_limit,
+        )
+    return AccountPool(accounts, journal=journal)
+
+
+def _result_callback(
+    args: argparse.Namespace,
+    state: SitemapState | None = None,
+    shared_queue: SQLiteSharedQueue | None = None,
+) -> ResultCallback:
+    """Builds the callback that reports and records each final result."""
+    on_result: ResultCallback = (
+        _write_json_result if args.json_output else _NOOP_CALLBACK
+    )
+    if state is not None:
+        on_result = _recorded_in_state(on_result, state)
+    if shared_queue is not None:
+        on_result = _completed_in_queue(on_result, shared_queue)
+    return on_result
+
+
+@contextmanager
+def _capture_clients(
+    args: argparse.Namespace,
+    credentials: list[Credentials],
+    rate_limit: int,
+    journal: RunJournal | None = None,
+) -> Iterator[tuple[CaptureClient, AsyncCaptureClient, ConcurrencyWindow]]:
+    """
+    Yields the threaded and asyncio clients for the run, and the in-flight
+    window they share: a plain client for a lone account, or else a pool,
+    which is closed afterwards.
+    """
+    if len(credentials) == 1 and not args.share_rate_limit:
+        access_key, secret_key = credentials[0]
+        spn2_client = _spn2_client(access_key, secret_key)
+        yield spn2_client, AsyncSPN2Client(spn2_client), _concurrency_controller(args)
+        return
+    pool = _account_pool(args, credentials, rate_limit, journal)
+    try:
+        yield pool, AsyncAccountPool(pool), pool.window
+    finally:
+        pool.close()
+
+
+def _serve(
+    args: argparse.Namespace,
+    urls: Iterable[str],
+    rate_limit: int,
+    credentials: list[Credentials],
+    api_params: dict[str, str | int],
+    state: SitemapState | None = None,
+) -> int:
+    """
+    Runs `archiver serve`: archives URLs posted to the local endpoint, after
+    any given as inputs, until interrupted. Returns the number of failures.
+    """
+    with _capture_clients(args, credentials, rate_limit) as (
+        _,
+        async_client,
+        concurrency,
+    ):
+        server = ArchiveServer(
+            async_client,
+            api_params,
+            rate_limiter=RateLimiter(rate_limit, burst=args.rate_limit_burst),
+            concurrency=concurrency,
+            on_result=_result_callback(args, state),
+            politeness=HostPoliteness(args.host_min_interval),
+            max_queue=args.max_queue,
+        )
+        _, failure_count = asyncio.run(
+            server.serve(args.bind, args.port, args.unix_socket, urls)
+        )
+    return failure_count
+
+
+def _run_workflow(
+    args: argparse.Namespace,
+    urls: Iterable[str | SourceWait],
+    rate_limit: int,
+    credentials: list[Credentials],
+    api_params: dict[str, str | int],
+    journal: RunJournal | None,
+    state: SitemapState | None = None,
+    shared_queue: SQLiteSharedQueue | None = None,
+) -> int:
+    """
+    Runs the selected archive engine and returns the number of failures.
+    URLs are streamed into the engine as they are gathered, except with
+    --random-order, which has to collect them all before shuffling.
+    """
+    urls_iter = iter(urls)
+    first_url = next(urls_iter, None)
+    if first_url is None and not (journal and journal.has_outstanding()):
+        logging.warning("No unique URLs found to archive. Exiting.")
+        return 0
+
+    urls_to_process: Iterable[str | SourceWait] = urls_iter
+    if first_url is not None:
+        urls_to_process = itertools.chain([first_url], urls_iter)
+    if args.random_order:
+        shuffled = list(urls_to_process)
+        logging.info("Found a total of %d unique URLs to archive.", len(shuffled))
+        logging.info("Randomizing the order of URLs.")
+        random.shuffle(shuffled)
+        urls_to_process = shuffled
+
+    logging.info("SPN2 credentials found. Using authenticated API workflow.")
+    on_result = _result_callback(args, state, shared_queue)
+    rate_limiter = RateLimiter(rate_limit, burst=args.rate_limit_burst)
+    politeness = HostPoliteness(args.host_min_interval)
+    with _capture_clients(args, credentials, rate_limit, journal) as (
+        client,
+        async_client,
+        concurrency,
+    ):
+        try:
+            if args.use_async:
+                _, failure_count = asyncio.run(
+                    run_archive_workflow_async(
+                        async_client,
+                        urls_to_process,
+                        rate_limit,
+                        api_params,
+                        on_result=on_result,
+                        rate_limiter=rate_limiter,
+                        concurrency=concurrency,
+                        journal=journal,
+                        politeness=politeness,
+                    )
+                )
+            else:
+                _, failure_count = run_archive_workflow(
+                    client,
+                    urls_to_process,
+                    rate_limit,
+                    api_params,
+                    on_result=on_result,
+                    rate_limiter=rate_limiter,
+                    concurrency=concurrency,
+                    journal=journal,
+                    politeness=politeness,
+                )
+        except BrokenPipeError:
+            devnull = os.open(os.devnull, os.O_WRONLY)
+            os.dup2(devnull, sys.stdout.fileno())
+            os.close(devnull)
+            sys.exit(1)
+
+    return failure_count
+
+
 if __name__ == "__main__":
     main()
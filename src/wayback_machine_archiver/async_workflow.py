@@ -0,0 +1,386 @@
+import asyncio
+import logging
+from collections.abc import Iterable, Sequence
+
+import requests
+
+from .clients import AsyncCaptureClient
+from .concurrency import ConcurrencyWindow
+from .journal import RunJournal
+from .politeness import HostPoliteness
+from .polling import PollScheduler
+from .ratelimit import RateLimiter
+from .work_queue import SourceWait, WorkQueue
+from .workflow import (
+    _NOOP_CALLBACK,
+    INITIAL_POLLING_WAIT,
+    JOB_TIMEOUT_SEC,
+    MAX_CONSECUTIVE_POLL_FAILURES,
+    MAX_POLLING_WAIT,
+    MAX_TRANSIENT_RETRIES,
+    POLLING_BACKOFF_FACTOR,
+    ArchiveResult,
+    PendingJob,
+    ResultCallback,
+    _default_concurrency,
+    _fail_all_pending_jobs,
+    _finish_submission,
+    _log_summary,
+    _process_status_batch,
+    _requeue_failed_submission,
+    _restore_from_journal,
+    _seconds_until_next_poll,
+    _start_submission,
+    _succeeded_job_ids,
+)
+
+
+class _AsyncArchiveRun:
+    """
+    State for one run of the asyncio engine.
+
+    Submission, status polling and result reporting each run as their own task
+    and coordinate through a single condition, so a slow status poll never
+    delays the next submission. on_result is called from a worker thread, so
+    a slow callback never delays either; results wait in an unbounded queue
+    until it catches up.
+    """
+
+    def __init__(
+        self,
+        client: AsyncCaptureClient,
+        urls: Iterable[str | SourceWait],
+        rate_limiter: RateLimiter,
+        concurrency: ConcurrencyWindow,
+        scheduler: PollScheduler,
+        api_params: dict[str, str | int],
+        on_result: ResultCallback,
+        max_retries: int = 3,
+        journal: RunJournal | None = None,
+        politeness: HostPoliteness | None = None,
+    ) -> None:
+        self.client = client
+        self.work_queue = WorkQueue(urls, politeness=politeness)
+        self.rate_limiter = rate_limiter
+        self.concurrency = concurrency
+        self.scheduler = scheduler
+        self.api_params = api_params
+        self.on_result = on_result
+        self.max_retries = max_retries
+        self.journal = journal
+
+        self.pending_jobs: dict[str, PendingJob] = {}
+        self.submission_attempts: dict[str, int] = {}
+        self.transient_error_retries: dict[str, int] = {}
+        self.submissions_in_flight = 0
+        self.success_count = 0
+        self.failure_count = 0
+        # While set, the run waits for more URLs from add_urls() once its
+        # queue is empty instead of finishing.
+        self.accepting = False
+        self.added = 0
+
+        self._changed = asyncio.Condition()
+        self._results: asyncio.Queue[ArchiveResult | None] = asyncio.Queue()
+
+        if journal is not None:
+            _restore_from_journal(
+                journal,
+                self.pending_jobs,
+                self.submission_attempts,
+                self.transient_error_retries,
+                scheduler,
+            )
+        self.resumed_jobs = len(self.pending_jobs)
+
+    def _report(self, result: ArchiveResult) -> None:
+        if self.journal is not None:
+            self.journal.record_result(result)
+        self._results.put_nowait(result)
+
+    @property
+    def in_flight(self) -> int:
+        """Captures being submitted or waiting on a status check."""
+        return len(self.pending_jobs) + self.submissions_in_flight
+
+    def _is_done(self) -> bool:
+        return not (
+            self.accepting
+            or self.work_queue.has_work()
+            or self.pending_jobs
+            or self.submissions_in_flight
+        )
+
+    def _can_submit(self) -> bool:
+        return self.work_queue.has_ready() and (
+            len(self.pending_jobs) + self.submissions_in_flight < self.concurrency.limit
+        )
+
+    def _seconds_until_can_submit(self) -> float | None:
+        """
+        How long the submit loop may wait for a change it is not notified of:
+        a backed-off retry becoming ready, or, while the window is full, room
+        freed by another process sharing the account's window.
+        """
+        if (
+            len(self.pending_jobs) + self.submissions_in_flight
+            >= self.concurrency.limit
+        ):
+            return self.scheduler.min_interval
+        return self.work_queue.seconds_until_ready()
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def add_urls(self, urls: Sequence[str], limit: int | None = None) -> bool:
+        """
+        Queues more URLs for a run that is accepting them, unless that would
+        leave more than limit URLs waiting. Returns whether they were queued.
+        """
+        async with self._changed:
+            if not self.accepting:
+                raise RuntimeError("The run is no longer accepting URLs.")
+            if limit is not None and len(self.work_queue) + len(urls) > limit:
+                return False
+            self.work_queue.extend(urls)
+            self.added += len(urls)
+            self._changed.notify_all()
+        return True
+
+    async def wait_for_room(self, count: int, limit: int) -> None:
+        """Waits until count more URLs fit in the queue without exceeding limit."""
+        async with self._changed:
+            await self._changed.wait_for(
+                lambda: (
+                    len(self.work_queue) + count <= limit or not len(self.work_queue)
+                )
+            )
+
+    async def stop_accepting(self) -> None:
+        """Lets the run finish once the URLs already queued are done."""
+        async with self._changed:
+            self.accepting = False
+            self._changed.notify_all()
+
+    async def _submit_loop(self) -> None:
+        while True:
+            async with self._changed:
+                while not (self._is_done() or self._can_submit()):
+                    await self._wait_locked(self._seconds_until_can_submit())
+                if self._is_done():
+                    return
+                url = self.work_queue.pop_buffered()
+                self.submissions_in_flight += 1
+
+            try:
+                if url is None:
+                    # Producing the next URL may mean downloading a sitemap,
+                    # so it is done in a worker thread.
+                    await asyncio.to_thread(self.work_queue.fill)
+                    url = self.work_queue.pop_buffered()
+                if url is not None:
+                    await self._submit(url)
+            finally:
+                async with self._changed:
+                    self.submissions_in_flight -= 1
+                    self._changed.notify_all()
+
+    async def _submit(self, url: str) -> None:
+        attempt_num = _start_submission(
+            url,
+            self.submission_attempts,
+            self.max_retries,
+            self._report,
+            self.journal,
+        )
+        if attempt_num is None:
+            self.failure_count += 1
+            return
+
+        try:
+            logging.info(
+                "Submitting %s (attempt %d/%d)...", url, attempt_num, self.max_retries
+            )
+            job_id = await self.client.submit_capture(
+                url, rate_limiter=self.rate_limiter, api_params=self.api_params
+            )
+        except requests.exceptions.RequestException as e:
+            _requeue_failed_submission(
+                url,
+                e,
+                self.work_queue,
+                attempt_num,
+                submission_attempts=self.submission_attempts,
+                concurrency=self.concurrency,
+                journal=self.journal,
+            )
+            return
+
+        _finish_submission(
+            url,
+            job_id,
+            self.work_queue,
+            self.pending_jobs,
+            self.submission_attempts,
+            self.scheduler,
+            self.journal,
+        )
+
+    async def _wait_locked(self, timeout: float | None) -> None:
+        """Waits on the held condition for up to timeout seconds (None: no limit)."""
+        if timeout is not None and timeout <= 0:
+            # wait_for() would give up before wait() released the lock, so
+            # other tasks could never take it.
+            self._changed.release()
+            try:
+                await asyncio.sleep(0)
+            finally:
+                await self._changed.acquire()
+            return
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _wait_for_change(self, timeout: float) -> None:
+        """Sleeps for up to timeout seconds, waking early if the run state changes."""
+        async with self._changed:
+            await self._wait_locked(timeout)
+
+    async def _poll_loop(self) -> None:
+        consecutive_poll_failures = 0
+        polling_wait_time: float = INITIAL_POLLING_WAIT
+
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: self._is_done() or bool(self.pending_jobs)
+                )
+                if self._is_done():
+                    return
+
+            job_ids = [j for j in self.scheduler.pop_due() if j in self.pending_jobs]
+            if not job_ids:
+                await self._wait_for_change(_seconds_until_next_poll(self.scheduler))
+                continue
+
+            try:
+                batch_statuses = await self.client.check_status_batch(job_ids)
+            except (requests.RequestException, ValueError) as e:
+                for job_id in job_ids:
+                    self.scheduler.reschedule(job_id)
+                consecutive_poll_failures += 1
+                logging.warning(
+                    "Poll request failed (%d/%d consecutive failures): %s",
+                    consecutive_poll_failures,
+                    MAX_CONSECUTIVE_POLL_FAILURES,
+                    e,
+                )
+                if consecutive_poll_failures >= MAX_CONSECUTIVE_POLL_FAILURES:
+                    consecutive_poll_failures = 0
+                    self.failure_count += _fail_all_pending_jobs(
+                        self.pending_jobs, self._report
+                    )
+                    self.scheduler.clear()
+                    await self._notify()
+                else:
+                    await asyncio.sleep(polling_wait_time)
+                    polling_wait_time = min(
+                        int(polling_wait_time * POLLING_BACKOFF_FACTOR),
+                        MAX_POLLING_WAIT,
+                    )
+                continue
+
+            consecutive_poll_failures = 0
+            polling_wait_time = INITIAL_POLLING_WAIT
+            successful, failed, requeued = _process_status_batch(
+                batch_statuses,
+                self.pending_jobs,
+                self.transient_error_retries,
+                MAX_TRANSIENT_RETRIES,
+                JOB_TIMEOUT_SEC,
+                on_result=self._report,
+                concurrency=self.concurrency,
+                work_queue=self.work_queue,
+                journal=self.journal,
+            )
+            self.scheduler.after_poll(
+                job_ids, self.pending_jobs, _succeeded_job_ids(batch_statuses)
+            )
+            self.success_count += len(successful)
+            self.failure_count += len(failed)
+            if requeued:
+                logging.info(
+                    "Re-queued %d URLs due to transient API errors.", len(requeued)
+                )
+            await self._notify()
+
+    async def _produce(self) -> None:
+        try:
+            await asyncio.gather(self._submit_loop(), self._poll_loop())
+        finally:
+            self._results.put_nowait(None)
+
+    async def _dispatch_results(self) -> None:
+        while True:
+            result = await self._results.get()
+            if result is None:
+                return
+            # Callbacks may write to files and databases, so they run in a
+            # worker thread, one at a time and in order.
+            await asyncio.to_thread(self.on_result, result)
+
+    async def run(self) -> tuple[int, int]:
+        logging.info("Beginning concurrent submission and polling of URLs...")
+
+        tasks = [
+            asyncio.create_task(self._produce()),
+            asyncio.create_task(self._dispatch_results()),
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        _log_summary(
+            self.resumed_jobs + self.work_queue.pulled + self.added,
+            self.success_count,
+            self.failure_count,
+        )
+        return self.success_count, self.failure_count
+
+
+async def run_archive_workflow_async(
+    client: AsyncCaptureClient,
+    urls: Iterable[str | SourceWait],
+    rate_limit_in_sec: float,
+    api_params: dict[str, str | int],
+    *,
+    on_result: ResultCallback = _NOOP_CALLBACK,
+    rate_limiter: RateLimiter | None = None,
+    concurrency: ConcurrencyWindow | None = None,
+    scheduler: PollScheduler | None = None,
+    journal: RunJournal | None = None,
+    politeness: HostPoliteness | None = None,
+) -> tuple[int, int]:
+    """Runs the submit/poll workflow with submissions, polls and callbacks as asyncio tasks."""
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(rate_limit_in_sec)
+    if concurrency is None:
+        concurrency = _default_concurrency()
+    if scheduler is None:
+        scheduler = PollScheduler()
+    run = _AsyncArchiveRun(
+        client,
+        urls,
+        rate_limiter,
+        concurrency,
+        scheduler,
+        api_params,
+        on_result,
+        journal=journal,
+        politeness=politeness,
+    )
+    return await run.run()
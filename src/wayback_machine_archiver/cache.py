@@ -0,0 +1,110 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from io import RawIOBase
+from typing import IO, cast
+
+# Response headers kept with each cached body, and the request headers that
+# send them back on the next fetch.
+_VALIDATORS = {"ETag": "If-None-Match", "Last-Modified": "If-Modified-Since"}
+_DRAIN_CHUNK = 64 * 1024
+
+
+class _TeeReader(RawIOBase):
+    """Reads from source while copying every byte read into sink."""
+
+    def __init__(self, source: IO[bytes], sink: IO[bytes]) -> None:
+        self._source = source
+        self._sink = sink
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        data = self._source.read(len(buffer))
+        buffer[: len(data)] = data
+        self._sink.write(data)
+        return len(data)
+
+
+class SitemapCache:
+    """
+    On-disk copies of remote sitemaps, keyed by URL, for conditional GETs.
+
+    Each sitemap is stored as a body file plus a small JSON file holding its
+    ETag and Last-Modified validators. Bodies are written to a temporary file
+    while they are parsed and only replace the cached copy once the whole
+    response has been read, and the validators are likewise written aside
+    and renamed into place, so an interruption never leaves a truncated
+    sitemap or validator file behind.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str]) -> None:
+        self.directory = os.fspath(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url: str, suffix: str) -> str:
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _validators(self, url: str) -> dict[str, str]:
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as fp:
+                meta = json.load(fp)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(meta, dict) or meta.get("url") != url:
+            return {}
+        return {name: meta[name] for name in _VALIDATORS if meta.get(name)}
+
+    def conditional_headers(self, url: str) -> dict[str, str]:
+        """Returns If-None-Match/If-Modified-Since headers for a cached url."""
+        if not os.path.exists(self._path(url, ".body")):
+            return {}
+        return {
+            _VALIDATORS[name]: value for name, value in self._validators(url).items()
+        }
+
+    def open_body(self, url: str) -> IO[bytes]:
+        """Opens the cached body of url. Raises OSError if there is none."""
+        return open(self._path(url, ".body"), "rb")
+
+    @contextmanager
+    def storing(
+        self, url: str, body: IO[bytes], headers: Mapping[str, str]
+    ) -> Iterator[IO[bytes]]:
+        """
+        Yields body wrapped so that everything read from it is also written to
+        the cache. If the block finishes without an error, the rest of body is
+        read and the copy replaces the cached sitemap along with the validators
+        in headers; otherwise the copy is thrown away.
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as sink:
+                tee = _TeeReader(body, sink)
+                yield cast(IO[bytes], tee)
+                # The parser may stop before the end (e.g. a gzip trailer).
+                while tee.read(_DRAIN_CHUNK):
+                    pass
+            os.replace(tmp_path, self._path(url, ".body"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        # The validators are replaced after the body: validators newer than
+        # the body they describe would have a 304 revive a stale copy.
+        meta = {"url": url, **{n: headers[n] for n in _VALIDATORS if n in headers}}
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(meta, fp)
+            os.replace(tmp_path, self._path(url, ".json"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        logging.debug("Cached sitemap %s", url)
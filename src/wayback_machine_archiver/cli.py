@@ -1,8 +1,37 @@
 import argparse
 import logging
+from datetime import timedelta
 
 from . import __version__
-from .sitemaps import LOCAL_PREFIX
+from .discovery import DISCOVERY_TTL_SEC
+from .history import parse_duration
+from .server import DEFAULT_HOST, DEFAULT_PORT, MAX_QUEUE
+from .sitemaps import LOCAL_PREFIX, SITEMAP_MAX_BYTES
+from .workflow import MAX_PENDING_JOBS, MAX_PENDING_JOBS_CEILING
+
+
+def _duration(text: str) -> timedelta:
+    """argparse type for durations such as '3d 5h'."""
+    try:
+        return parse_duration(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _positive_int(text: str) -> int:
+    """argparse type for integers of at least 1."""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {text!r}")
+    return value
+
+
+def _non_negative_float(text: str) -> float:
+    """argparse type for numbers of at least 0."""
+    value = float(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {text!r}")
+    return value
 
 
 def create_parser() -> argparse.ArgumentParser:
@@ -34,6 +63,57 @@ def create_parser() -> argparse.ArgumentParser:
         help=f"Specifies one or more URIs to sitemaps listing pages to archive. Local paths must be prefixed with '{LOCAL_PREFIX}'.",
         required=False,
     )
+    parser.add_argument(
+        "--discover-sitemaps",
+        nargs="+",
+        default=[],
+        help="Specifies one or more origins (e.g. example.com) whose sitemaps are found from the Sitemap: lines of their robots.txt, or else from common paths such as /sitemap.xml, and archived as if given to --sitemaps.",
+        dest="discover_sitemaps",
+        metavar="ORIGIN",
+    )
+    parser.add_argument(
+        "--discovery-cache",
+        help="Specifies a JSON file in which to keep the sitemaps discovered for each origin, so later runs do not probe the origin again until --discovery-ttl has passed.",
+        dest="discovery_cache",
+        default=None,
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--discovery-ttl",
+        help=f"Specifies how long cached sitemap discovery results are reused (e.g., '12h', '7d'). Defaults to {DISCOVERY_TTL_SEC // 3600}h.",
+        dest="discovery_ttl",
+        default=timedelta(seconds=DISCOVERY_TTL_SEC),
+        type=_duration,
+        metavar="<duration>",
+    )
+    parser.add_argument(
+        "--sitemap-cache",
+        help="Specifies a directory in which to keep copies of downloaded sitemaps. Later runs send If-None-Match/If-Modified-Since and reuse the copy when a sitemap has not changed.",
+        dest="sitemap_cache",
+        default=None,
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--sitemap-max-bytes",
+        help=f"Specifies the largest sitemap, in bytes after decompression, that will be read. Larger sitemaps are abandoned as soon as they pass the limit; pages read before then are still archived. Defaults to {SITEMAP_MAX_BYTES}.",
+        dest="sitemap_max_bytes",
+        default=SITEMAP_MAX_BYTES,
+        type=_positive_int,
+    )
+    parser.add_argument(
+        "--sitemap-state",
+        help="Keeps each sitemap page's <lastmod> and last successful capture in a SQLite file at this path. Pages already archived at their current lastmod are skipped, so recurring runs only submit new or changed pages.",
+        dest="sitemap_state",
+        default=None,
+        metavar="PATH",
+    )
+    parser.add_argument(
+        "--credentials-file",
+        help="Specifies a file of Internet Archive S3-style keys, one ACCESS_KEY:SECRET_KEY pair per line, to use alongside any set in the environment. With several accounts, each gets its own rate limit and in-flight window and captures go to whichever has the most capacity free.",
+        dest="credentials_file",
+        default=None,
+        metavar="PATH",
+    )
     parser.add_argument(
         "--log",
         help="Sets the logging level. Defaults to WARNING (case-insensitive).",
@@ -68,6 +148,27 @@ def create_parser() -> argparse.ArgumentParser:
         default=15,
         type=int,
     )
+    parser.add_argument(
+        "--rate-limit-burst",
+        help="Specifies how many submissions may be sent back to back before --rate-limit-wait spacing applies. At most 3 are allowed. Defaults to 1.",
+        dest="rate_limit_burst",
+        default=1,
+        type=_positive_int,
+    )
+    parser.add_argument(
+        "--max-pending-jobs",
+        help=f"Specifies the most captures that may be in flight at once. The window starts at {MAX_PENDING_JOBS}, grows while captures succeed and shrinks when the account reports it is at capacity. Defaults to {MAX_PENDING_JOBS_CEILING}.",
+        dest="max_pending_jobs",
+        default=MAX_PENDING_JOBS_CEILING,
+        type=_positive_int,
+    )
+    parser.add_argument(
+        "--host-min-interval",
+        help="Specifies the minimum number of seconds between submissions of URLs on the same host; URLs on other hosts are submitted in between. The interval widens for hosts that rate-limit captures. Defaults to 0.",
+        dest="host_min_interval",
+        default=0.0,
+        type=_non_negative_float,
+    )
     parser.add_argument(
         "--random-order",
         help="Randomizes the order of pages before archiving.",
@@ -75,6 +176,68 @@ def create_parser() -> argparse.ArgumentParser:
         default=False,
         action="store_true",
     )
+    parser.add_argument(
+        "--async",
+        help="Runs submissions, status polls and result reporting as concurrent asyncio tasks, so slow status checks do not delay the submission cadence.",
+        dest="use_async",
+        default=False,
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--journal",
+        help="Records every URL's progress in a SQLite file at this path, so an interrupted run can be picked up with --resume. Without --resume an existing journal is cleared.",
+        dest="journal",
+        default=None,
+    )
+    parser.add_argument(
+        "--resume",
+        help="Continues the run recorded in --journal: submitted captures are polled rather than resubmitted, finished URLs are skipped, and any newly given URLs are added.",
+        dest="resume",
+        default=False,
+        action="store_true",
+    )
+
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        metavar="I",
+        help="Archives only the URLs in shard I (counting from 0) of --shard-count. Each URL falls in one shard by a stable hash, so several hosts given the same inputs split them without overlap.",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=_positive_int,
+        metavar="N",
+        help="Specifies how many shards --shard-index chooses from.",
+    )
+    parser.add_argument(
+        "--shared-queue",
+        metavar="PATH",
+        help="Drains a work queue kept in a SQLite file at this path, shared with other archiver processes. URLs from this run's inputs are added to it, and each process claims URLs from it in small leased batches; a process that dies stops renewing its leases and its URLs are claimed by the others.",
+    )
+    parser.add_argument(
+        "--worker-id",
+        metavar="ID",
+        help="Names this process in the --shared-queue. Defaults to HOSTNAME:PID.",
+    )
+    parser.add_argument(
+        "--share-rate-limit",
+        metavar="DIR",
+        help="Shares each account's submission rate limit and in-flight window with every other archiver process on this machine given the same DIR, so concurrent runs with the same credentials stay within one account's limits together.",
+    )
+    parser.add_argument(
+        "--results-history",
+        nargs="+",
+        default=[],
+        metavar="RESULTS",
+        help="Specifies one or more JSONL files (optionally gzipped) written by earlier --json runs. URLs they record as successfully archived are skipped before anything is submitted.",
+    )
+    parser.add_argument(
+        "--skip-archived-since",
+        type=_duration,
+        metavar="<duration>",
+        help="Only skips URLs whose successful result in --results-history is newer than <duration> (e.g., '3d 5h'). Without it, any earlier success is skipped.",
+    )
 
     # --- SPN2 API Options ---
     api_group = parser.add_argument_group(
@@ -152,4 +315,33 @@ def create_parser() -> argparse.ArgumentParser:
         help="Emits one JSONL line to stdout per URL result. Logs are written to stderr and can be suppressed with --log WARNING. Pipe to a file for persistence: archiver --json ... > results.jsonl",
     )
 
+    server_group = parser.add_argument_group(
+        "Server Options",
+        "Used with 'archiver serve [OPTIONS] [URLS]', which keeps running and archives URLs POSTed to /urls, one per line, streaming back one JSON result line per URL. GET /health reports the queue depth and captures in flight. Any URLs given as inputs are archived first.",
+    )
+    server_group.add_argument(
+        "--bind",
+        default=DEFAULT_HOST,
+        metavar="HOST",
+        help=f"Specifies the address to listen on. Defaults to {DEFAULT_HOST}.",
+    )
+    server_group.add_argument(
+        "--port",
+        type=int,
+        default=DEFAULT_PORT,
+        help=f"Specifies the TCP port to listen on. Defaults to {DEFAULT_PORT}.",
+    )
+    server_group.add_argument(
+        "--unix-socket",
+        metavar="PATH",
+        help="Listens on a unix socket at this path instead of a TCP port.",
+    )
+    server_group.add_argument(
+        "--max-queue",
+        type=_positive_int,
+        default=MAX_QUEUE,
+        metavar="N",
+        help=f"Specifies the most URLs that may wait to be submitted; requests that would exceed it are refused with 503 and Retry-After. Defaults to {MAX_QUEUE}.",
+    )
+
     return parser
@@ -1,14 +1,49 @@
+import asyncio
 import logging
-import time
-from typing import Any
+from typing import Any, Protocol
 
 import requests
 
 from . import REQUEST_TIMEOUT
+from .ratelimit import RateLimiter
 
 BATCH_STATUS_CHUNK_SIZE = 50
 
 
+class CaptureRejectedError(requests.RequestException):
+    """Raised when SPN2 answers a capture request with an error, not a job."""
+
+    def __init__(self, status_ext: str, message: str) -> None:
+        super().__init__(f"{message} (API code: {status_ext})")
+        self.status_ext = status_ext
+
+
+class CaptureClient(Protocol):
+    """What the workflow needs from an SPN2 client: SPN2Client or AccountPool."""
+
+    def submit_capture(
+        self,
+        url_to_archive: str,
+        rate_limiter: RateLimiter | None = None,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None: ...
+
+    def check_status_batch(self, job_ids: list[str]) -> list[dict[str, Any]]: ...
+
+
+class AsyncCaptureClient(Protocol):
+    """What the asyncio engine needs from an SPN2 client."""
+
+    async def submit_capture(
+        self,
+        url_to_archive: str,
+        rate_limiter: RateLimiter | None = None,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None: ...
+
+    async def check_status_batch(self, job_ids: list[str]) -> list[dict[str, Any]]: ...
+
+
 class SPN2Client:
     """
     Handles archiving using the authenticated SPN2 API.
@@ -33,21 +68,42 @@ class SPN2Client:
     def submit_capture(
         self,
         url_to_archive: str,
-        rate_limit_wait: float,
+        rate_limiter: RateLimiter | None = None,
         api_params: dict[str, str | int] | None = None,
     ) -> str | None:
-        """Submits a capture request to the SPN2 API."""
-        if rate_limit_wait > 0:
-            logging.debug("Sleeping for %s seconds", rate_limit_wait)
-            time.sleep(rate_limit_wait)
+        """Submits a capture request to the SPN2 API, waiting for a rate-limit slot first."""
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+        return self._post_capture(url_to_archive, api_params)
+
+    def _post_capture(
+        self,
+        url_to_archive: str,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None:
+        """
+        Sends the capture POST without any rate limiting. Raises
+        CaptureRejectedError if SPN2 refuses to start the capture.
+        """
         logging.info("Submitting %s to SPN2", url_to_archive)
         data: dict[str, str | int] = {"url": url_to_archive}
         if api_params:
             data.update(api_params)
 
         r = self.session.post(self.SAVE_URL, data=data, timeout=REQUEST_TIMEOUT)
+        try:
+            response_json = r.json()
+        except ValueError:
+            r.raise_for_status()
+            raise
+        # Refusals such as error:user-session-limit come back as a JSON error,
+        # sometimes with a 4xx/5xx status, in place of a job_id.
+        if isinstance(response_json, dict) and response_json.get("status") == "error":
+            raise CaptureRejectedError(
+                response_json.get("status_ext", "error:unknown"),
+                response_json.get("message", "Capture request rejected."),
+            )
         r.raise_for_status()
-        response_json = r.json()
         job_id: str | None = response_json.get("job_id")
         logging.info("Successfully submitted %s, job_id: %s", url_to_archive, job_id)
 
@@ -65,13 +121,56 @@ class SPN2Client:
         all_results: list[dict[str, Any]] = []
         for i in range(0, len(job_ids), BATCH_STATUS_CHUNK_SIZE):
             chunk = job_ids[i : i + BATCH_STATUS_CHUNK_SIZE]
-            data = {"job_ids": ",".join(chunk)}
-            r = self.session.post(self.STATUS_URL, data=data, timeout=REQUEST_TIMEOUT)
-            r.raise_for_status()
-            result = r.json()
-            if isinstance(result, list):
-                all_results.extend(result)
-            else:
-                all_results.append(result)
+            all_results.extend(self._post_status_chunk(chunk))
+        logging.debug("Status API response: %s", all_results)
+        return all_results
+
+    def _post_status_chunk(self, chunk: list[str]) -> list[dict[str, Any]]:
+        """Sends a single status POST for at most BATCH_STATUS_CHUNK_SIZE jobs."""
+        data = {"job_ids": ",".join(chunk)}
+        r = self.session.post(self.STATUS_URL, data=data, timeout=REQUEST_TIMEOUT)
+        r.raise_for_status()
+        result = r.json()
+        if isinstance(result, list):
+            return result
+        return [result]
+
+
+class AsyncSPN2Client:
+    """
+    Asyncio front-end for SPN2Client.
+
+    Rate-limit slots are awaited on the event loop, and the blocking HTTP calls
+    run in the default executor so they reuse the wrapped client's session and
+    retry configuration. Status chunks are posted concurrently.
+    """
+
+    def __init__(self, client: SPN2Client) -> None:
+        self.client = client
+
+    async def submit_capture(
+        self,
+        url_to_archive: str,
+        rate_limiter: RateLimiter | None = None,
+        api_params: dict[str, str | int] | None = None,
+    ) -> str | None:
+        """Submits a capture request to the SPN2 API, waiting for a rate-limit slot first."""
+        if rate_limiter is not None:
+            await rate_limiter.acquire_async()
+        return await asyncio.to_thread(
+            self.client._post_capture, url_to_archive, api_params
+        )
+
+    async def check_status_batch(self, job_ids: list[str]) -> list[dict[str, Any]]:
+        """Checks the status of multiple capture jobs, posting chunks concurrently."""
+        logging.debug("Checking status for %d jobs.", len(job_ids))
+        chunks = [
+            job_ids[i : i + BATCH_STATUS_CHUNK_SIZE]
+            for i in range(0, len(job_ids), BATCH_STATUS_CHUNK_SIZE)
+        ]
+        chunk_results = await asyncio.gather(
+            *(asyncio.to_thread(self.client._post_status_chunk, c) for c in chunks)
+        )
+        all_results = [status for result in chunk_results for status in result]
         logging.debug("Status API response: %s", all_results)
         return all_results
@@ -0,0 +1,76 @@
+import logging
+import time
+from collections.abc import Callable
+from typing import Protocol
+
+# Successive capacity errors inside this window count as one congestion signal,
+# so a single poll that returns many session-limit errors only halves once.
+DECREASE_COOLDOWN_SEC = 30.0
+
+
+class ConcurrencyWindow(Protocol):
+    """What the workflow needs from its in-flight window: a controller or a pool's."""
+
+    @property
+    def limit(self) -> int: ...
+
+    def record_success(self) -> None: ...
+
+    def record_capacity_error(self) -> None: ...
+
+
+class ConcurrencyController:
+    """
+    Additive-increase/multiplicative-decrease window for in-flight captures.
+
+    The window grows by one job after each full window's worth of successful
+    captures; an account capacity error (session limit, no browsers)
+    shrinks it by `decrease_factor`, at most once per cooldown.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        *,
+        minimum: int = 1,
+        maximum: int | None = None,
+        decrease_factor: float = 0.5,
+        cooldown_sec: float = DECREASE_COOLDOWN_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum if maximum is not None else initial)
+        self.decrease_factor = decrease_factor
+        self.cooldown_sec = cooldown_sec
+        self._clock = clock
+        self._window = min(max(initial, self.minimum), self.maximum)
+        self._successes = 0
+        self._last_decrease: float | None = None
+
+    @property
+    def limit(self) -> int:
+        """The current number of captures that may be in flight at once."""
+        return self._window
+
+    def record_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self._window:
+            self._successes = 0
+            self._window = min(self._window + 1, self.maximum)
+
+    def record_capacity_error(self) -> None:
+        now = self._clock()
+        if (
+            self._last_decrease is not None
+            and now - self._last_decrease < self.cooldown_sec
+        ):
+            return
+        self._last_decrease = now
+        self._successes = 0
+        previous = self._window
+        self._window = max(int(self._window * self.decrease_factor), self.minimum)
+        logging.warning(
+            "Account capacity reached; reducing in-flight captures from %d to %d.",
+            previous,
+            self._window,
+        )
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from .ratelimit import RateLimiter
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore[assignment]
+
+# Other processes' in-flight counts are re-read at most this often, since the
+# window is checked on every pass of the submit loop.
+IN_FLIGHT_TTL_SEC = 1.0
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Coordinator:
+    """
+    The submission budget and in-flight captures of one account, shared by
+    every archiver process on this machine that uses the account with the
+    same coordination directory.
+
+    State lives in a small JSON file, named after a hash of the access key,
+    read under a shared file lock and updated under an exclusive one. Entries
+    left by processes that are no longer running are ignored, and dropped at
+    the next update.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        access_key: str,
+        *,
+        clock: Callable[[], float] = time.time,
+        in_flight_ttl: float = IN_FLIGHT_TTL_SEC,
+    ) -> None:
+        if fcntl is None:
+            raise OSError("Sharing a rate limit between processes needs POSIX locks.")
+        os.makedirs(directory, exist_ok=True)
+        key = hashlib.sha256(access_key.encode("utf-8")).hexdigest()[:16]
+        self.path = os.path.join(os.fspath(directory), f"{key}.json")
+        # Every process must read the same clock, so wall time is used.
+        self.clock = clock
+        self._pid = str(os.getpid())
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        # flock() does not exclude other threads holding the same descriptor.
+        self._mutex = threading.Lock()
+        self.in_flight_ttl = in_flight_ttl
+        self._others: tuple[float, int] | None = None
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def _read_state(self) -> dict[str, Any]:
+        raw = os.pread(self._fd, os.fstat(self._fd).st_size, 0)
+        try:
+            state = json.loads(raw) if raw else {}
+        except ValueError:
+            state = {}
+        if not isinstance(state, dict):
+            state = {}
+        in_flight = state.setdefault("in_flight", {})
+        for pid in list(in_flight):
+            if pid != self._pid and not _is_running(int(pid)):
+                del in_flight[pid]
+        return state
+
+    @contextmanager
+    def _flocked(self, operation: int) -> Iterator[None]:
+        with self._mutex:
+            fcntl.flock(self._fd, operation)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def read(self) -> dict[str, Any]:
+        """Returns the shared state, read under a shared lock."""
+        with self._flocked(fcntl.LOCK_SH):
+            return self._read_state()
+
+    @contextmanager
+    def locked(self) -> Iterator[dict[str, Any]]:
+        """Yields the shared state under an exclusive lock, writing it back afterwards."""
+        with self._flocked(fcntl.LOCK_EX):
+            state = self._read_state()
+            yield state
+            data = json.dumps(state).encode("utf-8")
+            os.pwrite(self._fd, data, 0)
+            os.ftruncate(self._fd, len(data))
+
+    def publish_in_flight(self, count: int) -> None:
+        """Records how many captures this process has in flight."""
+        with self.locked() as state:
+            if count > 0:
+                state["in_flight"][self._pid] = count
+            else:
+                state["in_flight"].pop(self._pid, None)
+
+    def others_in_flight(self) -> int:
+        """
+        How many captures other running processes have in flight, as of at
+        most in_flight_ttl seconds ago.
+        """
+        now = self.clock()
+        if self._others is None or now - self._others[0] >= self.in_flight_ttl:
+            in_flight = self.read()["in_flight"]
+            others = sum(n for pid, n in in_flight.items() if pid != self._pid)
+            self._others = (now, others)
+        return self._others[1]
+
+
+class SharedRateLimiter(RateLimiter):
+    """
+    RateLimiter whose next free slot is kept by a Coordinator, so that all the
+    processes sharing it draw on one submission budget.
+    """
+
+    def __init__(
+        self, coordinator: Coordinator, interval: float, burst: int = 1
+    ) -> None:
+        super().__init__(interval, burst, clock=coordinator.clock)
+        self.coordinator = coordinator
+
+    def delay(self) -> float:
+        self._full_at = self.coordinator.read().get("full_at", self._full_at)
+        return super().delay()
+
+    def reserve(self) -> float:
+        with self.coordinator.locked() as state:
+            self._full_at = state.get("full_at", self._full_at)
+            wait = super().reserve()
+            state["full_at"] = self._full_at
+            return wait
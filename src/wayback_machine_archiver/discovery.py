@@ -0,0 +1,204 @@
+import json
+import logging
+import os
+import tempfile
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse
+from urllib.robotparser import RobotFileParser
+
+import requests
+
+from . import REQUEST_TIMEOUT
+from .sitemaps import SITEMAP_FETCH_WORKERS
+
+# Paths probed, in order, when robots.txt lists no sitemaps.
+COMMON_SITEMAP_PATHS = ("/sitemap.xml", "/sitemap_index.xml", "/sitemap.xml.gz")
+# How long a discovery result is reused before the origin is probed again.
+DISCOVERY_TTL_SEC = 24 * 60 * 60
+# robots.txt files larger than this are truncated; Google reads 500 KiB.
+_ROBOTS_MAX_BYTES = 512 * 1024
+
+
+class DiscoveryUnreachableError(requests.RequestException):
+    """Raised when an origin could not be asked about its sitemaps at all."""
+
+
+def normalize_origin(origin: str) -> str:
+    """Returns scheme://host[:port] for an origin, defaulting to https."""
+    if "://" not in origin:
+        origin = "https://" + origin
+    parsed = urlparse(origin)
+    if parsed.scheme not in ("http", "https") or not parsed.netloc:
+        raise ValueError(f"Not a web origin: {origin!r}")
+    return f"{parsed.scheme.lower()}://{parsed.netloc.lower()}"
+
+
+class DiscoveryCache:
+    """
+    Sitemaps found for each origin, kept in a JSON file so recurring runs do
+    not probe every origin again.
+
+    Results are reused for ttl seconds, including the result that an origin
+    has no sitemap at all.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike[str], ttl: float = DISCOVERY_TTL_SEC
+    ) -> None:
+        self.path = os.fspath(path)
+        self.ttl = ttl
+        self._entries: dict[str, dict[str, object]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as fp:
+                entries = json.load(fp)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable discovery cache %s: %s", path, e)
+            return
+        if isinstance(entries, dict):
+            self._entries = entries
+
+    def get(self, origin: str) -> list[str] | None:
+        """Returns the sitemaps found for origin, or None if unknown or stale."""
+        entry = self._entries.get(origin)
+        if not isinstance(entry, dict):
+            return None
+        checked_at, sitemaps = entry.get("checked_at"), entry.get("sitemaps")
+        if not isinstance(checked_at, (int, float)) or not isinstance(sitemaps, list):
+            return None
+        if time.time() - checked_at >= self.ttl:
+            return None
+        return [str(s) for s in sitemaps]
+
+    def put(self, origin: str, sitemaps: list[str]) -> None:
+        self._entries[origin] = {"sitemaps": sitemaps, "checked_at": time.time()}
+
+    def save(self) -> None:
+        """
+        Writes the cache, replacing the old file only once fully written. A
+        cache that cannot be written is logged and left as it was, since the
+        sitemaps discovered are still usable for this run.
+        """
+        try:
+            self._write()
+        except OSError as e:
+            logging.warning("Could not write discovery cache %s: %s", self.path, e)
+
+    def _write(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as fp:
+                json.dump(self._entries, fp)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _robots_sitemaps(origin: str, session: requests.Session) -> list[str] | None:
+    """
+    Returns the Sitemap: URLs listed in origin's robots.txt, or None if the
+    origin has no robots.txt.
+    """
+    robots_url = origin + "/robots.txt"
+    with session.get(robots_url, timeout=REQUEST_TIMEOUT, stream=True) as r:
+        if r.status_code >= 400:
+            return None
+        body = r.raw.read(_ROBOTS_MAX_BYTES, decode_content=True)
+    parser = RobotFileParser(robots_url)
+    parser.parse(body.decode("utf-8", errors="replace").splitlines())
+    # Sitemap: URLs should be absolute but relative ones are seen in the wild.
+    return [urljoin(robots_url, url) for url in parser.site_maps() or []]
+
+
+def _probe_common_paths(origin: str, session: requests.Session) -> list[str]:
+    """Returns the first of COMMON_SITEMAP_PATHS that origin serves."""
+    for path in COMMON_SITEMAP_PATHS:
+        url = origin + path
+        # Many servers mishandle HEAD, so the body is requested but not read.
+        with session.get(url, timeout=REQUEST_TIMEOUT, stream=True) as r:
+            if r.status_code == 200:
+                return [url]
+    return []
+
+
+def discover_origin(origin: str, session: requests.Session) -> list[str]:
+    """
+    Finds the sitemaps of one origin: those its robots.txt lists, or else the
+    first common sitemap path that exists. Raises DiscoveryUnreachableError if
+    the origin could not be reached.
+    """
+    try:
+        sitemaps = _robots_sitemaps(origin, session)
+        if not sitemaps:
+            sitemaps = _probe_common_paths(origin, session)
+    except requests.RequestException as e:
+        raise DiscoveryUnreachableError(f"{origin}: {e}") from e
+    return sitemaps
+
+
+def discover_sitemaps(
+    origins: Iterable[str],
+    session: requests.Session,
+    *,
+    cache: DiscoveryCache | None = None,
+    max_workers: int = SITEMAP_FETCH_WORKERS,
+) -> list[str]:
+    """
+    Returns the sitemaps of every origin, in the order the origins are given.
+
+    Origins with a fresh entry in cache are not contacted. The rest are probed
+    concurrently and their results, including finding no sitemap, are stored
+    in cache. Origins that cannot be reached are logged, skipped and left
+    uncached so the next run tries them again.
+    """
+    normalized: list[str] = []
+    for origin in origins:
+        try:
+            normalized.append(normalize_origin(origin))
+        except ValueError as e:
+            logging.warning("Skipping sitemap discovery: %s", e)
+
+    found: dict[str, list[str]] = {}
+    to_probe = []
+    normalized = list(dict.fromkeys(normalized))
+    for origin in normalized:
+        cached = cache.get(origin) if cache is not None else None
+        if cached is None:
+            to_probe.append(origin)
+        else:
+            found[origin] = cached
+    if found:
+        logging.info("Reused cached sitemap discovery for %d origins.", len(found))
+
+    def probe(origin: str) -> list[str] | None:
+        try:
+            return discover_origin(origin, session)
+        except DiscoveryUnreachableError as e:
+            logging.warning("Could not discover sitemaps for %s", e)
+            return None
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            for origin, sitemaps in zip(to_probe, pool.map(probe, to_probe)):
+                if sitemaps is None:
+                    continue
+                if not sitemaps:
+                    logging.warning("No sitemaps found for %s", origin)
+                found[origin] = sitemaps
+                if cache is not None:
+                    cache.put(origin, sitemaps)
+        if cache is not None:
+            cache.save()
+
+    sitemaps = list(
+        dict.fromkeys(s for origin in normalized for s in found.get(origin, []))
+    )
+    logging.info(
+        "Discovered %d sitemaps for %d origins.", len(sitemaps), len(normalized)
+    )
+    return sitemaps
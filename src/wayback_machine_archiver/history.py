@@ -0,0 +1,120 @@
+import gzip
+import heapq
+import itertools
+import json
+import logging
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timedelta, timezone
+from hashlib import blake2b
+from io import BufferedIOBase
+
+GZIP_MAGIC = b"\x1f\x8b"
+# Digests are sorted this many at a time, as Python ints, before merging.
+_SORT_RUN = 1 << 20
+
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)\s*([smhdw])", re.IGNORECASE)
+
+__all__ = ["ResultsHistory", "parse_duration"]
+
+
+def parse_duration(text: str) -> timedelta:
+    """Parse a duration such as '3d 5h' or '90m' (units: s, m, h, d, w)."""
+    stripped = text.strip()
+    parts = list(_DURATION_PART.finditer(stripped))
+    if not parts or _DURATION_PART.sub("", stripped).strip():
+        raise ValueError(f"invalid duration: {text!r}")
+    seconds = sum(
+        float(part.group(1)) * _DURATION_UNITS[part.group(2).lower()] for part in parts
+    )
+    return timedelta(seconds=seconds)
+
+
+def url_digest(url: str) -> int:
+    """Return a 64-bit digest of url, used as its key in the history index."""
+    return int.from_bytes(blake2b(url.encode(), digest_size=8).digest(), "big")
+
+
+def _open_results(path: str) -> BufferedIOBase:
+    """Open a results file, transparently decompressing gzip."""
+    with open(path, "rb") as fp:
+        magic = fp.read(len(GZIP_MAGIC))
+    if magic == GZIP_MAGIC:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def _successful_results(path: str) -> Iterator[tuple[str, datetime]]:
+    """Yield (url, recorded_at) for each success record in a JSONL results file."""
+    skipped = 0
+    with _open_results(path) as fp:
+        for line in fp:
+            try:
+                record = json.loads(line)
+                if record.get("status") != "success":
+                    continue
+                recorded_at = datetime.fromisoformat(record["recorded_at"])
+                url = record["url"]
+            except (ValueError, KeyError, TypeError, AttributeError):
+                skipped += 1
+                continue
+            if recorded_at.tzinfo is None:
+                recorded_at = recorded_at.replace(tzinfo=timezone.utc)
+            yield url, recorded_at
+    if skipped:
+        logging.warning("Skipped %d unreadable lines in %s.", skipped, path)
+
+
+def _sorted_unique(digests: Iterable[int]) -> "array[int]":
+    """
+    Sorts and de-duplicates digests into an array, holding only runs of
+    _SORT_RUN of them as Python ints at any one time.
+    """
+    source = iter(digests)
+    runs = []
+    while run := sorted(itertools.islice(source, _SORT_RUN)):
+        runs.append(array("Q", run))
+    merged = array("Q")
+    for digest, _ in itertools.groupby(heapq.merge(*runs)):
+        merged.append(digest)
+    return merged
+
+
+class ResultsHistory:
+    """
+    Index of URLs successfully archived by earlier runs, read from the JSONL
+    files written by --json.
+
+    Only a sorted array of 64-bit URL digests is kept in memory, 8 bytes per
+    URL, so even histories of millions of results take a few megabytes.
+    Loading briefly needs twice that, plus one sorting run.
+    """
+
+    def __init__(self, digests: Iterable[int] = ()) -> None:
+        self._digests = _sorted_unique(digests)
+
+    @classmethod
+    def load(
+        cls, paths: Iterable[str], since: datetime | None = None
+    ) -> "ResultsHistory":
+        """Index successes recorded in paths, ignoring any older than since."""
+        digests = array("Q")
+        for path in paths:
+            logging.info("Loading previous results from %s", path)
+            for url, recorded_at in _successful_results(path):
+                if since is None or recorded_at >= since:
+                    digests.append(url_digest(url))
+        return cls(digests)
+
+    def __len__(self) -> int:
+        return len(self._digests)
+
+    def __contains__(self, url: object) -> bool:
+        if not isinstance(url, str):
+            return False
+        digest = url_digest(url)
+        i = bisect_left(self._digests, digest)
+        return i < len(self._digests) and self._digests[i] == digest
@@ -0,0 +1,232 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .workflow import ArchiveResult
+
+# Pending writes are committed once this many have accumulated, or once
+# COMMIT_INTERVAL_SEC has passed since the last commit, whichever is first.
+COMMIT_EVERY = 100
+COMMIT_INTERVAL_SEC = 5.0
+
+QUEUED = "queued"
+SUBMITTED = "submitted"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    job_id TEXT,
+    submitted_at REAL,
+    submit_attempts INTEGER NOT NULL DEFAULT 0,
+    transient_retries INTEGER NOT NULL DEFAULT 0,
+    error_code TEXT,
+    updated_at REAL NOT NULL,
+    -- Name of the account a submitted capture was sent with, if there are several.
+    account TEXT
+);
+CREATE INDEX IF NOT EXISTS urls_state ON urls (state);
+"""
+
+
+class RunJournal:
+    """
+    Crash-safe record of each URL's progress through an archive run.
+
+    Every transition (queued, submitted with a job_id, done, failed) and the
+    URL's retry counters are written to a WAL-mode SQLite file. Writes are
+    committed in batches, so a crash loses at most the last batch; a resumed
+    run re-polls the job_ids that were recorded as submitted instead of
+    submitting those URLs again.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        commit_every: int = COMMIT_EVERY,
+        commit_interval_sec: float = COMMIT_INTERVAL_SEC,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        self.commit_interval_sec = commit_interval_sec
+        self._clock = clock
+        # The asyncio engine records queued URLs from the worker thread that
+        # reads the URL source while the loop records results, so every use
+        # of the connection and the commit counter holds this lock.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(urls)")}
+        if "account" not in columns:
+            # Journals written before accounts were recorded.
+            self._conn.execute("ALTER TABLE urls ADD COLUMN account TEXT")
+        self._uncommitted = 0
+        self._last_commit = clock()
+
+    def __enter__(self) -> "RunJournal":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            self._conn.close()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+            self._last_commit = self._clock()
+
+    def _wrote(self, count: int = 1) -> None:
+        with self._lock:
+            self._uncommitted += count
+            if (
+                self._uncommitted >= self.commit_every
+                or self._clock() - self._last_commit >= self.commit_interval_sec
+            ):
+                self.commit()
+
+    def reset(self) -> None:
+        """Forgets every URL, for a fresh run reusing an existing journal file."""
+        with self._lock:
+            self._conn.execute("DELETE FROM urls")
+            self.commit()
+
+    def record_queued(self, urls: Iterable[str]) -> int:
+        """Adds URLs not already in the journal as queued. Returns how many were new."""
+        with self._lock:
+            now = time.time()
+            cursor = self._conn.executemany(
+                "INSERT OR IGNORE INTO urls (url, state, updated_at) VALUES (?, ?, ?)",
+                ((url, QUEUED, now) for url in urls),
+            )
+            added = max(cursor.rowcount, 0)
+            self._wrote(added)
+            return added
+
+    def record_attempt(self, url: str, attempt_num: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET submit_attempts = ?, updated_at = ? WHERE url = ?",
+                (attempt_num, time.time(), url),
+            )
+            self._wrote()
+
+    def record_submitted(self, url: str, job_id: str, submitted_at: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET state = ?, job_id = ?, submitted_at = ?,"
+                " submit_attempts = 0, updated_at = ? WHERE url = ?",
+                (SUBMITTED, job_id, submitted_at, time.time(), url),
+            )
+            self._wrote()
+
+    def record_account(self, url: str, account: str) -> None:
+        """Records which account url's capture was submitted with."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET account = ? WHERE url = ?", (account, url)
+            )
+            self._wrote()
+
+    def record_requeued(self, url: str, transient_retries: int) -> None:
+        with self._lock:
+            self._conn.execute(
+                "UPDATE urls SET state = ?, job_id = NULL, submitted_at = NULL,"
+                " account = NULL, transient_retries = ?, updated_at = ? WHERE url = ?",
+                (QUEUED, transient_retries, time.time(), url),
+            )
+            self._wrote()
+
+    def record_result(self, result: "ArchiveResult") -> None:
+        with self._lock:
+            state = DONE if result.status == "success" else FAILED
+            self._conn.execute(
+                "UPDATE urls SET state = ?, job_id = ?, error_code = ?, updated_at = ?"
+                " WHERE url = ?",
+                (state, result.job_id, result.error_code, time.time(), result.url),
+            )
+            self._wrote()
+
+    def queued_urls(self) -> list[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM urls WHERE state = ? ORDER BY rowid", (QUEUED,)
+            )
+            return [url for (url,) in rows]
+
+    def submitted_jobs(self) -> dict[str, tuple[str, float]]:
+        """Returns {job_id: (url, submitted_at)} for captures still awaiting a result."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, url, submitted_at FROM urls WHERE state = ?",
+                (SUBMITTED,),
+            )
+            return {job_id: (url, submitted_at) for job_id, url, submitted_at in rows}
+
+    def job_accounts(self) -> dict[str, str]:
+        """Returns {job_id: account} for awaited captures whose account is known."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job_id, account FROM urls"
+                " WHERE state = ? AND account IS NOT NULL",
+                (SUBMITTED,),
+            )
+            return dict(rows.fetchall())
+
+    def retry_counters(self) -> tuple[dict[str, int], dict[str, int]]:
+        """Returns the (submission_attempts, transient_error_retries) to restore."""
+        with self._lock:
+            submission_attempts: dict[str, int] = {}
+            transient_error_retries: dict[str, int] = {}
+            rows = self._conn.execute(
+                "SELECT url, submit_attempts, transient_retries FROM urls"
+                " WHERE state IN (?, ?) AND (submit_attempts > 0 OR transient_retries > 0)",
+                (QUEUED, SUBMITTED),
+            )
+            for url, submit_attempts, transient_retries in rows:
+                if submit_attempts:
+                    submission_attempts[url] = submit_attempts
+                if transient_retries:
+                    transient_error_retries[url] = transient_retries
+            return submission_attempts, transient_error_retries
+
+    def has_outstanding(self) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM urls WHERE state IN (?, ?) LIMIT 1", (QUEUED, SUBMITTED)
+            ).fetchone()
+            return row is not None
+
+    def log_summary(self) -> None:
+        with self._lock:
+            counts = dict(
+                self._conn.execute("SELECT state, COUNT(*) FROM urls GROUP BY state")
+            )
+        logging.info(
+            "Journal %s: %d queued, %d submitted, %d done, %d failed.",
+            self.path,
+            counts.get(QUEUED, 0),
+            counts.get(SUBMITTED, 0),
+            counts.get(DONE, 0),
+            counts.get(FAILED, 0),
+        )
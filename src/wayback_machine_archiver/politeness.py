@@ -0,0 +1,83 @@
+import logging
+import time
+from collections.abc import Callable
+from urllib.parse import urlparse
+
+# Interval a host is given the first time it throttles us, if its current
+# interval is shorter.
+THROTTLED_HOST_INTERVAL_SEC = 60.0
+MAX_HOST_INTERVAL_SEC = 900.0
+# Each throttle multiplies a host's interval by this; each success divides it.
+HOST_INTERVAL_WIDEN_FACTOR = 2.0
+
+
+def url_host(url: str) -> str:
+    """Returns the lower-cased host of url, or '' if it has none."""
+    try:
+        return urlparse(url).hostname or ""
+    except ValueError:
+        return ""
+
+
+class HostPoliteness:
+    """
+    Minimum spacing between submissions of URLs on the same target host.
+
+    Every host starts at `min_interval`. When a host rate-limits captures
+    (too-many-requests, bandwidth-limit-exceeded) its interval widens, and each
+    successful capture narrows it again, back down to `min_interval`.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 0.0,
+        *,
+        max_interval: float = MAX_HOST_INTERVAL_SEC,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max(max_interval, min_interval)
+        self._clock = clock if clock is not None else time.time
+        self._intervals: dict[str, float] = {}
+        self._next_allowed: dict[str, float] = {}
+
+    def interval(self, host: str) -> float:
+        return self._intervals.get(host, self.min_interval)
+
+    def seconds_until_ready(self, host: str) -> float:
+        return max(0.0, self._next_allowed.get(host, 0.0) - self._clock())
+
+    def is_ready(self, host: str) -> bool:
+        return self.seconds_until_ready(host) == 0
+
+    def record_submission(self, url: str) -> None:
+        host = url_host(url)
+        interval = self.interval(host)
+        if interval > 0:
+            self._next_allowed[host] = self._clock() + interval
+        else:
+            self._next_allowed.pop(host, None)
+
+    def record_throttled(self, url: str) -> None:
+        host = url_host(url)
+        previous = self.interval(host)
+        widened = max(
+            previous * HOST_INTERVAL_WIDEN_FACTOR, THROTTLED_HOST_INTERVAL_SEC
+        )
+        self._intervals[host] = min(widened, self.max_interval)
+        self._next_allowed[host] = self._clock() + self._intervals[host]
+        logging.warning(
+            "Host %s is rate-limiting captures; spacing its submissions %.0f seconds apart.",
+            host,
+            self._intervals[host],
+        )
+
+    def record_success(self, url: str) -> None:
+        host = url_host(url)
+        if host not in self._intervals:
+            return
+        narrowed = self._intervals[host] / HOST_INTERVAL_WIDEN_FACTOR
+        if narrowed <= self.min_interval:
+            del self._intervals[host]
+        else:
+            self._intervals[host] = narrowed
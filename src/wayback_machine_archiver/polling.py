@@ -0,0 +1,121 @@
+import heapq
+import time
+from collections.abc import Callable, Container, Iterable
+
+MIN_POLL_INTERVAL_SEC = 5.0
+MAX_POLL_INTERVAL_SEC = 60.0
+# How long a capture is assumed to take before any have been observed.
+INITIAL_CAPTURE_ESTIMATE_SEC = 15.0
+# Weight of each new observation in the running capture-duration estimate.
+CAPTURE_ESTIMATE_SMOOTHING = 0.2
+# Once past its first check, a job is re-checked after this fraction of its age.
+POLL_AGE_FACTOR = 0.5
+# Jobs coming due within this window are folded into the same status request.
+COALESCE_WINDOW_SEC = 2.0
+
+
+class PollScheduler:
+    """
+    Min-heap of pending capture jobs keyed by when each should next be checked.
+
+    A job's first check is timed from the running estimate of how long captures
+    take; after that it backs off in proportion to its age, so young jobs are
+    not polled every loop and old ones are not polled more than once a minute.
+    """
+
+    def __init__(
+        self,
+        *,
+        min_interval: float = MIN_POLL_INTERVAL_SEC,
+        max_interval: float = MAX_POLL_INTERVAL_SEC,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.capture_estimate = INITIAL_CAPTURE_ESTIMATE_SEC
+        self._clock = clock if clock is not None else time.time
+        self._heap: list[tuple[float, str]] = []
+        # The authoritative next-check time for each job; heap entries that
+        # disagree with it are stale and skipped when popped.
+        self._due: dict[str, float] = {}
+        self._submitted: dict[str, float] = {}
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, job_id: object) -> bool:
+        return job_id in self._due
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _push(self, job_id: str, due: float) -> None:
+        self._due[job_id] = due
+        heapq.heappush(self._heap, (due, job_id))
+
+    def schedule(self, job_id: str, submitted_at: float | None = None) -> None:
+        """
+        Starts tracking a newly submitted job. A job restored from an earlier
+        run passes its original submitted_at, so an overdue one is checked now.
+        """
+        if submitted_at is None:
+            submitted_at = self._clock()
+        self._submitted[job_id] = submitted_at
+        self._push(job_id, submitted_at + self._clamp(self.capture_estimate))
+
+    def reschedule(self, job_id: str) -> None:
+        """Schedules the next check for a job that is still pending."""
+        now = self._clock()
+        age = now - self._submitted.setdefault(job_id, now)
+        self._push(job_id, now + self._clamp(age * POLL_AGE_FACTOR))
+
+    def complete(self, job_id: str, *, succeeded: bool = False) -> None:
+        """Stops tracking a job, folding its duration into the estimate on success."""
+        self._due.pop(job_id, None)
+        submitted_at = self._submitted.pop(job_id, None)
+        if succeeded and submitted_at is not None:
+            duration = self._clock() - submitted_at
+            self.capture_estimate += CAPTURE_ESTIMATE_SMOOTHING * (
+                duration - self.capture_estimate
+            )
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._due.clear()
+        self._submitted.clear()
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self) -> list[str]:
+        """Removes and returns every job due now (or within the coalescing window)."""
+        horizon = self._clock() + COALESCE_WINDOW_SEC
+        due_jobs: list[str] = []
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= horizon:
+            _, job_id = heapq.heappop(self._heap)
+            del self._due[job_id]
+            due_jobs.append(job_id)
+            self._drop_stale()
+        return due_jobs
+
+    def seconds_until_next(self) -> float | None:
+        """Returns how long until the next job is due, or None if none are tracked."""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return max(0.0, self._heap[0][0] - self._clock())
+
+    def after_poll(
+        self,
+        checked_job_ids: Iterable[str],
+        still_pending: Container[str],
+        succeeded: Container[str],
+    ) -> None:
+        """Reschedules checked jobs that are still pending and retires the rest."""
+        for job_id in checked_job_ids:
+            if job_id in still_pending:
+                self.reschedule(job_id)
+            else:
+                self.complete(job_id, succeeded=job_id in succeeded)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+
+
+class RateLimiter:
+    """
+    Token bucket that spaces capture submissions `interval` seconds apart.
+
+    Up to `burst` submissions may go out back to back; after that each one waits
+    only for the remainder of the interval since the previous submission, so
+    time spent on the request itself or on status polls counts toward the wait.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.interval = max(0.0, interval)
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._lock = threading.Lock()
+        # The time at which the bucket would be full again (a GCRA "theoretical
+        # arrival time"); a submission is allowed once now is within
+        # (burst - 1) intervals of it.
+        self._full_at = clock()
+
+    def _allowed_at(self) -> float:
+        return self._full_at - (self.burst - 1) * self.interval
+
+    def delay(self) -> float:
+        """Returns the seconds until a submission would be allowed, without taking it."""
+        with self._lock:
+            return max(0.0, self._allowed_at() - self._clock())
+
+    def reserve(self) -> float:
+        """Takes the next submission slot and returns how long to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            wait = max(0.0, self._allowed_at() - now)
+            self._full_at = max(self._full_at, now) + self.interval
+            return wait
+
+    def acquire(self) -> None:
+        """Blocks until the next submission slot is reached."""
+        wait = self.reserve()
+        if wait > 0:
+            logging.debug("Sleeping for %s seconds", wait)
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Waits on the event loop until the next submission slot is reached."""
+        wait = self.reserve()
+        if wait > 0:
+            logging.debug("Sleeping for %s seconds", wait)
+            await asyncio.sleep(wait)
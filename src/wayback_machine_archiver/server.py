@@ -0,0 +1,340 @@
+import asyncio
+import itertools
+import json
+import logging
+import signal
+from collections import deque
+from collections.abc import Iterable, Sequence
+from contextlib import suppress
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from .async_workflow import _AsyncArchiveRun
+from .clients import AsyncCaptureClient
+from .concurrency import ConcurrencyWindow
+from .politeness import HostPoliteness
+from .polling import PollScheduler
+from .ratelimit import RateLimiter
+from .urls import is_valid_url
+from .workflow import _NOOP_CALLBACK, ArchiveResult, ResultCallback, result_record
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# The most URLs waiting to be submitted before new ones are refused.
+MAX_QUEUE = 10000
+# Largest request body accepted, about 10,000 typical URLs.
+MAX_BODY_BYTES = 1024 * 1024
+# Seconds a client refused because the queue is full is asked to wait.
+RETRY_AFTER_SEC = 60
+# URLs given on the command line are queued this many at a time.
+FEED_CHUNK = 100
+
+
+class _HTTPError(Exception):
+    """An error response to send in place of the one requested."""
+
+    def __init__(
+        self, status: int, message: str, headers: dict[str, str] | None = None
+    ) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+def _head(status: int, headers: dict[str, str]) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", "Connection: close"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _send_json(
+    writer: asyncio.StreamWriter,
+    status: int,
+    body: dict[str, object],
+    headers: dict[str, str] | None = None,
+) -> None:
+    data = json.dumps(body).encode("utf-8") + b"\n"
+    writer.write(
+        _head(
+            status,
+            {
+                "Content-Type": "application/json",
+                "Content-Length": str(len(data)),
+                **(headers or {}),
+            },
+        )
+        + data
+    )
+    await writer.drain()
+
+
+async def _read_request(
+    reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> tuple[str, str, bytes]:
+    """Reads one HTTP/1.1 request and returns its method, target and body."""
+    try:
+        request_line = await reader.readline()
+        method, target, _version = request_line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", "0"))
+    except ValueError as e:
+        raise _HTTPError(400, "Malformed HTTP request.") from e
+    if "transfer-encoding" in headers:
+        raise _HTTPError(411, "Send the body with a Content-Length.")
+    if length > MAX_BODY_BYTES:
+        raise _HTTPError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes.")
+    if length and headers.get("expect", "").lower() == "100-continue":
+        writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+    body = await reader.readexactly(length)
+    return method, target, body
+
+
+def _log_feed_error(task: "asyncio.Task[None]") -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logging.error("Could not queue the URLs given: %s", task.exception())
+
+
+class ArchiveServer:
+    """
+    A long-lived asyncio archive run fed by a small HTTP API, served on TCP
+    or a unix socket with one request per connection.
+
+    POST /urls takes one URL per line and streams back one JSON result line
+    (the same record as --json) per URL as its capture finishes; with ?wait=0
+    it answers 202 as soon as the URLs are queued. GET /health reports the
+    queue depth, captures in flight and totals so far.
+
+    Both directions are bounded: URLs that would take the queue past
+    max_queue are refused with 503 and Retry-After, and results are written
+    to each client no faster than it reads them, holding at most the results
+    of the URLs it posted.
+    """
+
+    def __init__(
+        self,
+        client: AsyncCaptureClient,
+        api_params: dict[str, str | int],
+        *,
+        rate_limiter: RateLimiter,
+        concurrency: ConcurrencyWindow,
+        on_result: ResultCallback = _NOOP_CALLBACK,
+        scheduler: PollScheduler | None = None,
+        politeness: HostPoliteness | None = None,
+        max_queue: int = MAX_QUEUE,
+    ) -> None:
+        self.run = _AsyncArchiveRun(
+            client,
+            (),
+            rate_limiter,
+            concurrency,
+            scheduler if scheduler is not None else PollScheduler(),
+            api_params,
+            self._dispatch,
+            politeness=politeness,
+        )
+        self.run.accepting = True
+        self.on_result = on_result
+        self.max_queue = max_queue
+        self.listener: asyncio.Server | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._run_task: asyncio.Task[tuple[int, int]] | None = None
+        # URL -> the result queues of clients waiting on it, oldest first.
+        self._subscribers: dict[str, deque[asyncio.Queue[ArchiveResult]]] = {}
+
+    def _dispatch(self, result: ArchiveResult) -> None:
+        """Reports result; the run calls this from a worker thread."""
+        self.on_result(result)
+        assert self._loop is not None
+        self._loop.call_soon_threadsafe(self._deliver, result)
+
+    def _deliver(self, result: ArchiveResult) -> None:
+        waiting = self._subscribers.get(result.url)
+        if waiting:
+            waiting.popleft().put_nowait(result)
+            if not waiting:
+                del self._subscribers[result.url]
+
+    def _subscribe(
+        self, urls: Sequence[str], results: asyncio.Queue[ArchiveResult]
+    ) -> None:
+        for url in urls:
+            self._subscribers.setdefault(url, deque()).append(results)
+
+    def _unsubscribe(
+        self, urls: Sequence[str], results: asyncio.Queue[ArchiveResult]
+    ) -> None:
+        for url in urls:
+            waiting = self._subscribers.get(url)
+            if waiting and results in waiting:
+                waiting.remove(results)
+                if not waiting:
+                    del self._subscribers[url]
+
+    def health(self) -> dict[str, object]:
+        return {
+            "status": "ok" if self.run.accepting else "stopping",
+            "queued": len(self.run.work_queue),
+            "in_flight": self.run.in_flight,
+            "max_queue": self.max_queue,
+            "succeeded": self.run.success_count,
+            "failed": self.run.failure_count,
+        }
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            try:
+                await self._respond(reader, writer)
+            except _HTTPError as e:
+                await _send_json(writer, e.status, {"error": str(e)}, e.headers)
+        except (ConnectionError, asyncio.IncompleteReadError) as e:
+            logging.debug("Client went away: %s", e)
+        finally:
+            writer.close()
+            with suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _respond(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        method, target, body = await _read_request(reader, writer)
+        parts = urlsplit(target)
+        if parts.path == "/health":
+            if method != "GET":
+                raise _HTTPError(405, "Use GET.", {"Allow": "GET"})
+            status = 200 if self.run.accepting else 503
+            await _send_json(writer, status, self.health())
+        elif parts.path == "/urls":
+            if method != "POST":
+                raise _HTTPError(405, "Use POST.", {"Allow": "POST"})
+            wait = parse_qs(parts.query).get("wait", ["1"])[-1] not in ("0", "false")
+            await self._post_urls(writer, body, wait)
+        else:
+            raise _HTTPError(404, f"No such endpoint: {parts.path}")
+
+    async def _post_urls(
+        self, writer: asyncio.StreamWriter, body: bytes, wait: bool
+    ) -> None:
+        lines = body.decode("utf-8", errors="replace").splitlines()
+        urls = list(dict.fromkeys(line.strip() for line in lines if line.strip()))
+        if not urls:
+            raise _HTTPError(400, "Send the URLs to archive, one per line.")
+        invalid = [url for url in urls if not is_valid_url(url)]
+        if invalid:
+            raise _HTTPError(
+                400,
+                f"{len(invalid)} URLs lack an http:// or https:// scheme,"
+                f" such as {invalid[0]!r}.",
+            )
+        if len(urls) > self.max_queue:
+            raise _HTTPError(413, f"Send at most {self.max_queue} URLs at a time.")
+
+        results: asyncio.Queue[ArchiveResult] = asyncio.Queue()
+        if wait:
+            self._subscribe(urls, results)
+        try:
+            try:
+                queued = await self.run.add_urls(urls, limit=self.max_queue)
+            except RuntimeError as e:
+                raise _HTTPError(503, "The server is shutting down.") from e
+            if not queued:
+                raise _HTTPError(
+                    503,
+                    "The queue is full; try again later.",
+                    {"Retry-After": str(RETRY_AFTER_SEC)},
+                )
+            logging.info("Queued %d URLs from a client.", len(urls))
+            if not wait:
+                await _send_json(writer, 202, {"accepted": len(urls)})
+                return
+
+            writer.write(_head(200, {"Content-Type": "application/x-ndjson"}))
+            await writer.drain()
+            for _ in urls:
+                result = await results.get()
+                writer.write(json.dumps(result_record(result)).encode("utf-8") + b"\n")
+                await writer.drain()
+        finally:
+            self._unsubscribe(urls, results)
+
+    async def feed(self, urls: Iterable[str]) -> None:
+        """Queues urls a chunk at a time, waiting while the queue is full."""
+        source = iter(urls)
+        while True:
+            # Producing URLs may mean downloading a sitemap, so it is done in
+            # a worker thread.
+            chunk = await asyncio.to_thread(list, itertools.islice(source, FEED_CHUNK))
+            if not chunk:
+                return
+            await self.run.wait_for_room(len(chunk), self.max_queue)
+            await self.run.add_urls(chunk)
+
+    async def start(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: str | None = None,
+    ) -> None:
+        """Starts the archive run and listens on unix_socket, or else host:port."""
+        self._loop = asyncio.get_running_loop()
+        if unix_socket is not None:
+            self.listener = await asyncio.start_unix_server(
+                self._handle, path=unix_socket
+            )
+            logging.info("Listening on unix socket %s", unix_socket)
+        else:
+            self.listener = await asyncio.start_server(self._handle, host, port)
+            for sock in self.listener.sockets:
+                logging.info("Listening on http://%s:%d", *sock.getsockname()[:2])
+        self._run_task = asyncio.create_task(self.run.run())
+
+    async def stop(self) -> tuple[int, int]:
+        """
+        Stops listening, finishes the URLs already queued and returns the
+        number of successes and failures.
+        """
+        assert self.listener is not None and self._run_task is not None
+        self.listener.close()
+        await self.run.stop_accepting()
+        counts = await self._run_task
+        await self.listener.wait_closed()
+        return counts
+
+    async def serve(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        unix_socket: str | None = None,
+        urls: Iterable[str] = (),
+    ) -> tuple[int, int]:
+        """
+        Serves until SIGINT or SIGTERM, after queueing urls, then stops and
+        returns the number of successes and failures.
+        """
+        await self.start(host, port, unix_socket)
+        assert self._run_task is not None
+        stopping = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            # Not available on Windows, where Ctrl+C interrupts the run.
+            with suppress(NotImplementedError):
+                loop.add_signal_handler(sig, stopping.set)
+        feeder = asyncio.create_task(self.feed(urls))
+        feeder.add_done_callback(_log_feed_error)
+        stopped = asyncio.create_task(stopping.wait())
+        try:
+            await asyncio.wait(
+                [stopped, self._run_task], return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            feeder.cancel()
+            stopped.cancel()
+        logging.info("Stopping: finishing the captures already queued.")
+        return await self.stop()
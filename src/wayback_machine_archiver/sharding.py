@@ -0,0 +1,40 @@
+from collections.abc import Iterable, Iterator
+from urllib.parse import urlsplit, urlunsplit
+
+from .history import url_digest
+
+DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """
+    Returns url in a canonical form: scheme and host lower-cased, default
+    ports and fragments dropped, and an empty path written as '/'. URLs that
+    cannot be parsed are returned unchanged.
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+    scheme = parts.scheme.lower()
+    netloc = (parts.hostname or "").lower()
+    if port is not None and DEFAULT_PORTS.get(scheme) != port:
+        netloc = f"{netloc}:{port}"
+    return urlunsplit((scheme, netloc, parts.path or "/", parts.query, ""))
+
+
+def shard_of(url: str, shard_count: int) -> int:
+    """Returns the shard, in range(shard_count), that url always falls in."""
+    return url_digest(normalize_url(url)) % shard_count
+
+
+def in_shard(urls: Iterable[str], shard_index: int, shard_count: int) -> Iterator[str]:
+    """
+    Yields the URLs that belong to shard shard_index of shard_count. Every URL
+    lands in exactly one shard, whatever the order or spelling of the input,
+    so nodes given the same inventory split it without overlap.
+    """
+    for url in urls:
+        if shard_of(url, shard_count) == shard_index:
+            yield url
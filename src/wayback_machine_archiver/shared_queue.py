@@ -0,0 +1,263 @@
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from types import TracebackType
+from typing import Protocol
+
+from .work_queue import SourceWait
+
+# How long a claimed URL stays reserved for its worker without a renewal.
+LEASE_SEC = 600.0
+# URLs claimed from the shared queue at a time.
+CLAIM_BATCH = 10
+# Input URLs added to the shared queue between claims.
+ADD_CHUNK = 1000
+# How often a worker with nothing left to claim looks again for URLs other
+# workers released or stopped renewing.
+RECHECK_SEC = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    lease_expires REAL,
+    claims INTEGER NOT NULL DEFAULT 0,
+    status TEXT,
+    completed_at REAL
+);
+CREATE INDEX IF NOT EXISTS queue_state ON queue (state, lease_expires);
+"""
+
+
+class SharedQueue(Protocol):
+    """
+    A URL inventory drained by several workers, each holding a handle of its
+    own. A claimed URL is leased to the claiming worker; if the lease is not
+    renewed before it expires, the URL can be claimed by another worker.
+    """
+
+    worker_id: str
+    lease_sec: float
+
+    def add(self, urls: Iterable[str]) -> int:
+        """Adds URLs not already in the queue and returns how many were new."""
+        ...
+
+    def claim(self, limit: int) -> list[str]:
+        """Leases up to limit queued or expired URLs to this worker."""
+        ...
+
+    def renew(self) -> None:
+        """Extends the leases of every URL this worker holds."""
+        ...
+
+    def seconds_until_lease_expiry(self) -> float | None:
+        """
+        Returns how long until the first lease held by another worker expires,
+        or None if no other worker holds one.
+        """
+        ...
+
+    def complete(self, url: str, status: str) -> None:
+        """Records url as finished with status, ending its lease."""
+        ...
+
+    def release(self) -> None:
+        """Returns this worker's unfinished URLs to the queue."""
+        ...
+
+    def close(self) -> None: ...
+
+
+class SQLiteSharedQueue:
+    """
+    SharedQueue kept in a SQLite file, for workers on one machine or on a
+    filesystem with working locks.
+
+    Claims run in an immediate transaction, so two workers never lease the
+    same URL. A URL stays in the file once finished, with its status, so
+    adding it again does not archive it twice; use a new file for each
+    inventory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        worker_id: str,
+        *,
+        lease_sec: float = LEASE_SEC,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.worker_id = worker_id
+        self.lease_sec = lease_sec
+        self._clock = clock
+        # Claims happen in the URL source, which the asyncio engine reads in a
+        # worker thread, and leases are renewed from a heartbeat thread.
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            path, timeout=30.0, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SQLiteSharedQueue":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def add(self, urls: Iterable[str]) -> int:
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO queue (url) VALUES (?)", ((u,) for u in urls)
+            )
+            return conn.total_changes - before
+
+    def claim(self, limit: int) -> list[str]:
+        now = self._clock()
+        with self._transaction() as conn:
+            rows = conn.execute(
+                "SELECT id, url, state FROM queue WHERE state = 'queued'"
+                " OR (state = 'leased' AND lease_expires <= ?) ORDER BY id LIMIT ?",
+                (now, limit),
+            ).fetchall()
+            conn.executemany(
+                "UPDATE queue SET state = 'leased', worker = ?, lease_expires = ?,"
+                " claims = claims + 1 WHERE id = ?",
+                [(self.worker_id, now + self.lease_sec, row[0]) for row in rows],
+            )
+        reclaimed = sum(1 for row in rows if row[2] == "leased")
+        if reclaimed:
+            logging.warning(
+                "Reclaimed %d URLs whose worker let its lease expire.", reclaimed
+            )
+        return [row[1] for row in rows]
+
+    def renew(self) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE queue SET lease_expires = ?"
+                " WHERE worker = ? AND state = 'leased'",
+                (self._clock() + self.lease_sec, self.worker_id),
+            )
+
+    def seconds_until_lease_expiry(self) -> float | None:
+        with self._lock:
+            (expires,) = self._conn.execute(
+                "SELECT MIN(lease_expires) FROM queue"
+                " WHERE state = 'leased' AND worker != ?",
+                (self.worker_id,),
+            ).fetchone()
+        if expires is None:
+            return None
+        return max(0.0, float(expires) - self._clock())
+
+    def complete(self, url: str, status: str) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE queue SET state = 'done', status = ?, completed_at = ?,"
+                " worker = ?, lease_expires = NULL WHERE url = ?",
+                (status, self._clock(), self.worker_id, url),
+            )
+
+    def release(self) -> None:
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE queue SET state = 'queued', worker = NULL,"
+                " lease_expires = NULL WHERE worker = ? AND state = 'leased'",
+                (self.worker_id,),
+            )
+
+    def counts(self) -> dict[str, int]:
+        """Returns how many URLs are queued, leased and done."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT state, COUNT(*) FROM queue GROUP BY state"
+            ).fetchall()
+        return {"queued": 0, "leased": 0, "done": 0, **dict(rows)}
+
+
+@contextmanager
+def keeping_leases(queue: SharedQueue) -> Iterator[None]:
+    """
+    Renews queue's leases from a background thread for the duration of the
+    block, so URLs waiting on a slow capture or a long retry backoff are not
+    handed to another worker. On leaving the block, any URLs still leased are
+    released for other workers to claim.
+    """
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(queue.lease_sec / 3):
+            try:
+                queue.renew()
+            except Exception as e:
+                logging.warning("Could not renew shared queue leases: %s", e)
+
+    thread = threading.Thread(target=heartbeat, name="lease-heartbeat", daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stop.set()
+        thread.join()
+        queue.release()
+
+
+def drain(
+    queue: SharedQueue,
+    urls: Iterable[str] = (),
+    *,
+    batch_size: int = CLAIM_BATCH,
+) -> Iterator[str | SourceWait]:
+    """
+    Adds urls to queue a chunk at a time and yields the URLs this worker
+    claims, until the input is exhausted and no URL is queued or leased to
+    another worker. URLs leased by other live workers are left to them, but
+    while they hold any a SourceWait is yielded instead, so the run keeps
+    polling its own captures and claims those URLs if they are released or
+    their worker stops renewing its leases.
+    """
+    pending = iter(urls)
+    while True:
+        chunk = list(itertools.islice(pending, ADD_CHUNK))
+        if chunk:
+            added = queue.add(chunk)
+            logging.debug("Added %d new URLs to the shared queue.", added)
+        claimed = queue.claim(batch_size)
+        if claimed or chunk:
+            yield from claimed
+            continue
+        wait = queue.seconds_until_lease_expiry()
+        if wait is None:
+            return
+        logging.debug("Waiting for URLs leased by other workers (%.0fs).", wait)
+        yield SourceWait(min(wait, RECHECK_SEC))
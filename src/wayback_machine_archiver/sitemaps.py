@@ -1,17 +1,56 @@
+import glob
+import gzip
 import logging
+import mmap
+import multiprocessing
+import os
+import queue
 import re
+import threading
 from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from contextlib import contextmanager
+from io import BufferedReader, BytesIO, RawIOBase
+from typing import IO, NamedTuple, cast
 from xml.etree.ElementTree import Element, ParseError
 
 import defusedxml.ElementTree as ET
 import requests
 
 from . import REQUEST_TIMEOUT
+from .cache import SitemapCache
+from .politeness import url_host
+from .sharding import normalize_url
+from .state import SitemapState
 
 LOCAL_PREFIX = "file://"
 MAX_SITEMAP_INDEX_DEPTH = 5
+GZIP_MAGIC = b"\x1f\x8b"
+# The most (decompressed) bytes read from one sitemap before giving up on it.
+# The sitemap protocol caps files at 50 MB, so this leaves plenty of slack.
+SITEMAP_MAX_BYTES = 100 * 1024 * 1024
+# Sitemaps fetched and parsed at once, and the most fetched from a single host.
+SITEMAP_FETCH_WORKERS = 8
+SITEMAP_FETCHES_PER_HOST = 4
+# Pages are passed from fetching threads to the caller in batches of this
+# size, with at most two batches per fetch worker waiting to be yielded.
+SITEMAP_PAGE_BATCH = 1000
 
-__all__ = ["LOCAL_PREFIX", "process_sitemaps"]
+__all__ = [
+    "LOCAL_PREFIX",
+    "SitemapEntry",
+    "SitemapTooLargeError",
+    "iter_sitemap_entries",
+    "iter_sitemap_pages",
+    "iter_sitemap_urls",
+    "process_sitemaps",
+]
 
 
 def get_namespace(element: Element) -> str:
@@ -20,21 +59,109 @@ def get_namespace(element: Element) -> str:
     return match.group(0) if match else ""
 
 
-def download_remote_sitemap(sitemap_url: str, session: requests.Session) -> bytes:
-    """Download a remote sitemap file."""
-    logging.debug("Downloading: %s", sitemap_url)
-    r = session.get(sitemap_url, timeout=REQUEST_TIMEOUT)
-    r.raise_for_status()
-    return r.content
+def _decompressed(stream: IO[bytes]) -> IO[bytes]:
+    """
+    Wraps stream in a gzip decompressor if it starts with the gzip magic
+    number, so compressed sitemaps are inflated as they are parsed.
+    """
+    if not isinstance(stream, BufferedReader):
+        stream = BufferedReader(cast(RawIOBase, stream))
+    if stream.peek(len(GZIP_MAGIC)).startswith(GZIP_MAGIC):
+        return cast(IO[bytes], gzip.GzipFile(fileobj=stream))
+    return stream
+
+
+class SitemapTooLargeError(OSError):
+    """A sitemap is larger than the configured maximum size."""
+
+
+class _LimitedReader(RawIOBase):
+    """Reads from source, raising SitemapTooLargeError past max_bytes."""
+
+    def __init__(self, source: IO[bytes], max_bytes: int, sitemap_url: str) -> None:
+        self._source = source
+        self._remaining = max_bytes
+        self._max_bytes = max_bytes
+        self._sitemap_url = sitemap_url
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: memoryview) -> int:  # type: ignore[override]
+        # Ask for one byte more than allowed, to tell "exactly at the limit"
+        # from "over it".
+        data = self._source.read(min(len(buffer), self._remaining + 1))
+        if len(data) > self._remaining:
+            raise SitemapTooLargeError(
+                f"sitemap '{self._sitemap_url}' is larger than {self._max_bytes} bytes"
+            )
+        self._remaining -= len(data)
+        buffer[: len(data)] = data
+        return len(data)
 
 
-def load_local_sitemap(sitemap_filepath: str) -> bytes:
-    """Load a local sitemap file."""
-    logging.debug("Loading local sitemap: %s", sitemap_filepath)
-    if sitemap_filepath.startswith(LOCAL_PREFIX):
-        sitemap_filepath = sitemap_filepath[len(LOCAL_PREFIX) :]
-    with open(sitemap_filepath, "rb") as fp:
-        return fp.read()
+def _parser_input(stream: IO[bytes], max_bytes: int, sitemap_url: str) -> IO[bytes]:
+    """Decompresses stream if needed and caps how much of it can be read."""
+    return cast(
+        IO[bytes], _LimitedReader(_decompressed(stream), max_bytes, sitemap_url)
+    )
+
+
+@contextmanager
+def open_sitemap(
+    sitemap_url: str,
+    session: requests.Session,
+    cache: SitemapCache | None = None,
+    max_bytes: int = SITEMAP_MAX_BYTES,
+) -> Iterator[IO[bytes]]:
+    """
+    Opens a local or remote sitemap as a binary stream, so it can be parsed
+    while it is still being read instead of loaded into memory first.
+    Gzipped sitemaps (sitemap.xml.gz) are decompressed on the fly.
+
+    Reading more than max_bytes of (decompressed) sitemap raises
+    SitemapTooLargeError, and a response whose Content-Length already exceeds
+    it is abandoned before its body is read.
+
+    With a cache, remote sitemaps are fetched with a conditional GET and the
+    cached copy is read instead when the server says it has not changed.
+    """
+    if sitemap_is_local(sitemap_url):
+        logging.debug("Loading local sitemap: %s", sitemap_url)
+        with open(sitemap_url[len(LOCAL_PREFIX) :], "rb") as fp:
+            yield _parser_input(fp, max_bytes, sitemap_url)
+        return
+
+    logging.debug("Downloading: %s", sitemap_url)
+    headers = cache.conditional_headers(sitemap_url) if cache is not None else {}
+    with session.get(
+        sitemap_url, timeout=REQUEST_TIMEOUT, stream=True, headers=headers
+    ) as r:
+        if cache is not None and headers and r.status_code == 304:
+            logging.info(
+                "Sitemap '%s' is unchanged; using the cached copy.", sitemap_url
+            )
+            with cache.open_body(sitemap_url) as fp:
+                yield _parser_input(fp, max_bytes, sitemap_url)
+            return
+
+        r.raise_for_status()
+        content_length = r.headers.get("Content-Length", "")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            raise SitemapTooLargeError(
+                f"sitemap '{sitemap_url}' is {content_length} bytes, more than {max_bytes}"
+            )
+        # Undo any Content-Encoding the server applied in transit; a gzipped
+        # file served as such is still gzipped after this.
+        r.raw.decode_content = True
+        # Let io.BufferedReader see end-of-stream instead of a closed file.
+        r.raw.auto_close = False
+        body = cast(IO[bytes], r.raw)
+        if cache is None:
+            yield _parser_input(body, max_bytes, sitemap_url)
+            return
+        with cache.storing(sitemap_url, body, r.headers) as cached_body:
+            yield _parser_input(cached_body, max_bytes, sitemap_url)
 
 
 def sitemap_is_local(sitemap_url: str) -> bool:
@@ -48,51 +175,398 @@ def _is_sitemap_index(root: Element, namespace: str) -> bool:
     return tag == "sitemapindex"
 
 
+class SitemapEntry(NamedTuple):
+    """
+    One <loc> of a sitemap, and whether it names a child sitemap. `sitemap`
+    is the sitemap the entry was listed in, when that is known.
+    """
+
+    loc: str
+    is_sitemap: bool
+    lastmod: str | None = None
+    sitemap: str | None = None
+
+
+def iter_sitemap_entries(source: IO[bytes]) -> Iterator[SitemapEntry]:
+    """Parse an XML sitemap incrementally, yielding each entry as it closes.
+
+    Each <url> or <sitemap> element is yielded with its <loc> and <lastmod>
+    and then discarded, so memory stays flat however large the sitemap is.
+    Raises ParseError for malformed XML, after yielding the entries that came
+    before the error.
+    """
+    root: Element | None = None
+    loc_tag = lastmod_tag = ""
+    entry_tags: tuple[str, ...] = ()
+    is_index = False
+    loc: str | None = None
+    lastmod: str | None = None
+
+    for event, element in ET.iterparse(source, events=("start", "end")):
+        if root is None:
+            # The first event is the start of the root element.
+            root = element
+            namespace = get_namespace(root)
+            is_index = _is_sitemap_index(root, namespace)
+            loc_tag = f"{namespace}loc"
+            lastmod_tag = f"{namespace}lastmod"
+            entry_tags = (f"{namespace}url", f"{namespace}sitemap")
+            continue
+        if event != "end":
+            continue
+        if element.tag == loc_tag and element.text is not None:
+            if loc is not None:
+                # A second <loc> in the same entry, or one outside any entry.
+                yield SitemapEntry(loc, is_index)
+            loc = element.text
+        elif element.tag == lastmod_tag and element.text:
+            lastmod = element.text.strip()
+        elif element.tag in entry_tags:
+            if loc is not None:
+                yield SitemapEntry(loc, is_index, lastmod)
+            loc = lastmod = None
+            root.clear()
+
+    if loc is not None:
+        yield SitemapEntry(loc, is_index, lastmod)
+
+
 def extract_urls_from_sitemap(sitemap_bytes: bytes) -> tuple[set[str], set[str]]:
     """Parse XML sitemap bytes and extract page URLs and child sitemap URLs.
 
     Returns (page_urls, child_sitemap_urls). For a regular urlset sitemap,
     child_sitemap_urls is empty. For a sitemapindex, page_urls is empty.
     """
-    root = ET.fromstring(sitemap_bytes)
-    namespace = get_namespace(root)
-    loc_nodes = root.findall(f".//{namespace}loc")
-    urls = {node.text for node in loc_nodes if node.text is not None}
+    page_urls, child_sitemaps = _collect_entries(BytesIO(sitemap_bytes))
+    return set(page_urls), set(child_sitemaps)
 
-    if _is_sitemap_index(root, namespace):
-        return set(), urls
-    return urls, set()
 
+# Sitemap URLs mapped to their <lastmod>, if any.
+_Lastmods = dict[str, str | None]
 
-def _fetch_sitemap_bytes(sitemap_url: str, session: requests.Session) -> bytes:
-    """Fetch sitemap bytes from a local or remote source."""
-    if sitemap_is_local(sitemap_url):
-        logging.debug("The sitemap '%s' is local.", sitemap_url)
-        return load_local_sitemap(sitemap_url)
-    logging.debug("The sitemap '%s' is remote.", sitemap_url)
-    return download_remote_sitemap(sitemap_url, session)
+
+def _collect_entries(source: IO[bytes]) -> tuple[_Lastmods, _Lastmods]:
+    """Reads a whole sitemap into ({page_url: lastmod}, {child_sitemap: lastmod})."""
+    page_urls: _Lastmods = {}
+    child_sitemaps: _Lastmods = {}
+    for entry in iter_sitemap_entries(source):
+        (child_sitemaps if entry.is_sitemap else page_urls)[entry.loc] = entry.lastmod
+    return page_urls, child_sitemaps
 
 
 def process_sitemaps(
     sitemap_urls: list[str],
     session: requests.Session,
+    cache: SitemapCache | None = None,
 ) -> set[str]:
     """
     Given a list of sitemap URLs, downloads/loads them and returns a set of all unique URLs found.
     Recurses into sitemap index files up to MAX_SITEMAP_INDEX_DEPTH levels.
     """
-    all_urls: set[str] = set()
-    queue: deque[tuple[str, int]] = deque((url, 0) for url in sitemap_urls)
+    return set(iter_sitemap_urls(sitemap_urls, session, cache=cache))
+
+
+class _HostSlots:
+    """Caps the number of sitemaps being downloaded from any one host at once."""
 
-    while queue:
-        sitemap_url, depth = queue.popleft()
-        try:
-            sitemap_xml = _fetch_sitemap_bytes(sitemap_url, session)
-            page_urls, child_sitemaps = extract_urls_from_sitemap(sitemap_xml)
-            all_urls.update(page_urls)
+    def __init__(self, per_host: int) -> None:
+        self._per_host = per_host
+        self._lock = threading.Lock()
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+
+    @contextmanager
+    def hold(self, sitemap_url: str) -> Iterator[None]:
+        host = url_host(sitemap_url)
+        with self._lock:
+            slot = self._slots.get(host)
+            if slot is None:
+                slot = self._slots[host] = threading.BoundedSemaphore(self._per_host)
+        with slot:
+            yield
+
+
+class _QueuedSitemap(NamedTuple):
+    url: str
+    # The normalized URL, used to recognize the same sitemap spelled differently.
+    key: str
+    # Normalized URLs of the indexes that led here, outermost first.
+    ancestors: tuple[str, ...]
+    # The <lastmod> the parent index gave this sitemap.
+    lastmod: str | None
+
+
+def _normalize_sitemap_url(url: str) -> str:
+    """
+    Returns url in a canonical form for recognizing repeated sitemaps: scheme
+    and host lower-cased, default ports and fragments dropped, and an empty
+    path written as '/'.
+    """
+    if sitemap_is_local(url):
+        return LOCAL_PREFIX + os.path.normpath(url[len(LOCAL_PREFIX) :])
+    return normalize_url(url)
+
+
+def _expand_local_sitemaps(sitemap_url: str) -> list[str] | None:
+    """
+    Lists the local sitemap files named by a directory or glob URI, or returns
+    None if sitemap_url names a single sitemap.
+    """
+    if not sitemap_is_local(sitemap_url):
+        return None
+    path = sitemap_url[len(LOCAL_PREFIX) :]
+    if os.path.isdir(path):
+        paths = [
+            *glob.glob(os.path.join(glob.escape(path), "*.xml")),
+            *glob.glob(os.path.join(glob.escape(path), "*.xml.gz")),
+        ]
+    elif any(char in path for char in "*?["):
+        paths = glob.glob(path, recursive=True)
+    else:
+        return None
+    files = [LOCAL_PREFIX + p for p in sorted(paths) if os.path.isfile(p)]
+    if not files:
+        logging.warning("No sitemap files found for '%s'.", sitemap_url)
+    logging.info("Found %d local sitemaps in '%s'.", len(files), sitemap_url)
+    return files
+
+
+def _parse_local_sitemap(
+    sitemap_url: str, max_bytes: int
+) -> tuple[_Lastmods, _Lastmods]:
+    """Parses one local sitemap file through mmap; runs in a worker process."""
+    path = sitemap_url[len(LOCAL_PREFIX) :]
+    with open(path, "rb") as fp:
+        if os.fstat(fp.fileno()).st_size == 0:
+            # Empty files cannot be mapped; let the parser report them.
+            return _collect_entries(fp)
+        with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            source: IO[bytes] = cast(IO[bytes], mapped)
+            if mapped[: len(GZIP_MAGIC)] == GZIP_MAGIC:
+                source = cast(IO[bytes], gzip.GzipFile(fileobj=source))
+            limited = _LimitedReader(source, max_bytes, sitemap_url)
+            return _collect_entries(cast(IO[bytes], limited))
+
+
+def _file_worker_context() -> multiprocessing.context.BaseContext:
+    """
+    The start method for file-parsing processes. The pool is started from
+    whichever thread is reading URLs (an executor thread with --async), and
+    forking a threaded process can deadlock the child, so they are never forked.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def _load_sitemap(
+    sitemap_url: str,
+    session: requests.Session,
+    host_slots: _HostSlots,
+    cache: SitemapCache | None,
+    max_bytes: int,
+    emit: Callable[[list[SitemapEntry]], None],
+) -> tuple[_Lastmods, _Lastmods]:
+    """
+    Fetches and parses one sitemap; runs in a worker thread. Pages are passed
+    to emit in batches as they are parsed, so the sitemap is never held in
+    memory whole; only its child sitemaps are returned.
+    """
+    child_sitemaps: _Lastmods = {}
+    batch: list[SitemapEntry] = []
+    with (
+        host_slots.hold(sitemap_url),
+        open_sitemap(sitemap_url, session, cache, max_bytes) as source,
+    ):
+        for entry in iter_sitemap_entries(source):
+            if entry.is_sitemap:
+                child_sitemaps[entry.loc] = entry.lastmod
+                continue
+            batch.append(entry._replace(sitemap=sitemap_url))
+            if len(batch) >= SITEMAP_PAGE_BATCH:
+                emit(batch)
+                batch = []
+    if batch:
+        emit(batch)
+    return {}, child_sitemaps
+
+
+def iter_sitemap_urls(
+    sitemap_urls: list[str],
+    session: requests.Session,
+    *,
+    max_workers: int = SITEMAP_FETCH_WORKERS,
+    per_host: int = SITEMAP_FETCHES_PER_HOST,
+    cache: SitemapCache | None = None,
+    max_bytes: int = SITEMAP_MAX_BYTES,
+    file_workers: int | None = None,
+) -> Iterator[str]:
+    """
+    Yields the page URLs of each sitemap as soon as that sitemap is parsed.
+    See iter_sitemap_pages.
+    """
+    for page in iter_sitemap_pages(
+        sitemap_urls,
+        session,
+        max_workers=max_workers,
+        per_host=per_host,
+        cache=cache,
+        max_bytes=max_bytes,
+        file_workers=file_workers,
+    ):
+        yield page.loc
+
+
+def iter_sitemap_pages(
+    sitemap_urls: list[str],
+    session: requests.Session,
+    *,
+    max_workers: int = SITEMAP_FETCH_WORKERS,
+    per_host: int = SITEMAP_FETCHES_PER_HOST,
+    cache: SitemapCache | None = None,
+    state: SitemapState | None = None,
+    max_bytes: int = SITEMAP_MAX_BYTES,
+    file_workers: int | None = None,
+) -> Iterator[SitemapEntry]:
+    """
+    Yields the page entries (URL and lastmod) of each sitemap as they are
+    parsed, so callers can start on them while the rest are still being
+    downloaded.
+    Recurses into sitemap index files up to MAX_SITEMAP_INDEX_DEPTH levels.
+    URLs listed by more than one sitemap are yielded once per listing, but each
+    sitemap is fetched at most once however many indexes refer to it, and
+    indexes that refer back to themselves are reported rather than followed.
+
+    Up to max_workers sitemaps are fetched and parsed concurrently, no more
+    than per_host of them from the same host, and the children of an index
+    are queued as soon as it is parsed. Remote sitemaps are streamed: their
+    pages are yielded in batches of SITEMAP_PAGE_BATCH as they are parsed, and
+    fetches pause while the caller is behind, so memory stays bounded however
+    large a sitemap is. With a cache, unchanged remote sitemaps are read from
+    disk. Sitemaps larger than max_bytes, or that turn out not to be valid
+    XML, are abandoned there; pages already yielded from them stand.
+
+    A local sitemap URI may name a directory (every *.xml and *.xml.gz file in
+    it) or a glob pattern. Those files are memory-mapped and parsed across a
+    pool of file_workers processes (one per CPU by default), each of which
+    returns a whole file's pages; at most 2 * file_workers are held at once.
+
+    With a state, the children of an index whose <lastmod> is the same as on
+    the previous run, and whose pages have all been archived, are not fetched
+    at all; their pages are left as they were.
+    """
+    pending: deque[_QueuedSitemap] = deque()
+    # Local sitemaps named by a directory or glob, parsed in worker processes.
+    file_queue: deque[_QueuedSitemap] = deque()
+    host_slots = _HostSlots(per_host)
+    running: dict[Future[tuple[_Lastmods, _Lastmods]], _QueuedSitemap] = {}
+    parsing_files: set[Future[tuple[_Lastmods, _Lastmods]]] = set()
+    # Batches of pages from fetching threads, and each finished sitemap's
+    # future, in the order they happened. Batches take a slot in page_slots
+    # until they are yielded, so fetches wait while the caller is behind.
+    events: queue.SimpleQueue[
+        list[SitemapEntry] | Future[tuple[_Lastmods, _Lastmods]]
+    ] = queue.SimpleQueue()
+    page_slots = threading.Semaphore(2 * max_workers)
+    stopped = threading.Event()
+    file_workers = file_workers or os.cpu_count() or 1
+    pool = ThreadPoolExecutor(max_workers, thread_name_prefix="sitemap")
+    process_pool: ProcessPoolExecutor | None = None
+    # Normalized URLs of every sitemap queued so far.
+    visited: set[str] = set()
+    unchanged_children = duplicates = 0
+
+    def emit(batch: list[SitemapEntry]) -> None:
+        while not page_slots.acquire(timeout=0.1):
+            if stopped.is_set():
+                raise CancelledError()
+        events.put(batch)
+
+    def start_fetches() -> None:
+        nonlocal process_pool
+        while pending and len(running) - len(parsing_files) < max_workers:
+            sitemap = pending.popleft()
+            future = pool.submit(
+                _load_sitemap, sitemap.url, session, host_slots, cache, max_bytes, emit
+            )
+            running[future] = sitemap
+            future.add_done_callback(events.put)
+        if file_queue and process_pool is None:
+            process_pool = ProcessPoolExecutor(
+                file_workers, mp_context=_file_worker_context()
+            )
+        # Keep a second file queued behind each worker so none of them idles.
+        while file_queue and process_pool and len(parsing_files) < 2 * file_workers:
+            sitemap = file_queue.popleft()
+            future = process_pool.submit(_parse_local_sitemap, sitemap.url, max_bytes)
+            running[future] = sitemap
+            parsing_files.add(future)
+            future.add_done_callback(events.put)
+
+    def enqueue(
+        url: str,
+        parent: _QueuedSitemap | None,
+        lastmod: str | None,
+        target: deque[_QueuedSitemap] = pending,
+    ) -> None:
+        nonlocal unchanged_children, duplicates
+        key = _normalize_sitemap_url(url)
+        ancestors = () if parent is None else (*parent.ancestors, parent.key)
+        if key in visited:
+            duplicates += 1
+            if key in ancestors:
+                logging.warning(
+                    "Sitemap index '%s' refers back to '%s', which contains it. Not following the cycle.",
+                    parent.url if parent is not None else url,
+                    url,
+                )
+            else:
+                logging.debug("Sitemap '%s' was already queued; skipping it.", url)
+            return
+        visited.add(key)
+        if state is not None and state.sitemap_unchanged(url, lastmod):
+            logging.debug("Child sitemap '%s' is unchanged; skipping it.", url)
+            unchanged_children += 1
+            return
+        target.append(_QueuedSitemap(url, key, ancestors, lastmod))
+
+    for url in sitemap_urls:
+        local_files = _expand_local_sitemaps(url)
+        if local_files is None:
+            enqueue(url, None, None)
+        else:
+            for file_url in local_files:
+                enqueue(file_url, None, None, file_queue)
+
+    try:
+        start_fetches()
+        while running:
+            event = events.get()
+            if isinstance(event, list):
+                yield from event
+                page_slots.release()
+                continue
+            future = event
+            sitemap = running.pop(future)
+            sitemap_url = sitemap.url
+            parsing_files.discard(future)
+            try:
+                page_urls, child_sitemaps = future.result()
+            except ParseError:
+                logging.error(
+                    "Failed to parse sitemap from '%s'. The content is not valid XML. Please ensure the URL points directly to a sitemap.xml file. Skipping the rest of this sitemap.",
+                    sitemap_url,
+                )
+                continue
+            except (requests.exceptions.RequestException, OSError) as e:
+                logging.error(
+                    "An error occurred while processing sitemap '%s': %s. Skipping the rest of it.",
+                    sitemap_url,
+                    e,
+                )
+                continue
 
             if child_sitemaps:
-                if depth >= MAX_SITEMAP_INDEX_DEPTH:
+                if len(sitemap.ancestors) >= MAX_SITEMAP_INDEX_DEPTH:
                     logging.warning(
                         "Sitemap index recursion depth limit (%d) reached at '%s'. Skipping child sitemaps.",
                         MAX_SITEMAP_INDEX_DEPTH,
@@ -104,16 +578,29 @@ def process_sitemaps(
                         sitemap_url,
                         len(child_sitemaps),
                     )
-                    queue.extend((url, depth + 1) for url in child_sitemaps)
-        except ParseError:
-            logging.error(
-                "Failed to parse sitemap from '%s'. The content is not valid XML. Please ensure the URL points directly to a sitemap.xml file. Skipping this sitemap.",
-                sitemap_url,
-            )
-        except (requests.exceptions.RequestException, OSError) as e:
-            logging.error(
-                "An error occurred while processing sitemap '%s': %s. Skipping.",
-                sitemap_url,
-                e,
-            )
-    return all_urls
+                    for url, lastmod in child_sitemaps.items():
+                        enqueue(url, sitemap, lastmod)
+            # Keep the pool busy while the caller works through these URLs.
+            start_fetches()
+            for url, lastmod in page_urls.items():
+                yield SitemapEntry(url, False, lastmod, sitemap_url)
+            # Only once the caller has seen every page, so an interrupted
+            # run does not leave this sitemap looking fully handled.
+            if state is not None:
+                state.record_sitemap(sitemap_url, sitemap.lastmod)
+    finally:
+        stopped.set()
+        pool.shutdown(wait=False, cancel_futures=True)
+        if process_pool is not None:
+            process_pool.shutdown(wait=False, cancel_futures=True)
+
+    if duplicates:
+        logging.info(
+            "Skipped %d references to sitemaps that were already fetched.",
+            duplicates,
+        )
+    if unchanged_children:
+        logging.info(
+            "Skipped %d child sitemaps unchanged since the previous run.",
+            unchanged_children,
+        )
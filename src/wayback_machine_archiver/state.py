@@ -0,0 +1,166 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from types import TracebackType
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .sitemaps import SitemapEntry
+    from .workflow import ArchiveResult
+
+# Pending writes are committed once this many have accumulated.
+COMMIT_EVERY = 1000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    sitemap TEXT,
+    seen_at REAL NOT NULL,
+    archived_lastmod TEXT,
+    archived_at REAL
+);
+CREATE INDEX IF NOT EXISTS pages_sitemap ON pages (sitemap);
+CREATE TABLE IF NOT EXISTS sitemaps (
+    url TEXT PRIMARY KEY,
+    lastmod TEXT,
+    seen_at REAL NOT NULL
+);
+"""
+
+
+class SitemapState:
+    """
+    What earlier runs learned about each sitemap page, for incremental runs.
+
+    For every page URL a sitemap lists, a SQLite file records the <lastmod>
+    last seen and, once a capture succeeds, the lastmod it was captured at.
+    A page needs archiving if it has never been captured, or if its sitemap
+    now gives a lastmod different from the one it was captured at. Pages whose
+    sitemap gives no lastmod are archived once and then left alone.
+
+    The <lastmod> each sitemap index gave its children is kept too, so a child
+    that has not changed, and has no pages still waiting to be archived, need
+    not be fetched again.
+    """
+
+    def __init__(self, path: str, *, commit_every: int = COMMIT_EVERY) -> None:
+        self.path = path
+        self.commit_every = commit_every
+        # The asyncio engine reads sitemaps, and so checks pages, in a worker
+        # thread while results are recorded elsewhere, so every use of the
+        # connection and the commit counter holds this lock.
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._uncommitted = 0
+
+    def __enter__(self) -> "SitemapState":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            self.commit()
+            self._conn.close()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+            self._uncommitted = 0
+
+    def _wrote(self) -> None:
+        with self._lock:
+            self._uncommitted += 1
+            if self._uncommitted >= self.commit_every:
+                self.commit()
+
+    def needs_archiving(
+        self, url: str, lastmod: str | None, sitemap: str | None = None
+    ) -> bool:
+        """
+        Records lastmod as seen for url, listed in sitemap, and says whether url
+        should be archived.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT archived_lastmod, archived_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT INTO pages (url, lastmod, sitemap, seen_at) VALUES (?, ?, ?, ?)"
+                " ON CONFLICT (url) DO UPDATE SET lastmod = excluded.lastmod,"
+                " sitemap = excluded.sitemap, seen_at = excluded.seen_at",
+                (url, lastmod, sitemap, time.time()),
+            )
+            self._wrote()
+            if row is None or row[1] is None:
+                return True
+            return lastmod is not None and lastmod != row[0]
+
+    def changed_pages(self, pages: Iterable["SitemapEntry"]) -> Iterator[str]:
+        """Yields the URL of each page that is new or changed since its last capture."""
+        unchanged = 0
+        for page in pages:
+            if self.needs_archiving(page.loc, page.lastmod, page.sitemap):
+                yield page.loc
+            else:
+                unchanged += 1
+        logging.info(
+            "Skipped %d sitemap pages unchanged since they were last archived.",
+            unchanged,
+        )
+
+    def record_sitemap(self, url: str, lastmod: str | None) -> None:
+        """Records the lastmod its index gave a sitemap that has just been read."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sitemaps (url, lastmod, seen_at) VALUES (?, ?, ?)"
+                " ON CONFLICT (url) DO UPDATE SET"
+                " lastmod = excluded.lastmod, seen_at = excluded.seen_at",
+                (url, lastmod, time.time()),
+            )
+            self._wrote()
+
+    def sitemap_unchanged(self, url: str, lastmod: str | None) -> bool:
+        """
+        Whether a child sitemap can be skipped: its index gives the same lastmod
+        as when it was last read, and every page it listed has been archived at
+        its current lastmod.
+        """
+        with self._lock:
+            if lastmod is None:
+                return False
+            row = self._conn.execute(
+                "SELECT lastmod FROM sitemaps WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None or row[0] != lastmod:
+                return False
+            pending = self._conn.execute(
+                "SELECT 1 FROM pages WHERE sitemap = ? AND (archived_at IS NULL"
+                " OR (lastmod IS NOT NULL AND lastmod IS NOT archived_lastmod)) LIMIT 1",
+                (url,),
+            ).fetchone()
+            return pending is None
+
+    def record_result(self, result: "ArchiveResult") -> None:
+        """Marks a successfully captured page as archived at its current lastmod."""
+        with self._lock:
+            if result.status != "success":
+                return
+            self._conn.execute(
+                "UPDATE pages SET archived_lastmod = lastmod, archived_at = ?"
+                " WHERE url = ?",
+                (time.time(), result.url),
+            )
+            self._wrote()
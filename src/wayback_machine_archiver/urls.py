@@ -0,0 +1,11 @@
+from urllib.parse import urlparse
+
+
+def is_valid_url(url: str) -> bool:
+    """Check if a URL has a valid structure for archiving."""
+    try:
+        parsed = urlparse(url)
+        # Must have http or https scheme and a network location (domain)
+        return parsed.scheme in ("http", "https") and bool(parsed.netloc)
+    except ValueError:
+        return False
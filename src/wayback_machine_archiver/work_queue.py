@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+
+from .politeness import HostPoliteness, url_host
+
+# The most fresh URLs buffered while looking past hosts that must wait.
+DEFAULT_LOOKAHEAD = 1000
+
+
+class SourceWait(float):
+    """
+    Yielded by a URL source in place of a URL when it has none to give yet but
+    may have later; the queue reads the source again after this many seconds.
+    """
+
+
+class WorkQueue:
+    """
+    URLs waiting to be submitted, in two lanes.
+
+    The fresh lane holds URLs that have not been tried yet, in one queue per
+    target host, and is served round-robin across the hosts that `politeness`
+    allows a submission to right now. It is refilled lazily from `source`: one
+    URL at a time while hosts are free, and up to `lookahead` URLs when the
+    source is dominated by hosts that must wait, so a large or slow source is
+    never read further ahead than needed. A source that yields a SourceWait is
+    left alone for that long rather than blocking the run. The retry lane is a min-heap of URLs
+    put back after a failed submission or a transient capture error, keyed by
+    the time each becomes ready; a ready retry is taken before fresh URLs, and
+    one that is still backing off is not taken at all.
+    """
+
+    def __init__(
+        self,
+        source: Iterable[str | SourceWait] = (),
+        *,
+        politeness: HostPoliteness | None = None,
+        lookahead: int = DEFAULT_LOOKAHEAD,
+        clock: Callable[[], float] | None = None,
+    ) -> None:
+        self._source: Iterator[str | SourceWait] = iter(source)
+        self.source_exhausted = False
+        self._source_ready_at = 0.0
+        self.pulled = 0
+        self._clock = clock if clock is not None else time.time
+        self.politeness = (
+            politeness if politeness is not None else HostPoliteness(clock=clock)
+        )
+        self._lookahead = max(1, lookahead)
+        self._fresh: dict[str, deque[str]] = {}
+        # Hosts with buffered fresh URLs, in the order they are next served.
+        self._hosts: deque[str] = deque()
+        self._fresh_count = 0
+        self._retries: list[tuple[float, int, str]] = []
+        self._retry_seq = itertools.count()
+
+    def __len__(self) -> int:
+        """The number of URLs buffered in either lane, not counting the source."""
+        return self._fresh_count + len(self._retries)
+
+    def has_work(self) -> bool:
+        """Whether a later pop() may still return a URL."""
+        return bool(self._fresh_count or self._retries) or not self.source_exhausted
+
+    def _retry_ready(self) -> bool:
+        return bool(self._retries) and self._retries[0][0] <= self._clock()
+
+    def _can_fill(self) -> bool:
+        return (
+            not self.source_exhausted
+            and self._fresh_count < self._lookahead
+            and self._source_ready_at <= self._clock()
+        )
+
+    def _fresh_ready(self) -> bool:
+        return any(self.politeness.is_ready(host) for host in self._hosts)
+
+    def has_ready(self) -> bool:
+        """Whether pop() may return a URL now, rather than after a backoff."""
+        return self._retry_ready() or self._fresh_ready() or self._can_fill()
+
+    def seconds_until_ready(self) -> float | None:
+        """
+        How long until the earliest retry is ready, a host with buffered URLs
+        may be submitted to again, or a waiting source may be read again, or
+        None if nothing is buffered or waited for.
+        """
+        now = self._clock()
+        waits = [self.politeness.seconds_until_ready(host) for host in self._hosts]
+        if self._retries:
+            waits.append(max(0.0, self._retries[0][0] - now))
+        if not self.source_exhausted and self._source_ready_at > now:
+            waits.append(self._source_ready_at - now)
+        return min(waits, default=None)
+
+    def _buffer(self, url: str) -> str:
+        host = url_host(url)
+        lane = self._fresh.get(host)
+        if lane is None:
+            lane = self._fresh[host] = deque()
+            self._hosts.append(host)
+        lane.append(url)
+        self._fresh_count += 1
+        return host
+
+    def extend(self, urls: Iterable[str]) -> None:
+        """Adds URLs to the end of their hosts' fresh queues."""
+        for url in urls:
+            self._buffer(url)
+
+    def requeue(self, url: str, delay: float = 0.0) -> None:
+        """Puts a URL back for another attempt once delay seconds have passed."""
+        ready_at = self._clock() + delay
+        heapq.heappush(self._retries, (ready_at, next(self._retry_seq), url))
+
+    def _pop_retry(self) -> str | None:
+        while self._retry_ready():
+            _, seq, url = self._retries[0]
+            host_wait = self.politeness.seconds_until_ready(url_host(url))
+            if host_wait == 0:
+                return heapq.heappop(self._retries)[2]
+            # Its host is still cooling down; look again when it may be used.
+            heapq.heapreplace(self._retries, (self._clock() + host_wait, seq, url))
+        return None
+
+    def _pop_fresh(self) -> str | None:
+        for _ in range(len(self._hosts)):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if not self.politeness.is_ready(host):
+                continue
+            lane = self._fresh[host]
+            url = lane.popleft()
+            self._fresh_count -= 1
+            if not lane:
+                # The host was just rotated to the back, so drop it from there.
+                self._hosts.pop()
+                del self._fresh[host]
+            return url
+        return None
+
+    def pop_buffered(self) -> str | None:
+        """
+        Returns a ready retry, or else the next buffered fresh URL whose host is
+        free, without touching the source. The URL's host is charged a
+        submission.
+        """
+        url = self._pop_retry()
+        if url is None:
+            url = self._pop_fresh()
+        if url is not None:
+            self.politeness.record_submission(url)
+        return url
+
+    def fill(self) -> None:
+        """
+        Buffers URLs from the source until one whose host is free arrives, the
+        lookahead is full, or the source is exhausted or asks to wait. Reading
+        the source may block while URLs are produced.
+        """
+        while self._can_fill():
+            url = next(self._source, None)
+            if url is None:
+                self.source_exhausted = True
+                return
+            if isinstance(url, SourceWait):
+                self._source_ready_at = self._clock() + url
+                return
+            self.pulled += 1
+            if self.politeness.is_ready(self._buffer(url)):
+                return
+
+    def pop(self) -> str | None:
+        """Returns the next URL to submit, or None if none is ready."""
+        url = self.pop_buffered()
+        if url is None and self._can_fill():
+            self.fill()
+            url = self.pop_buffered()
+        return url
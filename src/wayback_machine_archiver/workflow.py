@@ -1,12 +1,20 @@
 import logging
+import random
 import time
-from collections.abc import Callable
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
+from datetime import datetime, timezone
 from typing import Any, Literal, TypedDict
 
 import requests
 
-from .clients import SPN2Client
+from .clients import CaptureClient, CaptureRejectedError
+from .concurrency import ConcurrencyController, ConcurrencyWindow
+from .journal import RunJournal
+from .politeness import HostPoliteness
+from .polling import PollScheduler
+from .ratelimit import RateLimiter
+from .work_queue import SourceWait, WorkQueue
 
 
 @dataclass(frozen=True, slots=True)
@@ -24,6 +32,18 @@ ResultCallback = Callable[[ArchiveResult], None]
 def _NOOP_CALLBACK(_result: ArchiveResult) -> None: ...
 
 
+def result_record(result: ArchiveResult) -> dict[str, str | None]:
+    """The JSON record reported for a result, stamped with the current time."""
+    return {
+        "url": result.url,
+        "job_id": result.job_id,
+        "status": result.status,
+        "archive_url": result.archive_url,
+        "error_code": result.error_code,
+        "recorded_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
 # A set of transient errors that suggest a retry might be successful.
 REQUEUE_ERRORS = {
     "error:bad-gateway",
@@ -47,6 +67,20 @@ REQUEUE_ERRORS = {
     "error:user-session-limit",
 }
 
+# Transient errors raised by the target site rather than the Wayback Machine.
+# They widen the minimum interval between submissions to that host.
+HOST_THROTTLE_ERRORS = {
+    "error:bandwidth-limit-exceeded",
+    "error:too-many-requests",
+}
+
+# Transient errors that signal the account (not the URL) is out of capacity.
+# They shrink the in-flight window and do not count against a URL's retries.
+CAPACITY_ERRORS = {
+    "error:no-browsers-available",
+    "error:user-session-limit",
+}
+
 # A map of transient error codes to user-friendly, explanatory messages.
 TRANSIENT_ERROR_MESSAGES = {
     "error:bad-gateway": "The server reported a temporary upstream issue (Bad Gateway).",
@@ -91,6 +125,46 @@ PERMANENT_ERROR_MESSAGES = {
     "error:unauthorized": "The page requires a login (401 Unauthorized). To save the login/error page, use the --capture-all flag.",
 }
 
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Exponential backoff, with +/- jitter, before retrying one class of error."""
+
+    base_sec: float
+    max_sec: float
+    jitter: float = 0.25
+
+    def delay(self, attempt: int) -> float:
+        backoff = min(self.base_sec * 2.0 ** max(attempt - 1, 0), self.max_sec)
+        return backoff * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+
+# Error class used for submissions that raised or returned no job_id.
+SUBMIT_ERROR = "submit_error"
+
+# How long each class of transient error waits before its URL is retried.
+# Errors raised by the target site back off far longer than network blips.
+RETRY_POLICIES = {
+    "error:too-many-requests": RetryPolicy(300, 3600),
+    "error:bandwidth-limit-exceeded": RetryPolicy(600, 3600),
+    "error:service-unavailable": RetryPolicy(60, 900),
+    "error:cannot-fetch": RetryPolicy(60, 900),
+    "error:internal-server-error": RetryPolicy(60, 900),
+    "error:no-browsers-available": RetryPolicy(30, 30),
+    "error:user-session-limit": RetryPolicy(30, 30),
+    "error:read-timeout": RetryPolicy(10, 120),
+    "error:protocol-error": RetryPolicy(10, 120),
+    "error:invalid-server-response": RetryPolicy(10, 120),
+    SUBMIT_ERROR: RetryPolicy(10, 300),
+}
+DEFAULT_RETRY_POLICY = RetryPolicy(30, 600)
+
+
+def _retry_delay(error_code: str, attempt: int) -> float:
+    """Returns how long to wait before retry number `attempt` after error_code."""
+    return RETRY_POLICIES.get(error_code, DEFAULT_RETRY_POLICY).delay(attempt)
+
+
 # Workflow configuration constants
 MAX_TRANSIENT_RETRIES = 3
 JOB_TIMEOUT_SEC = 3600  # 1 hour
@@ -98,7 +172,8 @@ INITIAL_POLLING_WAIT = 5
 MAX_POLLING_WAIT = 60
 POLLING_BACKOFF_FACTOR = 1.5
 MAX_CONSECUTIVE_POLL_FAILURES = 5
-MAX_PENDING_JOBS = 10
+MAX_PENDING_JOBS = 10  # Initial in-flight window
+MAX_PENDING_JOBS_CEILING = 50
 
 
 class PendingJob(TypedDict):
@@ -108,22 +183,17 @@ class PendingJob(TypedDict):
     submitted_at: float
 
 
-def _submit_next_url(
-    urls_to_process: list[str],
-    client: SPN2Client,
-    pending_jobs: dict[str, PendingJob],
-    rate_limit_in_sec: float,
+def _start_submission(
+    url: str,
     submission_attempts: dict[str, int],
-    api_params: dict[str, str | int],
-    *,
-    max_retries: int = 3,
-    on_result: ResultCallback = _NOOP_CALLBACK,
-) -> str | None:
+    max_retries: int,
+    on_result: ResultCallback,
+    journal: RunJournal | None = None,
+) -> int | None:
     """
-    Pops the next URL, submits it, and adds its job_id to pending_jobs.
-    Returns 'failed' on a definitive failure, otherwise None.
+    Records a submission attempt for url and returns its attempt number.
+    Returns None, after reporting the failure, once max_retries is exceeded.
     """
-    url = urls_to_process.pop(0)
     attempt_num = submission_attempts.get(url, 0) + 1
     submission_attempts[url] = attempt_num
 
@@ -138,39 +208,164 @@ def _submit_next_url(
                 job_id=None,
             )
         )
+        return None
+    if journal is not None:
+        journal.record_attempt(url, attempt_num)
+    return attempt_num
+
+
+def _finish_submission(
+    url: str,
+    job_id: str | None,
+    work_queue: WorkQueue,
+    pending_jobs: dict[str, PendingJob],
+    submission_attempts: dict[str, int],
+    scheduler: PollScheduler | None = None,
+    journal: RunJournal | None = None,
+) -> None:
+    """Records a returned job_id as pending, or re-queues url if none came back."""
+    if not job_id:
+        logging.warning(
+            "Submission for %s was accepted but no job_id was returned. This can happen under high load or due to rate limits. Re-queuing for another attempt.",
+            url,
+        )
+        attempt_num = submission_attempts.get(url, 1)
+        work_queue.requeue(url, _retry_delay(SUBMIT_ERROR, attempt_num))
+        return
+
+    submitted_at = time.time()
+    pending_jobs[job_id] = {"url": url, "submitted_at": submitted_at}
+    if scheduler is not None:
+        scheduler.schedule(job_id)
+    if journal is not None:
+        journal.record_submitted(url, job_id, submitted_at)
+    if url in submission_attempts:
+        del submission_attempts[url]
+
+
+def _requeue_failed_submission(
+    url: str,
+    error: Exception,
+    work_queue: WorkQueue,
+    attempt_num: int,
+    *,
+    submission_attempts: dict[str, int] | None = None,
+    concurrency: ConcurrencyWindow | None = None,
+    journal: RunJournal | None = None,
+) -> None:
+    """
+    Re-queues url after its submission failed. A refusal because the account
+    is at capacity shrinks the concurrency window instead of using up one of
+    the URL's submission attempts.
+    """
+    if isinstance(error, CaptureRejectedError) and error.status_ext in CAPACITY_ERRORS:
+        logging.warning(
+            "Capacity error submitting %s: %s Re-queuing without counting it as a retry. (API code: %s)",
+            url,
+            TRANSIENT_ERROR_MESSAGES[error.status_ext],
+            error.status_ext,
+        )
+        if concurrency is not None:
+            concurrency.record_capacity_error()
+        if submission_attempts is not None:
+            if attempt_num > 1:
+                submission_attempts[url] = attempt_num - 1
+            else:
+                submission_attempts.pop(url, None)
+        if journal is not None:
+            journal.record_attempt(url, attempt_num - 1)
+        work_queue.requeue(url, _retry_delay(error.status_ext, 1))
+        return
+
+    delay = _retry_delay(SUBMIT_ERROR, attempt_num)
+    logging.warning(
+        "Failed to submit URL %s due to a connection or API error: %s. Re-queuing for another attempt in %.0f seconds.",
+        url,
+        error,
+        delay,
+    )
+    work_queue.requeue(url, delay)
+
+
+def _requeue_after_error(
+    url: str,
+    error_code: str,
+    attempt: int,
+    work_queue: WorkQueue | None,
+    transient_error_retries: dict[str, int],
+    journal: RunJournal | None,
+) -> None:
+    """
+    Puts a URL whose capture hit a transient error back on the queue after its
+    backoff, slowing down its host if the error came from the target site.
+    """
+    if work_queue is not None:
+        if error_code in HOST_THROTTLE_ERRORS:
+            work_queue.politeness.record_throttled(url)
+        work_queue.requeue(url, _retry_delay(error_code, attempt))
+    if journal is not None:
+        journal.record_requeued(url, transient_error_retries.get(url, 0))
+
+
+def _submit_next_url(
+    work_queue: WorkQueue,
+    client: CaptureClient,
+    pending_jobs: dict[str, PendingJob],
+    rate_limiter: RateLimiter,
+    submission_attempts: dict[str, int],
+    api_params: dict[str, str | int],
+    *,
+    max_retries: int = 3,
+    on_result: ResultCallback = _NOOP_CALLBACK,
+    scheduler: PollScheduler | None = None,
+    journal: RunJournal | None = None,
+    concurrency: ConcurrencyWindow | None = None,
+) -> str | None:
+    """
+    Pops the next URL, submits it, and adds its job_id to pending_jobs.
+    A refusal because the account is at capacity is fed to concurrency.
+    Returns 'failed' on a definitive failure, otherwise None.
+    """
+    url = work_queue.pop()
+    if url is None:
+        return None
+    attempt_num = _start_submission(
+        url, submission_attempts, max_retries, on_result, journal
+    )
+    if attempt_num is None:
         return "failed"
 
     try:
         logging.info("Submitting %s (attempt %d/%d)...", url, attempt_num, max_retries)
         job_id = client.submit_capture(
-            url, rate_limit_wait=rate_limit_in_sec, api_params=api_params
+            url, rate_limiter=rate_limiter, api_params=api_params
         )
     except requests.exceptions.RequestException as e:
-        logging.warning(
-            "Failed to submit URL %s due to a connection or API error: %s. Re-queuing for another attempt.",
+        _requeue_failed_submission(
             url,
             e,
+            work_queue,
+            attempt_num,
+            submission_attempts=submission_attempts,
+            concurrency=concurrency,
+            journal=journal,
         )
-        urls_to_process.append(url)
         return None
 
-    if not job_id:
-        logging.warning(
-            "Submission for %s was accepted but no job_id was returned. This can happen under high load or due to rate limits. Re-queuing for another attempt.",
-            url,
-        )
-        urls_to_process.append(url)
-        return None
-
-    pending_jobs[job_id] = {"url": url, "submitted_at": time.time()}
-    if url in submission_attempts:
-        del submission_attempts[url]
-
+    _finish_submission(
+        url,
+        job_id,
+        work_queue,
+        pending_jobs,
+        submission_attempts,
+        scheduler,
+        journal,
+    )
     return None
 
 
 def _poll_pending_jobs(
-    client: SPN2Client,
+    client: CaptureClient,
     pending_jobs: dict[str, PendingJob],
     transient_error_retries: dict[str, int],
     max_transient_retries: int,
@@ -178,21 +373,88 @@ def _poll_pending_jobs(
     *,
     poll_interval_sec: float = 0.2,
     on_result: ResultCallback = _NOOP_CALLBACK,
+    concurrency: ConcurrencyWindow | None = None,
+    scheduler: PollScheduler | None = None,
+    work_queue: WorkQueue | None = None,
+    journal: RunJournal | None = None,
 ) -> tuple[list[str], list[str], list[str]]:
     """
-    Checks the status of all pending jobs using a single batch request.
+    Checks the status of pending jobs using a single batch request. With a
+    scheduler only the jobs it reports as due are checked; otherwise all are.
+    With a work_queue, URLs that hit a transient error are put back on it to
+    be retried after their backoff.
     Returns a tuple of (successful_urls, failed_urls, requeued_urls) for completed jobs.
     """
-    successful_urls: list[str] = []
-    failed_urls: list[str] = []
-    requeued_urls: list[str] = []
-
     # Get all job IDs that need to be checked.
-    job_ids_to_check = list(pending_jobs.keys())
+    if scheduler is None:
+        job_ids_to_check = list(pending_jobs.keys())
+    else:
+        job_ids_to_check = [j for j in scheduler.pop_due() if j in pending_jobs]
     if not job_ids_to_check:
         return [], [], []
 
-    batch_statuses: list[dict[str, Any]] = client.check_status_batch(job_ids_to_check)
+    try:
+        batch_statuses: list[dict[str, Any]] = client.check_status_batch(
+            job_ids_to_check
+        )
+    except (requests.RequestException, ValueError):
+        if scheduler is not None:
+            for job_id in job_ids_to_check:
+                scheduler.reschedule(job_id)
+        raise
+
+    outcome = _process_status_batch(
+        batch_statuses,
+        pending_jobs,
+        transient_error_retries,
+        max_transient_retries,
+        job_timeout_sec,
+        on_result=on_result,
+        concurrency=concurrency,
+        work_queue=work_queue,
+        journal=journal,
+    )
+    if scheduler is not None:
+        scheduler.after_poll(
+            job_ids_to_check, pending_jobs, _succeeded_job_ids(batch_statuses)
+        )
+
+    # A short sleep after each batch poll to be nice to the API.
+    time.sleep(poll_interval_sec)
+
+    return outcome
+
+
+def _succeeded_job_ids(batch_statuses: list[dict[str, Any]]) -> set[str]:
+    return {
+        status_data["job_id"]
+        for status_data in batch_statuses
+        if status_data.get("status") == "success" and status_data.get("job_id")
+    }
+
+
+def _process_status_batch(
+    batch_statuses: list[dict[str, Any]],
+    pending_jobs: dict[str, PendingJob],
+    transient_error_retries: dict[str, int],
+    max_transient_retries: int,
+    job_timeout_sec: float,
+    *,
+    on_result: ResultCallback = _NOOP_CALLBACK,
+    concurrency: ConcurrencyWindow | None = None,
+    work_queue: WorkQueue | None = None,
+    journal: RunJournal | None = None,
+) -> tuple[list[str], list[str], list[str]]:
+    """
+    Applies a batch of status responses to pending_jobs, reporting finished jobs.
+    Successes and account capacity errors are fed to the concurrency controller,
+    and transient errors are re-queued on work_queue with their backoff.
+    Successes and target-site throttling also adjust the host's politeness.
+    Returns a tuple of (successful_urls, failed_urls, requeued_urls).
+    """
+    successful_urls: list[str] = []
+    failed_urls: list[str] = []
+    requeued_urls: list[str] = []
 
     for status_data in batch_statuses:
         job_id = status_data.get("job_id")
@@ -221,6 +483,10 @@ def _poll_pending_jobs(
             )
             del pending_jobs[job_id]
             successful_urls.append(original_url)
+            if concurrency is not None:
+                concurrency.record_success()
+            if work_queue is not None:
+                work_queue.politeness.record_success(original_url)
         elif status == "error":
             status_ext: str = status_data.get("status_ext", "error:unknown")
             api_message = status_data.get("message", "Unknown error")
@@ -228,7 +494,26 @@ def _poll_pending_jobs(
             if "RecursionError" in api_message:
                 status_ext = "error:recursion-error"
 
-            if status_ext in REQUEUE_ERRORS:
+            if status_ext in CAPACITY_ERRORS:
+                logging.warning(
+                    "Capacity error for %s: %s Re-queuing without counting it as a retry. (API code: %s)",
+                    original_url,
+                    TRANSIENT_ERROR_MESSAGES[status_ext],
+                    status_ext,
+                )
+                if concurrency is not None:
+                    concurrency.record_capacity_error()
+                del pending_jobs[job_id]
+                requeued_urls.append(original_url)
+                _requeue_after_error(
+                    original_url,
+                    status_ext,
+                    1,
+                    work_queue,
+                    transient_error_retries,
+                    journal,
+                )
+            elif status_ext in REQUEUE_ERRORS:
                 retry_count = transient_error_retries.get(original_url, 0) + 1
                 transient_error_retries[original_url] = retry_count
 
@@ -264,6 +549,14 @@ def _poll_pending_jobs(
                     )
                     del pending_jobs[job_id]
                     requeued_urls.append(original_url)
+                    _requeue_after_error(
+                        original_url,
+                        status_ext,
+                        retry_count,
+                        work_queue,
+                        transient_error_retries,
+                        journal,
+                    )
             else:
                 helpful_message = PERMANENT_ERROR_MESSAGES.get(
                     status_ext, "An unrecoverable error occurred."
@@ -308,46 +601,172 @@ def _poll_pending_jobs(
             else:
                 logging.debug("Job %s (%s) is still pending...", job_id, original_url)
 
-    # A short sleep after each batch poll to be nice to the API.
-    time.sleep(poll_interval_sec)
-
     return successful_urls, failed_urls, requeued_urls
 
 
+def _fail_all_pending_jobs(
+    pending_jobs: dict[str, PendingJob], on_result: ResultCallback
+) -> int:
+    """Reports every pending job as a poll failure and returns how many there were."""
+    logging.error(
+        "Polling failed %d consecutive times. Marking all %d pending jobs as failed.",
+        MAX_CONSECUTIVE_POLL_FAILURES,
+        len(pending_jobs),
+    )
+    for job_id, job in pending_jobs.items():
+        on_result(
+            ArchiveResult(
+                url=job["url"],
+                status="failed",
+                archive_url=None,
+                error_code="poll_failure",
+                job_id=job_id,
+            )
+        )
+    failed = len(pending_jobs)
+    pending_jobs.clear()
+    return failed
+
+
+def _journaled(on_result: ResultCallback, journal: RunJournal) -> ResultCallback:
+    """Wraps on_result so every final result is also written to the journal."""
+
+    def record_and_report(result: ArchiveResult) -> None:
+        journal.record_result(result)
+        on_result(result)
+
+    return record_and_report
+
+
+def _restore_from_journal(
+    journal: RunJournal,
+    pending_jobs: dict[str, PendingJob],
+    submission_attempts: dict[str, int],
+    transient_error_retries: dict[str, int],
+    scheduler: PollScheduler,
+) -> None:
+    """Loads the captures and retry counters a previous run left outstanding."""
+    for job_id, (url, submitted_at) in journal.submitted_jobs().items():
+        pending_jobs[job_id] = {"url": url, "submitted_at": submitted_at}
+        scheduler.schedule(job_id, submitted_at)
+    attempts, retries = journal.retry_counters()
+    submission_attempts.update(attempts)
+    transient_error_retries.update(retries)
+    if pending_jobs:
+        logging.info(
+            "Resuming %d captures submitted by a previous run.", len(pending_jobs)
+        )
+
+
+def _default_concurrency() -> ConcurrencyController:
+    return ConcurrencyController(MAX_PENDING_JOBS, maximum=MAX_PENDING_JOBS_CEILING)
+
+
+def _seconds_until_next_poll(scheduler: PollScheduler) -> float:
+    wait = scheduler.seconds_until_next()
+    return scheduler.min_interval if wait is None else wait
+
+
+def _seconds_until_next_event(
+    scheduler: PollScheduler,
+    work_queue: WorkQueue,
+    pending_jobs: dict[str, PendingJob],
+    window_open: bool,
+) -> float:
+    """
+    Returns how long the loop can sleep before a job is due for a status check
+    or, if the in-flight window has room, a backed-off retry becomes ready.
+    """
+    waits = []
+    if pending_jobs:
+        waits.append(_seconds_until_next_poll(scheduler))
+    elif not window_open:
+        # Only other processes sharing the account's window can free it.
+        waits.append(scheduler.min_interval)
+    retry_wait = work_queue.seconds_until_ready()
+    if window_open and retry_wait is not None:
+        waits.append(retry_wait)
+    return min(waits, default=0.0)
+
+
+def _log_summary(total_urls: int, success_count: int, failure_count: int) -> None:
+    logging.info("--------------------------------------------------")
+    logging.info("Archive workflow complete.")
+    logging.info("Total URLs processed: %d", total_urls)
+    logging.info("Successful captures: %d", success_count)
+    logging.info("Failed captures: %d", failure_count)
+    logging.info("--------------------------------------------------")
+
+
 def run_archive_workflow(
-    client: SPN2Client,
-    urls_to_process: list[str],
+    client: CaptureClient,
+    urls: Iterable[str | SourceWait],
     rate_limit_in_sec: float,
     api_params: dict[str, str | int],
     *,
     on_result: ResultCallback = _NOOP_CALLBACK,
+    rate_limiter: RateLimiter | None = None,
+    concurrency: ConcurrencyWindow | None = None,
+    scheduler: PollScheduler | None = None,
+    journal: RunJournal | None = None,
+    politeness: HostPoliteness | None = None,
 ) -> tuple[int, int]:
-    """Manages the main loop for submitting and polling URLs."""
+    """
+    Manages the main loop for submitting and polling URLs.
+
+    Submissions are spaced by rate_limiter, or by a limiter allowing one
+    submission every rate_limit_in_sec seconds when none is given. The number
+    of in-flight captures follows the concurrency controller's window, and each
+    job's status is checked when the poll scheduler says it is due. With a
+    journal, every state change is recorded and captures it lists as submitted
+    are polled rather than submitted again.
+
+    urls is consumed lazily through a WorkQueue, one URL whenever there is room
+    to submit, so a generator that is still downloading sitemaps can feed the
+    run. The caller's iterable is never modified. URLs on the same target host
+    are spaced out by politeness, with other hosts served in between.
+    """
+    if rate_limiter is None:
+        rate_limiter = RateLimiter(rate_limit_in_sec)
+    if concurrency is None:
+        concurrency = _default_concurrency()
+    if scheduler is None:
+        scheduler = PollScheduler()
+    work_queue = WorkQueue(urls, politeness=politeness)
     pending_jobs: dict[str, PendingJob] = {}
     submission_attempts: dict[str, int] = {}
     transient_error_retries: dict[str, int] = {}
     consecutive_poll_failures = 0
+    if journal is not None:
+        on_result = _journaled(on_result, journal)
+        _restore_from_journal(
+            journal,
+            pending_jobs,
+            submission_attempts,
+            transient_error_retries,
+            scheduler,
+        )
 
-    total_urls = len(urls_to_process)
+    resumed_jobs = len(pending_jobs)
     success_count = 0
     failure_count = 0
     polling_wait_time = INITIAL_POLLING_WAIT
 
-    logging.info(
-        "Beginning interleaved submission and polling of %d URLs...",
-        total_urls,
-    )
+    logging.info("Beginning interleaved submission and polling of URLs...")
 
-    while urls_to_process or pending_jobs:
-        if urls_to_process and len(pending_jobs) < MAX_PENDING_JOBS:
+    while work_queue.has_work() or pending_jobs:
+        if work_queue.has_ready() and len(pending_jobs) < concurrency.limit:
             status = _submit_next_url(
-                urls_to_process,
+                work_queue,
                 client,
                 pending_jobs,
-                rate_limit_in_sec,
+                rate_limiter,
                 submission_attempts,
                 api_params,
                 on_result=on_result,
+                scheduler=scheduler,
+                journal=journal,
+                concurrency=concurrency,
             )
             if status == "failed":
                 failure_count += 1
@@ -362,6 +781,10 @@ def run_archive_workflow(
                     MAX_TRANSIENT_RETRIES,
                     JOB_TIMEOUT_SEC,
                     on_result=on_result,
+                    concurrency=concurrency,
+                    scheduler=scheduler,
+                    work_queue=work_queue,
+                    journal=journal,
                 )
             except (requests.RequestException, ValueError) as e:
                 consecutive_poll_failures += 1
@@ -372,23 +795,8 @@ def run_archive_workflow(
                     e,
                 )
                 if consecutive_poll_failures >= MAX_CONSECUTIVE_POLL_FAILURES:
-                    logging.error(
-                        "Polling failed %d consecutive times. Marking all %d pending jobs as failed.",
-                        MAX_CONSECUTIVE_POLL_FAILURES,
-                        len(pending_jobs),
-                    )
-                    for job_id, job in pending_jobs.items():
-                        on_result(
-                            ArchiveResult(
-                                url=job["url"],
-                                status="failed",
-                                archive_url=None,
-                                error_code="poll_failure",
-                                job_id=job_id,
-                            )
-                        )
-                    failure_count += len(pending_jobs)
-                    pending_jobs.clear()
+                    failure_count += _fail_all_pending_jobs(pending_jobs, on_result)
+                    scheduler.clear()
                 else:
                     time.sleep(polling_wait_time)
                     polling_wait_time = min(
@@ -401,28 +809,23 @@ def run_archive_workflow(
             success_count += len(successful)
             failure_count += len(failed)
             if requeued:
-                urls_to_process.extend(requeued)
                 logging.info(
                     "Re-queued %d URLs due to transient API errors.", len(requeued)
                 )
 
-        if not urls_to_process and pending_jobs:
-            logging.info(
-                "%d captures remaining, starting next polling cycle in %d seconds...",
-                len(pending_jobs),
-                polling_wait_time,
-            )
-            time.sleep(polling_wait_time)
-            # Increase wait time for the next cycle
-            polling_wait_time = min(
-                int(polling_wait_time * POLLING_BACKOFF_FACTOR), MAX_POLLING_WAIT
+        window_open = len(pending_jobs) < concurrency.limit
+        if not (window_open and work_queue.has_ready()):
+            wait = _seconds_until_next_event(
+                scheduler, work_queue, pending_jobs, window_open
             )
+            if wait > 0:
+                logging.info(
+                    "%d captures remaining, next check in %.1f seconds...",
+                    len(pending_jobs),
+                    wait,
+                )
+                time.sleep(wait)
 
-    logging.info("--------------------------------------------------")
-    logging.info("Archive workflow complete.")
-    logging.info("Total URLs processed: %d", total_urls)
-    logging.info("Successful captures: %d", success_count)
-    logging.info("Failed captures: %d", failure_count)
-    logging.info("--------------------------------------------------")
+    _log_summary(resumed_jobs + work_queue.pulled, success_count, failure_count)
 
     return success_count, failure_count
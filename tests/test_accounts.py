@@ -0,0 +1,210 @@
+"""Tests for spreading captures across several Internet Archive accounts."""
+
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from urllib.parse import parse_qs
+
+import pytest
+import requests
+
+from wayback_machine_archiver.accounts import (
+    ABANDONED_JOB_SEC,
+    Account,
+    AccountPool,
+    AsyncAccountPool,
+)
+from wayback_machine_archiver.clients import CaptureRejectedError, SPN2Client
+from wayback_machine_archiver.concurrency import ConcurrencyController
+from wayback_machine_archiver.journal import RunJournal
+from wayback_machine_archiver.ratelimit import RateLimiter
+from wayback_machine_archiver.workflow import run_archive_workflow
+
+
+def _account(name, *, window=4, interval=0.0):
+    return Account(
+        name=name,
+        client=SPN2Client(requests.Session(), access_key=name, secret_key="secret"),
+        rate_limiter=RateLimiter(interval),
+        concurrency=ConcurrencyController(window, maximum=window),
+    )
+
+
+def _account_of(request):
+    return request.headers["Authorization"].split()[1].split(":")[0]
+
+
+@pytest.fixture
+def spn2_api(requests_mock):
+    """
+    Mocks SPN2: job ids name the submitting account and each job's status is
+    looked up in a defaultdict (pending unless set).
+    """
+    submitted = []
+    statuses = defaultdict(dict)
+
+    def submit(request, context):
+        account = _account_of(request)
+        submitted.append(account)
+        return {"job_id": f"{account}-{len(submitted)}"}
+
+    def status(request, context):
+        job_ids = parse_qs(request.text)["job_ids"][0].split(",")
+        return [{"job_id": j, "timestamp": "20250101", **statuses[j]} for j in job_ids]
+
+    requests_mock.post(SPN2Client.SAVE_URL, json=submit)
+    requests_mock.post(SPN2Client.STATUS_URL, json=status)
+    return submitted, statuses
+
+
+def test_captures_go_to_the_account_with_the_most_room(spn2_api):
+    submitted, _ = spn2_api
+    pool = AccountPool([_account("a", window=1), _account("b", window=3)])
+
+    for n in range(4):
+        pool.submit_capture(f"https://example.com/{n}")
+
+    assert sorted(submitted) == ["a", "b", "b", "b"]
+    assert [account.in_flight for account in pool.accounts] == [1, 3]
+    assert pool.window.limit == 4
+
+
+def test_captures_prefer_the_account_whose_rate_limit_allows_it(spn2_api):
+    submitted, _ = spn2_api
+    pool = AccountPool([_account("a", interval=60), _account("b", interval=60)])
+
+    pool.submit_capture("https://example.com/1")
+    pool.submit_capture("https://example.com/2")
+
+    assert sorted(submitted) == ["a", "b"]
+
+
+def test_status_is_checked_with_the_submitting_account(spn2_api, requests_mock):
+    _, statuses = spn2_api
+    pool = AccountPool([_account("a"), _account("b")])
+    job_ids = [pool.submit_capture(f"https://example.com/{n}") for n in range(2)]
+    statuses[job_ids[0]] = {"status": "success"}
+    statuses[job_ids[1]] = {"status": "error", "status_ext": "error:user-session-limit"}
+
+    pool.check_status_batch(job_ids)
+
+    status_requests = [
+        r for r in requests_mock.request_history if r.url == SPN2Client.STATUS_URL
+    ]
+    assert {_account_of(r): r.text for r in status_requests} == {
+        job_id.split("-")[0]: f"job_ids={job_id}" for job_id in job_ids
+    }
+    # Both slots are free again; only the account at capacity shrinks its window.
+    a, b = pool.accounts
+    assert (a.in_flight, b.in_flight) == (0, 0)
+    assert (a.concurrency.limit, b.concurrency.limit) == (4, 2)
+
+
+def test_an_account_refusing_a_capture_shrinks_its_window(requests_mock):
+    requests_mock.post(
+        SPN2Client.SAVE_URL,
+        json={"status": "error", "status_ext": "error:user-session-limit"},
+    )
+    pool = AccountPool([_account("a", window=4)])
+
+    with pytest.raises(CaptureRejectedError):
+        pool.submit_capture("https://example.com/")
+
+    account = pool.accounts[0]
+    assert account.concurrency.limit < 4
+    assert account.in_flight == 0
+
+
+def test_jobs_the_workflow_stopped_polling_free_their_slot(spn2_api):
+    now = [0.0]
+    pool = AccountPool([_account("a")], clock=lambda: now[0])
+    polled = pool.submit_capture("https://example.com/1")
+    pool.submit_capture("https://example.com/2")
+
+    # Only the first job is still polled; the second was given up on.
+    for _ in range(4):
+        now[0] += ABANDONED_JOB_SEC / 2
+        pool.check_status_batch([polled])
+    pool.submit_capture("https://example.com/3")
+
+    assert pool.accounts[0].in_flight == 2
+
+
+def test_jobs_whose_account_is_unknown_are_polled_by_the_first_account(
+    spn2_api, requests_mock, caplog
+):
+    pool = AccountPool([_account("a"), _account("b")])
+
+    with caplog.at_level(logging.INFO):
+        pool.check_status_batch(["b-1", "b-2"])
+        pool.check_status_batch(["b-1", "b-2"])
+
+    status_requests = [
+        r for r in requests_mock.request_history if r.url == SPN2Client.STATUS_URL
+    ]
+    assert {_account_of(r) for r in status_requests} == {"a"}
+    assert caplog.text.count("Polling 2 job(s) from an earlier run") == 1
+
+
+def test_resumed_jobs_are_polled_by_the_account_that_submitted_them(
+    spn2_api, requests_mock, tmp_path
+):
+    path = str(tmp_path / "run.db")
+    urls = [f"https://example.com/{n}" for n in range(2)]
+    with RunJournal(path) as journal:
+        journal.record_queued(urls)
+        pool = AccountPool([_account("a"), _account("b")], journal=journal)
+        for url in urls:
+            journal.record_submitted(url, pool.submit_capture(url), time.time())
+
+    # A new process resumes the run.
+    requests_mock.reset_mock()
+    with RunJournal(path) as journal:
+        pool = AccountPool([_account("a"), _account("b")], journal=journal)
+        job_ids = list(journal.submitted_jobs())
+        assert [account.in_flight for account in pool.accounts] == [1, 1]
+        pool.check_status_batch(job_ids)
+
+    status_requests = [
+        r for r in requests_mock.request_history if r.url == SPN2Client.STATUS_URL
+    ]
+    assert {_account_of(r): r.text for r in status_requests} == {
+        job_id.split("-")[0]: f"job_ids={job_id}" for job_id in job_ids
+    }
+
+
+def test_async_pool_checks_each_account(spn2_api):
+    _, statuses = spn2_api
+    pool = AsyncAccountPool(AccountPool([_account("a"), _account("b")]))
+
+    async def run():
+        job_ids = [
+            await pool.submit_capture(f"https://example.com/{n}") for n in range(2)
+        ]
+        for job_id in job_ids:
+            statuses[job_id] = {"status": "success"}
+        return await pool.check_status_batch(job_ids)
+
+    results = asyncio.run(run())
+
+    assert sorted(r["job_id"][0] for r in results) == ["a", "b"]
+    assert all(account.in_flight == 0 for account in pool.pool.accounts)
+
+
+def test_workflow_spreads_a_run_across_accounts(spn2_api, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", lambda s: now.__setitem__(0, now[0] + s))
+    submitted, statuses = spn2_api
+    statuses.default_factory = lambda: {"status": "success"}
+
+    pool = AccountPool([_account("a", window=2), _account("b", window=2)])
+    urls = [f"https://example.com/{n}" for n in range(8)]
+
+    successes, failures = run_archive_workflow(
+        pool, urls, 0, {}, concurrency=pool.window
+    )
+
+    assert (successes, failures) == (8, 0)
+    assert sorted(submitted) == ["a"] * 4 + ["b"] * 4
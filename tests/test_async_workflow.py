@@ -0,0 +1,266 @@
+"""Tests for the asyncio archive engine in async_workflow.py."""
+
+import asyncio
+import functools
+import logging
+import threading
+import time
+
+import pytest
+import requests
+
+from wayback_machine_archiver.archiver import _journal_urls
+from wayback_machine_archiver.async_workflow import run_archive_workflow_async
+from wayback_machine_archiver.concurrency import ConcurrencyController
+from wayback_machine_archiver.journal import RunJournal
+from wayback_machine_archiver.polling import PollScheduler
+from wayback_machine_archiver.workflow import (
+    MAX_CONSECUTIVE_POLL_FAILURES,
+    ArchiveResult,
+)
+
+
+@pytest.fixture(autouse=True)
+def fast_polling(monkeypatch):
+    """Remove polling and retry waits so the engine runs as fast as the event loop allows."""
+    monkeypatch.setattr(
+        "wayback_machine_archiver.async_workflow.INITIAL_POLLING_WAIT", 0
+    )
+    monkeypatch.setattr("wayback_machine_archiver.async_workflow.MAX_POLLING_WAIT", 0)
+    monkeypatch.setattr(
+        "wayback_machine_archiver.async_workflow.PollScheduler",
+        functools.partial(PollScheduler, min_interval=0, max_interval=0),
+    )
+    monkeypatch.setattr(
+        "wayback_machine_archiver.workflow._retry_delay", lambda error_code, attempt: 0
+    )
+
+
+class FakeAsyncClient:
+    """
+    Minimal stand-in for AsyncSPN2Client. Each job succeeds after it has been
+    reported as pending `pending_polls` times.
+    """
+
+    def __init__(self, pending_polls=0, statuses=None):
+        self.pending_polls = pending_polls
+        self.statuses = statuses or {}
+        self.submitted: list[str] = []
+        self.poll_counts: dict[str, int] = {}
+        self.max_in_flight_seen = 0
+        self.in_flight: set[str] = set()
+
+    async def submit_capture(self, url, rate_limiter=None, api_params=None):
+        await asyncio.sleep(0)
+        job_id = f"job-{len(self.submitted)}"
+        self.submitted.append(url)
+        self.in_flight.add(job_id)
+        self.max_in_flight_seen = max(self.max_in_flight_seen, len(self.in_flight))
+        return job_id
+
+    async def check_status_batch(self, job_ids):
+        await asyncio.sleep(0)
+        results = []
+        for job_id in job_ids:
+            seen = self.poll_counts.get(job_id, 0)
+            self.poll_counts[job_id] = seen + 1
+            if job_id in self.statuses:
+                status = self.statuses[job_id]
+            elif seen < self.pending_polls:
+                status = {"status": "pending"}
+            else:
+                status = {"status": "success", "timestamp": "20250101"}
+            if status["status"] != "pending":
+                self.in_flight.discard(job_id)
+            results.append({"job_id": job_id, **status})
+        return results
+
+
+def test_async_workflow_reports_every_url():
+    """Every URL produces exactly one result through the on_result callback."""
+    client = FakeAsyncClient(pending_polls=2)
+    urls = [f"http://example.com/{i}" for i in range(5)]
+    results: list[ArchiveResult] = []
+
+    success, failure = asyncio.run(
+        run_archive_workflow_async(client, list(urls), 0, {}, on_result=results.append)
+    )
+
+    assert (success, failure) == (5, 0)
+    assert sorted(r.url for r in results) == sorted(urls)
+    assert all(r.status == "success" for r in results)
+    assert results[0].archive_url.startswith("https://web.archive.org/web/20250101/")
+
+
+def test_async_workflow_caps_in_flight_jobs():
+    """The engine never has more captures outstanding than the controller allows."""
+    client = FakeAsyncClient(pending_polls=3)
+    urls = [f"http://example.com/{i}" for i in range(8)]
+
+    asyncio.run(
+        run_archive_workflow_async(
+            client, urls, 0, {}, concurrency=ConcurrencyController(3)
+        )
+    )
+
+    assert client.max_in_flight_seen <= 3
+    assert len(client.submitted) == 8
+
+
+def test_async_workflow_consumes_urls_lazily():
+    """Submission starts before the URL source has produced every URL."""
+    events: list[str] = []
+
+    def source():
+        for i in range(3):
+            events.append(f"produced {i}")
+            yield f"http://example.com/{i}"
+
+    class RecordingClient(FakeAsyncClient):
+        async def submit_capture(self, url, rate_limiter=None, api_params=None):
+            events.append(f"submitted {url[-1]}")
+            return await super().submit_capture(url)
+
+    client = RecordingClient()
+    success, _ = asyncio.run(run_archive_workflow_async(client, source(), 0, {}))
+
+    assert success == 3
+    assert events.index("submitted 0") < events.index("produced 1")
+
+
+def test_async_workflow_requeues_transient_errors():
+    """A transient error re-submits the URL and only the final result is reported."""
+    client = FakeAsyncClient(
+        statuses={
+            "job-0": {"status": "error", "status_ext": "error:service-unavailable"}
+        }
+    )
+    results: list[ArchiveResult] = []
+
+    asyncio.run(
+        run_archive_workflow_async(
+            client, ["http://retry.com"], 0, {}, on_result=results.append
+        )
+    )
+
+    assert client.submitted == ["http://retry.com", "http://retry.com"]
+    assert results == [
+        ArchiveResult(
+            url="http://retry.com",
+            status="success",
+            archive_url="https://web.archive.org/web/20250101/http://retry.com",
+            error_code=None,
+            job_id="job-1",
+        )
+    ]
+
+
+def test_async_workflow_fails_all_after_max_consecutive_poll_failures(caplog):
+    """Persistent poll failures mark every pending job as a poll_failure."""
+
+    class FailingPollClient(FakeAsyncClient):
+        async def check_status_batch(self, job_ids):
+            raise requests.exceptions.ConnectionError("down")
+
+    results: list[ArchiveResult] = []
+
+    with caplog.at_level(logging.ERROR):
+        success, failure = asyncio.run(
+            run_archive_workflow_async(
+                FailingPollClient(), ["http://a.com"], 0, {}, on_result=results.append
+            )
+        )
+
+    assert (success, failure) == (0, 1)
+    assert [r.error_code for r in results] == ["poll_failure"]
+    assert (
+        f"Polling failed {MAX_CONSECUTIVE_POLL_FAILURES} consecutive times"
+        in caplog.text
+    )
+
+
+def test_async_workflow_propagates_callback_errors():
+    """An exception raised by on_result (e.g. BrokenPipeError) stops the run."""
+
+    def broken_pipe(_result):
+        raise BrokenPipeError
+
+    with pytest.raises(BrokenPipeError):
+        asyncio.run(
+            run_archive_workflow_async(
+                FakeAsyncClient(), ["http://a.com"], 0, {}, on_result=broken_pipe
+            )
+        )
+
+
+def test_async_workflow_full_window_with_no_poll_interval_finishes():
+    """
+    With a full window and a zero min_interval, the submit loop waits with a
+    zero timeout; it must still let the poll loop take the condition's lock.
+    """
+    urls = [f"http://example.com/{i}" for i in range(5)]
+    outcome = []
+
+    def run():
+        outcome.append(
+            asyncio.run(
+                run_archive_workflow_async(
+                    FakeAsyncClient(pending_polls=1),
+                    urls,
+                    0,
+                    {},
+                    concurrency=ConcurrencyController(1),
+                )
+            )
+        )
+
+    # A spinning loop never yields, so the run is watched from another thread.
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+
+    assert not thread.is_alive()
+    assert outcome == [(5, 0)]
+
+
+def test_async_workflow_runs_callbacks_off_the_event_loop():
+    """A slow on_result blocks a worker thread, not submissions and polls."""
+    urls = [f"http://example.com/{i}" for i in range(3)]
+    callback_threads = []
+
+    def slow_callback(_result):
+        callback_threads.append(threading.current_thread())
+        time.sleep(0.05)
+
+    success, failure = asyncio.run(
+        run_archive_workflow_async(
+            FakeAsyncClient(), urls, 0, {}, on_result=slow_callback
+        )
+    )
+
+    assert (success, failure) == (3, 0)
+    assert threading.main_thread() not in callback_threads
+
+
+def test_async_workflow_records_progress_in_a_journal(tmp_path):
+    """
+    URLs are recorded as queued from the worker thread reading the source
+    while the loop records submissions and results, on one journal.
+    """
+    path = str(tmp_path / "run.db")
+    urls = [f"http://example.com/{i}" for i in range(20)]
+
+    with RunJournal(path) as journal:
+        success, failure = asyncio.run(
+            run_archive_workflow_async(
+                FakeAsyncClient(pending_polls=1),
+                _journal_urls(journal, urls),
+                0,
+                {},
+                journal=journal,
+            )
+        )
+
+    assert (success, failure) == (20, 0)
+    with RunJournal(path) as journal:
+        assert not journal.has_outstanding()
@@ -0,0 +1,94 @@
+"""Tests for the conditional-GET SitemapCache."""
+
+import gzip
+
+import pytest
+import requests
+
+from wayback_machine_archiver.cache import SitemapCache
+from wayback_machine_archiver.sitemaps import process_sitemaps
+
+SITEMAP_URL = "https://example.com/sitemap.xml"
+SITEMAP_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+    <url><loc>https://example.com/page1</loc></url>
+</urlset>
+"""
+
+
+@pytest.fixture
+def session():
+    return requests.Session()
+
+
+def test_unchanged_sitemap_is_read_from_the_cache(requests_mock, session, tmp_path):
+    cache = SitemapCache(tmp_path)
+    requests_mock.get(
+        SITEMAP_URL,
+        [
+            {"content": SITEMAP_XML, "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+
+    first = process_sitemaps([SITEMAP_URL], session, cache=cache)
+    second = process_sitemaps([SITEMAP_URL], session, cache=cache)
+
+    assert first == second == {"https://example.com/page1"}
+    assert "If-None-Match" not in requests_mock.request_history[0].headers
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+
+
+def test_last_modified_is_sent_back(requests_mock, session, tmp_path):
+    cache = SitemapCache(tmp_path)
+    last_modified = "Wed, 01 Jan 2025 00:00:00 GMT"
+    requests_mock.get(
+        SITEMAP_URL, content=SITEMAP_XML, headers={"Last-Modified": last_modified}
+    )
+
+    process_sitemaps([SITEMAP_URL], session, cache=cache)
+
+    assert cache.conditional_headers(SITEMAP_URL) == {
+        "If-Modified-Since": last_modified
+    }
+
+
+def test_gzipped_sitemap_is_cached_compressed(requests_mock, session, tmp_path):
+    cache = SitemapCache(tmp_path)
+    compressed = gzip.compress(SITEMAP_XML)
+    requests_mock.get(SITEMAP_URL, content=compressed, headers={"ETag": '"v1"'})
+
+    process_sitemaps([SITEMAP_URL], session, cache=cache)
+
+    with cache.open_body(SITEMAP_URL) as fp:
+        assert fp.read() == compressed
+
+
+def test_unparseable_sitemap_is_not_cached(requests_mock, session, tmp_path):
+    cache = SitemapCache(tmp_path)
+    requests_mock.get(SITEMAP_URL, content=b"<urlset>", headers={"ETag": '"v1"'})
+
+    assert process_sitemaps([SITEMAP_URL], session, cache=cache) == set()
+
+    assert cache.conditional_headers(SITEMAP_URL) == {}
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failed_validator_write_keeps_the_old_validators(
+    requests_mock, session, tmp_path, monkeypatch
+):
+    cache = SitemapCache(tmp_path)
+    requests_mock.get(SITEMAP_URL, content=SITEMAP_XML, headers={"ETag": '"v1"'})
+    process_sitemaps([SITEMAP_URL], session, cache=cache)
+
+    def interrupted_dump(obj, fp):
+        fp.write('{"url": ')
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr("wayback_machine_archiver.cache.json.dump", interrupted_dump)
+    requests_mock.get(SITEMAP_URL, content=SITEMAP_XML, headers={"ETag": '"v2"'})
+    with pytest.raises(KeyboardInterrupt):
+        process_sitemaps([SITEMAP_URL], session, cache=cache)
+
+    assert cache.conditional_headers(SITEMAP_URL) == {"If-None-Match": '"v1"'}
+    assert not list(tmp_path.glob("*.tmp"))
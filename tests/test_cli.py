@@ -6,8 +6,9 @@ from unittest import mock
 
 import pytest
 
-from wayback_machine_archiver.archiver import _is_valid_url, main
+from wayback_machine_archiver.archiver import _load_credentials, main
 from wayback_machine_archiver.cli import create_parser
+from wayback_machine_archiver.urls import is_valid_url
 
 # Test constants
 DUMMY_CREDENTIALS = "dummy_key"
@@ -53,7 +54,7 @@ def mock_no_credentials(monkeypatch):
     "input_level, expected_level",
     [("info", "INFO"), ("DEBUG", "DEBUG")],
 )
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -78,7 +79,7 @@ def test_log_level(
     )
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -105,7 +106,7 @@ def test_log_to_file(
     "user_input, expected_wait",
     [(2, 9), (10, 10)],
 )
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -143,6 +144,49 @@ def test_main_exits_if_no_credentials(
     assert mock_logging_error.call_count > 0
 
 
+def test_credentials_are_pooled_from_env_and_file(monkeypatch, tmp_path):
+    """Verify numbered env pairs and a credentials file each add an account."""
+    env = {
+        "INTERNET_ARCHIVE_ACCESS_KEY": "a1",
+        "INTERNET_ARCHIVE_SECRET_KEY": "s1",
+        "INTERNET_ARCHIVE_ACCESS_KEY_2": "a2",
+        "INTERNET_ARCHIVE_SECRET_KEY_2": "s2",
+    }
+    monkeypatch.setattr(
+        "wayback_machine_archiver.archiver.os.getenv",
+        lambda key, default=None: env.get(key, default),
+    )
+    path = tmp_path / "accounts.txt"
+    path.write_text("# team accounts\na3:s3\n\na1:s1\n")
+
+    assert _load_credentials(str(path)) == [("a1", "s1"), ("a2", "s2"), ("a3", "s3")]
+
+
+@mock.patch("wayback_machine_archiver.archiver.logging.error")
+def test_malformed_credentials_file_exits(
+    mock_logging_error, mock_no_credentials, tmp_path
+):
+    path = tmp_path / "accounts.txt"
+    path.write_text("a1:s1\nnot-a-pair\n")
+
+    with pytest.raises(SystemExit):
+        _load_credentials(str(path))
+
+    assert "Line %d of %s" in mock_logging_error.call_args[0][0]
+
+
+@pytest.mark.parametrize("name", ["missing.txt", "."])
+@mock.patch("wayback_machine_archiver.archiver.logging.error")
+def test_unreadable_credentials_file_exits(
+    mock_logging_error, mock_no_credentials, tmp_path, name
+):
+    with pytest.raises(SystemExit) as e:
+        _load_credentials(str(tmp_path / name))
+
+    assert e.value.code == 1
+    assert "Could not read credentials file" in mock_logging_error.call_args[0][0]
+
+
 # --- Tests for API option parsing ---
 
 
@@ -245,10 +289,10 @@ def test_api_option_flags_are_parsed_correctly():
 )
 def test_is_valid_url(url, expected):
     """Verify URL validation accepts http/https and rejects invalid URLs."""
-    assert _is_valid_url(url) == expected
+    assert is_valid_url(url) == expected
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -0,0 +1,62 @@
+"""Tests for the AIMD ConcurrencyController."""
+
+import logging
+
+from wayback_machine_archiver.concurrency import ConcurrencyController
+
+
+def test_window_starts_at_initial_value():
+    controller = ConcurrencyController(10, maximum=50)
+    assert controller.limit == 10
+
+
+def test_successes_grow_window_by_about_one_per_window():
+    """A full window's worth of successes raises the limit by one."""
+    controller = ConcurrencyController(10, maximum=50)
+
+    for _ in range(10):
+        controller.record_success()
+
+    assert controller.limit == 11
+
+
+def test_window_never_exceeds_maximum():
+    controller = ConcurrencyController(4, maximum=5)
+
+    for _ in range(100):
+        controller.record_success()
+
+    assert controller.limit == 5
+
+
+def test_capacity_error_halves_window(caplog, clock):
+    controller = ConcurrencyController(10, maximum=50, clock=clock)
+
+    with caplog.at_level(logging.WARNING):
+        controller.record_capacity_error()
+
+    assert controller.limit == 5
+    assert "reducing in-flight captures from 10 to 5" in caplog.text
+
+
+def test_burst_of_capacity_errors_decreases_once_per_cooldown(clock):
+    """Many capacity errors from one poll only count as a single signal."""
+    controller = ConcurrencyController(16, maximum=50, cooldown_sec=30, clock=clock)
+
+    for _ in range(5):
+        controller.record_capacity_error()
+    assert controller.limit == 8
+
+    clock.now += 31
+    controller.record_capacity_error()
+    assert controller.limit == 4
+
+
+def test_window_never_drops_below_minimum(clock):
+    controller = ConcurrencyController(2, minimum=1, cooldown_sec=0, clock=clock)
+
+    for _ in range(5):
+        controller.record_capacity_error()
+        clock.now += 1
+
+    assert controller.limit == 1
@@ -0,0 +1,133 @@
+"""Tests for sharing an account's rate limit and window between processes."""
+
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import requests
+
+from wayback_machine_archiver.accounts import Account, AccountPool
+from wayback_machine_archiver.clients import SPN2Client
+from wayback_machine_archiver.concurrency import ConcurrencyController
+from wayback_machine_archiver.coordination import (
+    IN_FLIGHT_TTL_SEC,
+    Coordinator,
+    SharedRateLimiter,
+)
+
+pytestmark = pytest.mark.skipif(
+    sys.platform == "win32", reason="needs POSIX file locks"
+)
+
+
+@pytest.fixture
+def open_coordinator(tmp_path, monkeypatch):
+    """Opens Coordinators, optionally posing as another (running) process."""
+    coordinators = []
+
+    def _open(pid=None, clock=time.time):
+        with monkeypatch.context() as m:
+            if pid is not None:
+                m.setattr(os, "getpid", lambda: pid)
+            coordinator = Coordinator(tmp_path, "access-key", clock=clock)
+        coordinators.append(coordinator)
+        return coordinator
+
+    yield _open
+    for coordinator in coordinators:
+        coordinator.close()
+
+
+def test_limiters_sharing_a_coordinator_share_one_budget(open_coordinator):
+    now = [1000.0]
+    first = SharedRateLimiter(open_coordinator(clock=lambda: now[0]), 10)
+    second = SharedRateLimiter(open_coordinator(clock=lambda: now[0]), 10)
+
+    assert first.reserve() == 0
+    assert second.reserve() == 10
+    assert first.delay() == 20
+
+
+def test_other_processes_in_flight_shrink_the_window(open_coordinator):
+    now = [1000.0]
+    ours = open_coordinator(clock=lambda: now[0])
+    theirs = open_coordinator(pid=os.getppid())
+    account = Account(
+        name="#1",
+        client=SPN2Client(requests.Session(), "access-key", "secret"),
+        rate_limiter=SharedRateLimiter(ours, 0),
+        concurrency=ConcurrencyController(4),
+        coordinator=ours,
+    )
+    pool = AccountPool([account])
+
+    theirs.publish_in_flight(3)
+    assert pool.window.limit == 1
+    theirs.publish_in_flight(0)
+    # Other processes' counts are re-read once the cached one is stale.
+    assert pool.window.limit == 1
+    now[0] += IN_FLIGHT_TTL_SEC
+    assert pool.window.limit == 4
+
+
+def test_reading_the_state_does_not_rewrite_it(open_coordinator):
+    coordinator = open_coordinator()
+    coordinator.publish_in_flight(2)
+    mtime = os.stat(coordinator.path).st_mtime_ns
+
+    time.sleep(0.01)
+    SharedRateLimiter(coordinator, 10).delay()
+    coordinator.others_in_flight()
+
+    assert os.stat(coordinator.path).st_mtime_ns == mtime
+
+
+def test_pool_closes_its_coordinators(open_coordinator):
+    coordinator = open_coordinator()
+    account = Account(
+        name="#1",
+        client=SPN2Client(requests.Session(), "access-key", "secret"),
+        rate_limiter=SharedRateLimiter(coordinator, 0),
+        concurrency=ConcurrencyController(4),
+        coordinator=coordinator,
+    )
+
+    AccountPool([account]).close()
+
+    # A closed coordinator has no file to lock.
+    with pytest.raises(ValueError):
+        coordinator.publish_in_flight(1)
+
+
+def test_exited_processes_are_forgotten(open_coordinator):
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    open_coordinator(pid=exited.pid).publish_in_flight(5)
+
+    assert open_coordinator().others_in_flight() == 0
+
+
+def _reserve_slots(directory, count, results):
+    coordinator = Coordinator(directory, "access-key")
+    limiter = SharedRateLimiter(coordinator, 10)
+    results.put([time.time() + limiter.reserve() for _ in range(count)])
+
+
+def test_separate_processes_are_spaced_out_together(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    workers = [
+        context.Process(target=_reserve_slots, args=(str(tmp_path), 3, results))
+        for _ in range(2)
+    ]
+    for worker in workers:
+        worker.start()
+    slots = sorted(results.get(timeout=30) + results.get(timeout=30))
+    for worker in workers:
+        worker.join()
+
+    gaps = [later - earlier for earlier, later in zip(slots, slots[1:])]
+    assert gaps == pytest.approx([10] * 5, abs=1)
@@ -0,0 +1,126 @@
+"""Tests for finding an origin's sitemaps from robots.txt and common paths."""
+
+import json
+import logging
+
+import pytest
+import requests
+
+from wayback_machine_archiver.discovery import (
+    DiscoveryCache,
+    discover_sitemaps,
+    normalize_origin,
+)
+
+ORIGIN = "https://example.com"
+
+
+@pytest.fixture
+def session():
+    return requests.Session()
+
+
+@pytest.mark.parametrize(
+    "origin,expected",
+    [
+        ("example.com", "https://example.com"),
+        ("HTTP://Example.com:8080/some/page", "http://example.com:8080"),
+        ("https://example.com/", "https://example.com"),
+    ],
+)
+def test_normalize_origin(origin, expected):
+    assert normalize_origin(origin) == expected
+
+
+def test_sitemaps_are_read_from_robots_txt(requests_mock, session):
+    requests_mock.get(
+        f"{ORIGIN}/robots.txt",
+        text=(
+            "User-agent: *\n"
+            "Disallow: /private\n"
+            "Sitemap: https://example.com/sitemap-posts.xml\n"
+            "sitemap: /sitemap-pages.xml  # relative\n"
+        ),
+    )
+
+    result = discover_sitemaps(["example.com"], session)
+
+    assert result == [
+        "https://example.com/sitemap-posts.xml",
+        "https://example.com/sitemap-pages.xml",
+    ]
+    assert requests_mock.call_count == 1
+
+
+def test_common_paths_are_probed_without_robots_sitemaps(requests_mock, session):
+    requests_mock.get(f"{ORIGIN}/robots.txt", status_code=404)
+    requests_mock.get(f"{ORIGIN}/sitemap.xml", status_code=404)
+    requests_mock.get(f"{ORIGIN}/sitemap_index.xml", text="<sitemapindex/>")
+
+    assert discover_sitemaps([ORIGIN], session) == [f"{ORIGIN}/sitemap_index.xml"]
+
+
+def test_cached_results_are_reused_until_stale(requests_mock, session, tmp_path):
+    path = tmp_path / "discovery.json"
+    requests_mock.get(f"{ORIGIN}/robots.txt", text="User-agent: *\n")
+    requests_mock.get(f"{ORIGIN}/sitemap.xml", text="<urlset/>")
+
+    first = discover_sitemaps([ORIGIN], session, cache=DiscoveryCache(path))
+    calls = requests_mock.call_count
+    second = discover_sitemaps([ORIGIN], session, cache=DiscoveryCache(path))
+
+    assert first == second == [f"{ORIGIN}/sitemap.xml"]
+    assert requests_mock.call_count == calls
+
+    discover_sitemaps([ORIGIN], session, cache=DiscoveryCache(path, ttl=0))
+    assert requests_mock.call_count == 2 * calls
+
+
+def test_origin_without_sitemaps_is_cached(requests_mock, session, tmp_path, caplog):
+    path = tmp_path / "discovery.json"
+    requests_mock.get(f"{ORIGIN}/robots.txt", text="")
+    for probe in ("sitemap.xml", "sitemap_index.xml", "sitemap.xml.gz"):
+        requests_mock.get(f"{ORIGIN}/{probe}", status_code=404)
+
+    with caplog.at_level(logging.WARNING):
+        assert discover_sitemaps([ORIGIN], session, cache=DiscoveryCache(path)) == []
+
+    assert "No sitemaps found for https://example.com" in caplog.text
+    assert json.loads(path.read_text())[ORIGIN]["sitemaps"] == []
+
+
+def test_unreachable_origin_is_skipped_and_not_cached(
+    requests_mock, session, tmp_path, caplog
+):
+    path = tmp_path / "discovery.json"
+    requests_mock.get(
+        "https://down.example/robots.txt", exc=requests.exceptions.ConnectTimeout
+    )
+    requests_mock.get(
+        f"{ORIGIN}/robots.txt", text="Sitemap: https://example.com/sitemap.xml\n"
+    )
+
+    with caplog.at_level(logging.WARNING):
+        result = discover_sitemaps(
+            ["down.example", ORIGIN], session, cache=DiscoveryCache(path)
+        )
+
+    assert result == [f"{ORIGIN}/sitemap.xml"]
+    assert "Could not discover sitemaps for https://down.example" in caplog.text
+    assert "https://down.example" not in json.loads(path.read_text())
+
+
+def test_unwritable_cache_is_logged_not_raised(
+    requests_mock, session, tmp_path, caplog
+):
+    path = tmp_path / "missing-dir" / "discovery.json"
+    requests_mock.get(
+        f"{ORIGIN}/robots.txt", text="Sitemap: https://example.com/sitemap.xml\n"
+    )
+
+    with caplog.at_level(logging.WARNING):
+        result = discover_sitemaps([ORIGIN], session, cache=DiscoveryCache(path))
+
+    assert result == [f"{ORIGIN}/sitemap.xml"]
+    assert "Could not write discovery cache" in caplog.text
+    assert not path.exists()
@@ -1,4 +1,13 @@
-from wayback_machine_archiver.sitemaps import extract_urls_from_sitemap
+import io
+from xml.etree.ElementTree import ParseError
+
+import pytest
+
+from wayback_machine_archiver.sitemaps import (
+    SitemapEntry,
+    extract_urls_from_sitemap,
+    iter_sitemap_entries,
+)
 
 
 def test_ascii_sitemap():
@@ -81,3 +90,75 @@ def test_sitemap_index():
         "https://example.com/sitemap1.xml",
         "https://example.com/sitemap2.xml",
     }
+
+
+class CountingReader(io.BytesIO):
+    """A BytesIO that remembers how many bytes have been read from it."""
+
+    bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+
+def test_iter_sitemap_entries_streams_large_sitemaps():
+    """Verify entries are yielded before the whole sitemap has been read."""
+    urls = "".join(
+        f"<url><loc>https://example.com/page{i}</loc></url>" for i in range(20000)
+    )
+    sitemap = f"""<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>
+    """.encode()
+    source = CountingReader(sitemap)
+
+    entries = iter_sitemap_entries(source)
+
+    assert next(entries) == SitemapEntry("https://example.com/page0", False)
+    assert source.bytes_read < len(sitemap)
+    assert sum(1 for _ in entries) == 19999
+
+
+def test_iter_sitemap_entries_marks_child_sitemaps():
+    SITEMAP_INDEX = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <sitemap><loc>https://example.com/sitemap1.xml</loc></sitemap>
+        </sitemapindex>
+    """
+
+    entries = list(iter_sitemap_entries(io.BytesIO(SITEMAP_INDEX)))
+
+    assert entries == [SitemapEntry("https://example.com/sitemap1.xml", True)]
+
+
+def test_iter_sitemap_entries_raises_on_truncated_xml():
+    TRUNCATED = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <url><loc>https://example.com/page1</loc></url>
+        <url><loc>https://exam"""
+
+    entries = iter_sitemap_entries(io.BytesIO(TRUNCATED))
+
+    assert next(entries).loc == "https://example.com/page1"
+    with pytest.raises(ParseError):
+        next(entries)
+
+
+def test_iter_sitemap_entries_reads_lastmod():
+    SITEMAP = b"""<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+        <url>
+        <loc>https://example.com/page1</loc>
+        <lastmod> 2025-01-15T12:00:00+00:00 </lastmod>
+        </url>
+        <url><loc>https://example.com/page2</loc></url>
+        </urlset>
+    """
+
+    entries = list(iter_sitemap_entries(io.BytesIO(SITEMAP)))
+
+    assert entries == [
+        SitemapEntry("https://example.com/page1", False, "2025-01-15T12:00:00+00:00"),
+        SitemapEntry("https://example.com/page2", False, None),
+    ]
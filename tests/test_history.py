@@ -0,0 +1,168 @@
+"""Tests for loading previous results and skipping already archived URLs."""
+
+import gzip
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import pytest
+
+from wayback_machine_archiver.archiver import main
+from wayback_machine_archiver.history import ResultsHistory, parse_duration
+
+DUMMY_CREDENTIALS = "dummy_key"
+CREDENTIAL_ENV_VARS = ("INTERNET_ARCHIVE_ACCESS_KEY", "INTERNET_ARCHIVE_SECRET_KEY")
+NOW = datetime.now(timezone.utc)
+
+
+def _record(url, status="success", age=timedelta(0)):
+    return json.dumps(
+        {
+            "url": url,
+            "job_id": "job",
+            "status": status,
+            "archive_url": None,
+            "error_code": None,
+            "recorded_at": (NOW - age).isoformat(),
+        }
+    )
+
+
+@pytest.fixture
+def results_file(tmp_path):
+    path = tmp_path / "results.jsonl"
+    path.write_text(
+        "\n".join(
+            [
+                _record("https://recent.com"),
+                _record("https://old.com", age=timedelta(days=30)),
+                _record("https://failed.com", status="failed"),
+                "not json",
+            ]
+        )
+        + "\n"
+    )
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("3d 5h", timedelta(days=3, hours=5)),
+        ("90m", timedelta(minutes=90)),
+        ("1w", timedelta(weeks=1)),
+        ("2H30M", timedelta(hours=2, minutes=30)),
+        ("45s", timedelta(seconds=45)),
+    ],
+)
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+@pytest.mark.parametrize("text", ["", "5", "3x", "3d junk"])
+def test_parse_duration_rejects_invalid(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
+
+
+def test_history_indexes_only_successes(results_file):
+    history = ResultsHistory.load([results_file])
+
+    assert "https://recent.com" in history
+    assert "https://old.com" in history
+    assert "https://failed.com" not in history
+    assert len(history) == 2
+
+
+def test_history_respects_since(results_file):
+    history = ResultsHistory.load([results_file], since=NOW - timedelta(days=7))
+
+    assert "https://recent.com" in history
+    assert "https://old.com" not in history
+
+
+def test_history_reads_gzipped_results(tmp_path):
+    path = tmp_path / "results.jsonl.gz"
+    with gzip.open(path, "wt") as f:
+        f.write(_record("https://gz.com") + "\n")
+
+    assert "https://gz.com" in ResultsHistory.load([str(path)])
+
+
+def test_history_merges_sorted_runs(monkeypatch):
+    """Digests sorted in several runs are merged and de-duplicated."""
+    monkeypatch.setattr("wayback_machine_archiver.history._SORT_RUN", 3)
+    digests = [9, 2, 7, 2, 5, 9, 1, 7]
+
+    history = ResultsHistory(digests)
+
+    assert list(history._digests) == [1, 2, 5, 7, 9]
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(1, 0)
+)
+def test_main_skips_recently_archived_urls(
+    mock_workflow, mock_sitemaps, monkeypatch, results_file
+):
+    """Verify only URLs without a recent success reach the workflow."""
+    monkeypatch.setattr(
+        "wayback_machine_archiver.archiver.os.getenv",
+        lambda key, default=None: (
+            DUMMY_CREDENTIALS if key in CREDENTIAL_ENV_VARS else default
+        ),
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "archiver",
+            "https://recent.com",
+            "https://old.com",
+            "https://new.com",
+            "--results-history",
+            results_file,
+            "--skip-archived-since",
+            "7d",
+        ],
+    )
+    main()
+
+    assert set(mock_workflow.call_args[0][1]) == {"https://old.com", "https://new.com"}
+
+
+def test_skip_archived_since_requires_history(monkeypatch):
+    monkeypatch.setattr(
+        sys, "argv", ["archiver", "--skip-archived-since", "1d", "https://a.com"]
+    )
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+def _truncated_gzip(tmp_path):
+    path = tmp_path / "truncated.jsonl.gz"
+    path.write_bytes(gzip.compress((_record("https://a.com") + "\n").encode())[:-8])
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "make_path", [lambda tmp_path: str(tmp_path / "missing.jsonl"), _truncated_gzip]
+)
+def test_unreadable_history_exits_with_an_error(make_path, monkeypatch, tmp_path):
+    monkeypatch.setattr(
+        "wayback_machine_archiver.archiver.os.getenv",
+        lambda key, default=None: (
+            DUMMY_CREDENTIALS if key in CREDENTIAL_ENV_VARS else default
+        ),
+    )
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["archiver", "https://a.com", "--results-history", make_path(tmp_path)],
+    )
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 1
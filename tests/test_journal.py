@@ -0,0 +1,188 @@
+"""Tests for the SQLite run journal and resuming from it."""
+
+import sqlite3
+import time
+from unittest import mock
+
+import pytest
+
+from wayback_machine_archiver.journal import RunJournal
+from wayback_machine_archiver.workflow import ArchiveResult, run_archive_workflow
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / "run.db")
+
+
+@pytest.fixture
+def instant_sleep(monkeypatch):
+    """Make time.sleep return immediately while advancing time.time to match."""
+    now = [time.time()]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+
+
+def _states(path):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT url, state FROM urls"))
+
+
+def test_journal_uses_wal_mode(journal_path):
+    with RunJournal(journal_path):
+        pass
+    with sqlite3.connect(journal_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_record_queued_ignores_known_urls(journal_path):
+    with RunJournal(journal_path) as journal:
+        assert journal.record_queued(["http://a.com", "http://b.com"]) == 2
+        journal.record_submitted("http://a.com", "job-a", 100.0)
+
+        assert journal.record_queued(["http://a.com", "http://c.com"]) == 1
+        assert journal.queued_urls() == ["http://b.com", "http://c.com"]
+        assert journal.submitted_jobs() == {"job-a": ("http://a.com", 100.0)}
+
+
+def test_results_and_requeues_update_state(journal_path):
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://a.com", "http://b.com"])
+        journal.record_submitted("http://a.com", "job-a", 100.0)
+        journal.record_submitted("http://b.com", "job-b", 100.0)
+        journal.record_result(
+            ArchiveResult("http://a.com", "success", "https://web", None, "job-a")
+        )
+        journal.record_requeued("http://b.com", transient_retries=2)
+
+        assert journal.submitted_jobs() == {}
+        assert journal.queued_urls() == ["http://b.com"]
+        assert journal.retry_counters() == ({}, {"http://b.com": 2})
+
+    assert _states(journal_path) == {"http://a.com": "done", "http://b.com": "queued"}
+
+
+def test_job_accounts_lists_submitted_captures_with_their_account(journal_path):
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://a.com", "http://b.com", "http://c.com"])
+        for url, job_id in [("http://a.com", "job-a"), ("http://b.com", "job-b")]:
+            journal.record_account(url, "#2")
+            journal.record_submitted(url, job_id, 100.0)
+        journal.record_submitted("http://c.com", "job-c", 100.0)
+        journal.record_requeued("http://b.com", transient_retries=1)
+
+        assert journal.job_accounts() == {"job-a": "#2"}
+
+
+def test_journal_without_an_account_column_is_upgraded(journal_path):
+    with sqlite3.connect(journal_path) as conn:
+        conn.execute(
+            "CREATE TABLE urls (url TEXT PRIMARY KEY, state TEXT NOT NULL,"
+            " job_id TEXT, submitted_at REAL,"
+            " submit_attempts INTEGER NOT NULL DEFAULT 0,"
+            " transient_retries INTEGER NOT NULL DEFAULT 0,"
+            " error_code TEXT, updated_at REAL NOT NULL)"
+        )
+        conn.execute(
+            "INSERT INTO urls (url, state, job_id, submitted_at, updated_at)"
+            " VALUES ('http://a.com', 'submitted', 'job-a', 100.0, 100.0)"
+        )
+
+    with RunJournal(journal_path) as journal:
+        assert journal.submitted_jobs() == {"job-a": ("http://a.com", 100.0)}
+        assert journal.job_accounts() == {}
+
+
+def test_writes_are_committed_in_batches(journal_path):
+    """Nothing is visible to other readers until a batch fills up."""
+    with RunJournal(
+        journal_path, commit_every=3, commit_interval_sec=float("inf")
+    ) as journal:
+        journal.record_queued(["http://a.com", "http://b.com"])
+        assert _states(journal_path) == {}
+
+        journal.record_attempt("http://a.com", 1)
+        assert len(_states(journal_path)) == 2
+
+
+def test_reset_clears_previous_run(journal_path):
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://a.com"])
+        journal.reset()
+        assert not journal.has_outstanding()
+
+
+def test_workflow_records_each_transition(journal_path, instant_sleep):
+    mock_client = mock.Mock()
+    mock_client.submit_capture.side_effect = ["job-a", "job-b"]
+    mock_client.check_status_batch.return_value = [
+        {"status": "success", "job_id": "job-a", "timestamp": "20250101"},
+        {"status": "error", "job_id": "job-b", "status_ext": "error:not-found"},
+    ]
+    urls = ["http://a.com", "http://b.com"]
+
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(urls)
+        run_archive_workflow(mock_client, urls, 0, {}, journal=journal)
+
+    assert _states(journal_path) == {"http://a.com": "done", "http://b.com": "failed"}
+
+
+def test_workflow_resumes_submitted_jobs_without_resubmitting(
+    journal_path, instant_sleep
+):
+    """A job the journal lists as submitted is polled, not submitted again."""
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://a.com", "http://b.com"])
+        journal.record_submitted("http://a.com", "job-a", time.time() - 60)
+
+    mock_client = mock.Mock()
+    mock_client.submit_capture.return_value = "job-b"
+    mock_client.check_status_batch.side_effect = lambda job_ids: [
+        {"status": "success", "job_id": job_id, "timestamp": "20250101"}
+        for job_id in job_ids
+    ]
+    on_result = mock.Mock()
+
+    with RunJournal(journal_path) as journal:
+        success, failure = run_archive_workflow(
+            mock_client,
+            journal.queued_urls(),
+            0,
+            {},
+            on_result=on_result,
+            journal=journal,
+        )
+
+    assert (success, failure) == (2, 0)
+    mock_client.submit_capture.assert_called_once()
+    assert mock_client.submit_capture.call_args[0][0] == "http://b.com"
+    # The overdue resumed job is checked on the first poll.
+    assert mock_client.check_status_batch.call_args_list[0][0][0] == ["job-a"]
+    reported = {call.args[0].url for call in on_result.call_args_list}
+    assert reported == {"http://a.com", "http://b.com"}
+
+
+def test_workflow_restores_retry_counters(journal_path, instant_sleep):
+    """Transient retries used before a crash still count after resuming."""
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://a.com"])
+        journal.record_requeued("http://a.com", transient_retries=3)
+
+    mock_client = mock.Mock()
+    mock_client.submit_capture.return_value = "job-a"
+    mock_client.check_status_batch.return_value = [
+        {"status": "error", "job_id": "job-a", "status_ext": "error:bad-gateway"}
+    ]
+
+    with RunJournal(journal_path) as journal:
+        _, failure = run_archive_workflow(
+            mock_client, journal.queued_urls(), 0, {}, journal=journal
+        )
+
+    assert failure == 1
+    mock_client.submit_capture.assert_called_once()
@@ -4,6 +4,7 @@ import json
 import logging
 import os
 import sys
+import time
 from datetime import datetime, timezone
 from unittest import mock
 
@@ -11,6 +12,9 @@ import pytest
 
 from wayback_machine_archiver.archiver import _write_json_result, main
 from wayback_machine_archiver.clients import SPN2Client
+from wayback_machine_archiver.journal import RunJournal
+from wayback_machine_archiver.shared_queue import SQLiteSharedQueue
+from wayback_machine_archiver.sitemaps import SITEMAP_MAX_BYTES
 from wayback_machine_archiver.workflow import _NOOP_CALLBACK, ArchiveResult
 
 # Test constants
@@ -44,10 +48,22 @@ def mock_credentials(monkeypatch):
     )
 
 
+@pytest.fixture
+def instant_sleep(monkeypatch):
+    """Make time.sleep return immediately while advancing time.time to match."""
+    now = [time.time()]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+
+
 # --- Tests for URL gathering and shuffling ---
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -65,7 +81,7 @@ def test_random_order_flag_shuffles_urls(
     assert set(passed_urls) == set(urls_to_archive)
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -83,7 +99,7 @@ def test_default_order_does_not_shuffle(
     assert set(passed_urls) == set(urls_to_archive)
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
 )
@@ -119,10 +135,40 @@ def test_main_builds_and_passes_api_params(
     assert passed_params == expected_params
 
 
+@mock.patch(
+    "wayback_machine_archiver.archiver.iter_sitemap_urls",
+    return_value=iter(["https://example.com/a", "https://example.com/b"]),
+)
+@mock.patch("wayback_machine_archiver.archiver.run_archive_workflow")
+def test_urls_are_streamed_deduplicated_in_order(
+    mock_workflow, mock_sitemaps, cli_args, mock_credentials
+):
+    """Verify sources are chained in order with duplicates and invalid URLs dropped."""
+    passed_urls = []
+
+    def workflow(client, urls, *args, **kwargs):
+        passed_urls.extend(urls)
+        return 1, 0
+
+    mock_workflow.side_effect = workflow
+    cli_args(
+        [
+            "archiver",
+            "https://example.com/a",
+            "not-a-url",
+            "--sitemaps",
+            "https://example.com/sitemap.xml",
+        ]
+    )
+    main()
+
+    assert passed_urls == ["https://example.com/a", "https://example.com/b"]
+
+
 # --- Tests for exit codes ---
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 3)
 )
@@ -136,7 +182,7 @@ def test_main_exits_with_code_1_on_failures(
     assert exc_info.value.code == 1
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(5, 0)
 )
@@ -151,14 +197,12 @@ def test_main_exits_cleanly_on_success(
 # --- Integration test for full main() flow ---
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_main_end_to_end_with_mocked_timing(
-    _mock_client_sleep, _mock_workflow_sleep, cli_args, mock_credentials, requests_mock
+    instant_sleep, cli_args, mock_credentials, requests_mock
 ):
     """
     End-to-end test verifying the full flow from CLI args through API calls.
-    Time.sleep is mocked to avoid delays; HTTP layer is mocked via requests-mock.
+    Sleeps return immediately; HTTP layer is mocked via requests-mock.
     """
     url_to_archive = "http://integration-test.com"
 
@@ -246,7 +290,7 @@ def test_main_end_to_end_with_mocked_timing(
     ],
 )
 @mock.patch(
-    "wayback_machine_archiver.archiver.process_sitemaps",
+    "wayback_machine_archiver.archiver.iter_sitemap_urls",
     return_value={EXTRACTED_PAGE_URL},
 )
 @mock.patch(
@@ -279,7 +323,7 @@ def test_archive_sitemap_also_behavior(
 # --- Tests for --json output ---
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(1, 0)
 )
@@ -295,7 +339,7 @@ def test_json_flag_passes_callback(
     assert callable(call_kwargs["on_result"])
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(1, 0)
 )
@@ -310,11 +354,8 @@ def test_no_json_flag_uses_default(
     assert call_kwargs["on_result"] is _NOOP_CALLBACK
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_json_end_to_end(
-    _mock_client_sleep,
-    _mock_workflow_sleep,
+    instant_sleep,
     cli_args,
     mock_credentials,
     requests_mock,
@@ -456,11 +497,8 @@ def test_write_json_result_no_job_id(capsys):
 # --- End-to-end test for failure JSON output ---
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_json_end_to_end_failure(
-    _mock_client_sleep,
-    _mock_workflow_sleep,
+    instant_sleep,
     cli_args,
     mock_credentials,
     requests_mock,
@@ -506,11 +544,8 @@ def test_json_end_to_end_failure(
 # --- Multi-URL test ---
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_json_multi_url(
-    _mock_client_sleep,
-    _mock_workflow_sleep,
+    instant_sleep,
     cli_args,
     mock_credentials,
     requests_mock,
@@ -566,7 +601,7 @@ def test_json_multi_url(
 @mock.patch("wayback_machine_archiver.archiver.os.close")
 @mock.patch("wayback_machine_archiver.archiver.os.dup2")
 @mock.patch("wayback_machine_archiver.archiver.os.open", return_value=99)
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 @mock.patch(
     "wayback_machine_archiver.archiver.run_archive_workflow",
     side_effect=BrokenPipeError,
@@ -593,7 +628,7 @@ def test_broken_pipe_exits_cleanly(
 # --- Edge case tests for --json output ---
 
 
-@mock.patch("wayback_machine_archiver.archiver.process_sitemaps", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
 def test_json_with_no_urls_produces_no_output(
     mock_sitemaps, cli_args, mock_credentials, capsys
 ):
@@ -605,11 +640,8 @@ def test_json_with_no_urls_produces_no_output(
     assert captured.out == ""
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_json_filtered_urls_not_in_output(
-    _mock_client_sleep,
-    _mock_workflow_sleep,
+    instant_sleep,
     cli_args,
     mock_credentials,
     requests_mock,
@@ -639,11 +671,8 @@ def test_json_filtered_urls_not_in_output(
     assert record["url"] == "http://valid.com"
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.clients.time.sleep")
 def test_json_with_log_to_file(
-    _mock_client_sleep,
-    _mock_workflow_sleep,
+    instant_sleep,
     cli_args,
     mock_credentials,
     requests_mock,
@@ -697,3 +726,352 @@ def test_json_with_log_to_file(
 
     log_contents = log_file.read_text()
     assert url_to_archive in log_contents
+
+
+# --- Tests for --async ---
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.run_archive_workflow")
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow_async",
+    new_callable=mock.AsyncMock,
+    return_value=(1, 0),
+)
+def test_async_flag_uses_async_engine(
+    mock_async_workflow, mock_workflow, mock_sitemaps, cli_args, mock_credentials
+):
+    """Verify that --async runs the asyncio engine instead of the blocking loop."""
+    cli_args(["archiver", "--async", "http://test.com"])
+    main()
+
+    mock_workflow.assert_not_called()
+    mock_async_workflow.assert_awaited_once()
+    assert list(mock_async_workflow.call_args[0][1]) == ["http://test.com"]
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(1, 0)
+)
+def test_main_passes_shared_rate_limiter(
+    mock_workflow, mock_sitemaps, cli_args, mock_credentials
+):
+    """Verify main() builds one RateLimiter from --rate-limit-wait and --rate-limit-burst."""
+    cli_args(
+        [
+            "archiver",
+            "http://test.com",
+            "--rate-limit-wait",
+            "12",
+            "--rate-limit-burst",
+            "3",
+        ]
+    )
+    main()
+
+    limiter = mock_workflow.call_args[1]["rate_limiter"]
+    assert limiter.interval == 12
+    assert limiter.burst == 3
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(1, 0)
+)
+def test_main_caps_rate_limit_burst(
+    mock_workflow, mock_sitemaps, cli_args, mock_credentials
+):
+    """Verify a large --rate-limit-burst is lowered so the minimum wait holds."""
+    cli_args(["archiver", "http://test.com", "--rate-limit-burst", "100"])
+    main()
+
+    assert mock_workflow.call_args[1]["rate_limiter"].burst == 3
+
+
+@pytest.mark.parametrize("burst", ["0", "-2"])
+def test_main_rejects_non_positive_rate_limit_burst(burst, cli_args, mock_credentials):
+    cli_args(["archiver", "http://test.com", "--rate-limit-burst", burst])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+@pytest.mark.parametrize("limit", ["0", "-5"])
+def test_main_rejects_non_positive_max_pending_jobs(limit, cli_args, mock_credentials):
+    cli_args(["archiver", "http://test.com", "--max-pending-jobs", limit])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+def test_main_rejects_a_negative_host_min_interval(cli_args, mock_credentials):
+    cli_args(["archiver", "http://test.com", "--host-min-interval", "-1"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+# --- Tests for --journal / --resume ---
+
+
+def _consuming_workflow(captured):
+    """A stand-in workflow that consumes its URLs while main() is still running."""
+
+    def workflow(client, urls, *args, **kwargs):
+        captured.extend(urls)
+        return 1, 0
+
+    return workflow
+
+
+def test_resume_requires_journal(cli_args, mock_credentials):
+    """Verify --resume without --journal is rejected by the parser."""
+    cli_args(["archiver", "--resume", "http://test.com"])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.run_archive_workflow")
+def test_resume_skips_finished_urls_and_adds_new_ones(
+    mock_workflow, mock_sitemaps, cli_args, mock_credentials, tmp_path
+):
+    """Verify a resumed run only submits queued and newly given URLs."""
+    journal_path = str(tmp_path / "run.db")
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://done.com", "http://queued.com"])
+        journal.record_result(
+            ArchiveResult("http://done.com", "success", "https://web", None, "job-1")
+        )
+
+    passed_urls = []
+    mock_workflow.side_effect = _consuming_workflow(passed_urls)
+    cli_args(["archiver", "--journal", journal_path, "--resume", "http://new.com"])
+    main()
+
+    assert passed_urls == ["http://queued.com", "http://new.com"]
+    assert mock_workflow.call_args[1]["journal"] is not None
+
+
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_urls", return_value=set())
+@mock.patch("wayback_machine_archiver.archiver.run_archive_workflow")
+def test_journal_without_resume_starts_fresh(
+    mock_workflow, mock_sitemaps, cli_args, mock_credentials, tmp_path
+):
+    """Verify --journal alone discards the previous run's state."""
+    journal_path = str(tmp_path / "run.db")
+    with RunJournal(journal_path) as journal:
+        journal.record_queued(["http://old.com"])
+
+    passed_urls = []
+    mock_workflow.side_effect = _consuming_workflow(passed_urls)
+    cli_args(["archiver", "--journal", journal_path, "http://new.com"])
+    main()
+
+    assert passed_urls == ["http://new.com"]
+
+
+@mock.patch(
+    "wayback_machine_archiver.archiver.discover_sitemaps",
+    return_value=["https://example.com/sitemap.xml"],
+)
+@mock.patch(
+    "wayback_machine_archiver.archiver.iter_sitemap_urls",
+    return_value={EXTRACTED_PAGE_URL},
+)
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
+)
+def test_discovered_sitemaps_are_processed(
+    mock_workflow, mock_sitemaps, mock_discover, cli_args, mock_credentials
+):
+    """Verify sitemaps found by --discover-sitemaps are read like --sitemaps."""
+    cli_args(
+        [
+            "archiver",
+            "--sitemaps",
+            "https://other.example/sitemap.xml",
+            "--discover-sitemaps",
+            "example.com",
+        ]
+    )
+    main()
+
+    assert mock_discover.call_args[0][0] == ["example.com"]
+    assert mock_sitemaps.call_args[0][0] == [
+        "https://other.example/sitemap.xml",
+        "https://example.com/sitemap.xml",
+    ]
+    assert set(mock_workflow.call_args[0][1]) == {EXTRACTED_PAGE_URL}
+
+
+@pytest.mark.parametrize(
+    "extra,expected", [([], SITEMAP_MAX_BYTES), (["--sitemap-max-bytes", "1000"], 1000)]
+)
+@mock.patch(
+    "wayback_machine_archiver.archiver.iter_sitemap_urls",
+    return_value={EXTRACTED_PAGE_URL},
+)
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
+)
+def test_sitemap_max_bytes_reaches_the_sitemap_reader(
+    mock_workflow, mock_sitemaps, extra, expected, cli_args, mock_credentials
+):
+    """Verify --sitemap-max-bytes is the limit sitemaps are read with."""
+    cli_args(["archiver", "--sitemaps", "https://example.com/sitemap.xml"] + extra)
+    main()
+
+    assert mock_sitemaps.call_args.kwargs["max_bytes"] == expected
+    assert set(mock_workflow.call_args[0][1]) == {EXTRACTED_PAGE_URL}
+
+
+@pytest.mark.parametrize("limit", ["0", "-1"])
+def test_main_rejects_non_positive_sitemap_max_bytes(limit, cli_args, mock_credentials):
+    cli_args(["archiver", "--sitemaps", "s.xml", "--sitemap-max-bytes", limit])
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+# --- Tests for --shard-index/--shard-count ---
+
+
+@mock.patch(
+    "wayback_machine_archiver.archiver.run_archive_workflow", return_value=(0, 0)
+)
+def test_shards_split_urls_without_overlap(mock_workflow, cli_args, mock_credentials):
+    """Verify every URL is archived by exactly one shard, even in random order."""
+    urls = [f"https://example.com/{n}" for n in range(20)]
+    archived = []
+    for index in range(3):
+        cli_args(
+            ["archiver", "--shard-index", str(index), "--shard-count", "3"]
+            + ["--random-order"] * (index == 1)
+            + urls
+        )
+        main()
+        archived += list(mock_workflow.call_args[0][1])
+
+    assert sorted(archived) == sorted(urls)
+
+
+@pytest.mark.parametrize(
+    "shard_args",
+    [["--shard-index", "0"], ["--shard-index", "3", "--shard-count", "3"]],
+)
+def test_invalid_shard_arguments_are_rejected(shard_args, cli_args, mock_credentials):
+    cli_args(["archiver", "http://a.com"] + shard_args)
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+# --- Tests for --shared-queue ---
+
+
+def test_workers_drain_a_shared_queue(cli_args, mock_credentials, tmp_path):
+    """Verify a second worker given the same inputs only gets what is left."""
+    queue_path = str(tmp_path / "queue.db")
+    urls = [f"https://example.com/{n}" for n in range(3)]
+    archived = []
+
+    def archive_first(client, urls_to_process, *args, on_result, **kwargs):
+        url = next(iter(urls_to_process))
+        archived.append(url)
+        on_result(ArchiveResult(url, "success", "archive-url", None, "job"))
+        return 1, 0
+
+    with mock.patch(
+        "wayback_machine_archiver.archiver.run_archive_workflow",
+        side_effect=archive_first,
+    ):
+        for worker in ("a", "b"):
+            cli_args(
+                ["archiver", "--shared-queue", queue_path, "--worker-id", worker] + urls
+            )
+            main()
+
+    assert archived == urls[:2]
+    queue = SQLiteSharedQueue(queue_path, "c")
+    assert queue.counts() == {"queued": 1, "leased": 0, "done": 2}
+    queue.close()
+
+
+# --- Tests for serve ---
+
+
+def test_serve_listens_with_the_given_options(cli_args, mock_credentials):
+    """Verify `archiver serve` starts the server and seeds it with the inputs."""
+    cli_args(
+        ["archiver", "serve", "--port", "9000", "--max-queue", "50", "http://a.com"]
+    )
+    with (
+        mock.patch(
+            "wayback_machine_archiver.archiver.ArchiveServer.serve",
+            new_callable=mock.AsyncMock,
+            return_value=(1, 0),
+        ) as mock_serve,
+        mock.patch(
+            "wayback_machine_archiver.archiver.ArchiveServer.__init__",
+            return_value=None,
+        ) as mock_init,
+    ):
+        main()
+
+    host, port, unix_socket, urls = mock_serve.call_args[0]
+    assert (host, port, unix_socket) == ("127.0.0.1", 9000, None)
+    assert list(urls) == ["http://a.com"]
+    assert mock_init.call_args[1]["max_queue"] == 50
+
+
+@pytest.mark.parametrize(
+    "extra", [["--journal", "run.db"], ["--shared-queue", "q.db"], ["--random-order"]]
+)
+def test_serve_rejects_batch_only_options(extra, cli_args, mock_credentials):
+    cli_args(["archiver", "serve"] + extra)
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
+
+
+def test_serve_may_follow_options(cli_args, mock_credentials):
+    """Verify serve is recognized after options and before URLs."""
+    cli_args(
+        ["archiver", "--port", "9000", "serve", "--max-queue", "50", "http://a.com"]
+    )
+    with (
+        mock.patch(
+            "wayback_machine_archiver.archiver.ArchiveServer.serve",
+            new_callable=mock.AsyncMock,
+            return_value=(1, 0),
+        ) as mock_serve,
+        mock.patch(
+            "wayback_machine_archiver.archiver.ArchiveServer.__init__",
+            return_value=None,
+        ) as mock_init,
+    ):
+        main()
+
+    _, port, _, urls = mock_serve.call_args[0]
+    assert port == 9000
+    assert list(urls) == ["http://a.com"]
+    assert mock_init.call_args[1]["max_queue"] == 50
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        ["--port", "9000"],
+        ["--bind", "0.0.0.0"],
+        ["--unix-socket", "a.sock"],
+        ["--max-queue", "5"],
+    ],
+)
+def test_server_options_are_rejected_without_serve(extra, cli_args, mock_credentials):
+    cli_args(["archiver", "http://a.com"] + extra)
+    with pytest.raises(SystemExit) as e:
+        main()
+    assert e.value.code == 2
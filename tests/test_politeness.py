@@ -0,0 +1,64 @@
+"""Tests for the per-host HostPoliteness intervals."""
+
+import pytest
+
+from wayback_machine_archiver.politeness import (
+    MAX_HOST_INTERVAL_SEC,
+    THROTTLED_HOST_INTERVAL_SEC,
+    HostPoliteness,
+    url_host,
+)
+
+
+def test_url_host_is_lower_cased():
+    assert url_host("https://Example.COM:8080/page") == "example.com"
+    assert url_host("not a url") == ""
+
+
+def test_hosts_are_always_ready_without_a_min_interval(clock):
+    politeness = HostPoliteness(clock=clock)
+
+    politeness.record_submission("https://a.com/1")
+
+    assert politeness.is_ready("a.com")
+
+
+def test_min_interval_spaces_submissions_to_the_same_host(clock):
+    politeness = HostPoliteness(10, clock=clock)
+
+    politeness.record_submission("https://a.com/1")
+
+    assert not politeness.is_ready("a.com")
+    assert politeness.is_ready("b.com")
+    assert politeness.seconds_until_ready("a.com") == pytest.approx(10)
+
+    clock.now += 10
+    assert politeness.is_ready("a.com")
+
+
+def test_throttling_widens_the_interval_up_to_the_maximum(clock):
+    politeness = HostPoliteness(5, clock=clock)
+
+    politeness.record_throttled("https://a.com/1")
+    assert politeness.interval("a.com") == THROTTLED_HOST_INTERVAL_SEC
+    assert politeness.seconds_until_ready("a.com") == THROTTLED_HOST_INTERVAL_SEC
+
+    politeness.record_throttled("https://a.com/2")
+    assert politeness.interval("a.com") == THROTTLED_HOST_INTERVAL_SEC * 2
+
+    for _ in range(10):
+        politeness.record_throttled("https://a.com/3")
+    assert politeness.interval("a.com") == MAX_HOST_INTERVAL_SEC
+    assert politeness.interval("b.com") == 5
+
+
+def test_successes_narrow_the_interval_back_to_the_minimum(clock):
+    politeness = HostPoliteness(5, clock=clock)
+    politeness.record_throttled("https://a.com/1")
+
+    politeness.record_success("https://a.com/2")
+    assert politeness.interval("a.com") == THROTTLED_HOST_INTERVAL_SEC / 2
+
+    for _ in range(10):
+        politeness.record_success("https://a.com/2")
+    assert politeness.interval("a.com") == 5
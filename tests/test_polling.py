@@ -0,0 +1,104 @@
+"""Tests for the heap-based PollScheduler."""
+
+import pytest
+
+from wayback_machine_archiver.polling import (
+    COALESCE_WINDOW_SEC,
+    INITIAL_CAPTURE_ESTIMATE_SEC,
+    PollScheduler,
+)
+
+
+def test_new_job_is_first_due_after_capture_estimate(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.schedule("job-1")
+
+    assert scheduler.pop_due() == []
+    assert scheduler.seconds_until_next() == pytest.approx(INITIAL_CAPTURE_ESTIMATE_SEC)
+
+    clock.now += INITIAL_CAPTURE_ESTIMATE_SEC
+    assert scheduler.pop_due() == ["job-1"]
+    assert len(scheduler) == 0
+
+
+def test_only_due_jobs_are_popped(clock):
+    """A job submitted later is not included in an earlier job's poll."""
+    scheduler = PollScheduler(clock=clock)
+    scheduler.schedule("old")
+    clock.now += 10
+    scheduler.schedule("young")
+
+    clock.now += INITIAL_CAPTURE_ESTIMATE_SEC - 10
+    assert scheduler.pop_due() == ["old"]
+    assert "young" in scheduler
+
+
+def test_jobs_due_within_coalescing_window_share_a_poll(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.schedule("a")
+    clock.now += COALESCE_WINDOW_SEC / 2
+    scheduler.schedule("b")
+
+    clock.now += INITIAL_CAPTURE_ESTIMATE_SEC - COALESCE_WINDOW_SEC / 2
+    assert scheduler.pop_due() == ["a", "b"]
+
+
+def test_rescheduling_backs_off_with_job_age(clock):
+    scheduler = PollScheduler(min_interval=5, max_interval=60, clock=clock)
+    scheduler.schedule("job-1")
+    clock.now += 40
+    scheduler.pop_due()
+
+    scheduler.reschedule("job-1")
+    assert scheduler.seconds_until_next() == pytest.approx(20)
+
+    clock.now += 200
+    scheduler.pop_due()
+    scheduler.reschedule("job-1")
+    assert scheduler.seconds_until_next() == pytest.approx(60), "capped at max"
+
+
+def test_successful_captures_update_the_estimate(clock):
+    """Observed capture durations move the first-check delay for new jobs."""
+    scheduler = PollScheduler(min_interval=1, max_interval=120, clock=clock)
+    for i in range(20):
+        scheduler.schedule(f"job-{i}")
+        clock.now += 40
+        scheduler.complete(f"job-{i}", succeeded=True)
+
+    assert scheduler.capture_estimate == pytest.approx(40, abs=1)
+
+    scheduler.schedule("new-job")
+    assert scheduler.seconds_until_next() == pytest.approx(scheduler.capture_estimate)
+
+
+def test_failed_captures_do_not_update_the_estimate(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.schedule("job-1")
+    clock.now += 1
+    scheduler.complete("job-1", succeeded=False)
+
+    assert scheduler.capture_estimate == INITIAL_CAPTURE_ESTIMATE_SEC
+
+
+def test_after_poll_reschedules_pending_and_retires_finished(clock):
+    scheduler = PollScheduler(clock=clock)
+    scheduler.schedule("pending")
+    scheduler.schedule("done")
+    clock.now += INITIAL_CAPTURE_ESTIMATE_SEC
+    checked = scheduler.pop_due()
+
+    scheduler.after_poll(checked, still_pending={"pending"}, succeeded={"done"})
+
+    assert "pending" in scheduler
+    assert "done" not in scheduler
+    assert len(scheduler) == 1
+
+
+def test_seconds_until_next_is_none_when_empty(clock):
+    scheduler = PollScheduler(clock=clock)
+    assert scheduler.seconds_until_next() is None
+
+    scheduler.schedule("job-1")
+    scheduler.clear()
+    assert scheduler.seconds_until_next() is None
@@ -1,11 +1,21 @@
 """Tests for sitemaps.process_sitemaps orchestration function."""
 
+import gzip
+import io
 import logging
+import re
+import threading
+import time
 
 import pytest
 import requests
 
-from wayback_machine_archiver.sitemaps import LOCAL_PREFIX, process_sitemaps
+from wayback_machine_archiver import sitemaps
+from wayback_machine_archiver.sitemaps import (
+    LOCAL_PREFIX,
+    iter_sitemap_urls,
+    process_sitemaps,
+)
 
 # Test data
 VALID_SITEMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
@@ -15,6 +25,12 @@ VALID_SITEMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
 </urlset>
 """
 
+OTHER_SITEMAP_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+    <url><loc>https://other.com/page3</loc></url>
+</urlset>
+"""
+
 INVALID_XML = "not valid xml at all <><><>"
 
 
@@ -70,6 +86,25 @@ def test_process_sitemaps_combines_multiple_sources(requests_mock, session, tmp_
     }
 
 
+def test_process_sitemaps_decompresses_gzipped_sitemaps(
+    requests_mock, session, tmp_path
+):
+    """Verify gzipped sitemaps are detected by their content and decompressed."""
+    compressed = gzip.compress(VALID_SITEMAP_XML.encode())
+    remote_url = "https://example.com/sitemap.xml.gz"
+    requests_mock.get(remote_url, content=compressed)
+    file = tmp_path / "sitemap.xml.gz"
+    file.write_bytes(gzip.compress(OTHER_SITEMAP_XML.encode()))
+
+    result = process_sitemaps([remote_url, f"{LOCAL_PREFIX}{file}"], session)
+
+    assert result == {
+        "https://example.com/page1",
+        "https://example.com/page2",
+        "https://other.com/page3",
+    }
+
+
 def test_process_sitemaps_handles_xml_parse_error(requests_mock, session, caplog):
     """Verify that XML parse errors are caught, logged, and processing continues."""
     url = "https://example.com/bad-sitemap.xml"
@@ -153,3 +188,266 @@ def test_process_sitemaps_respects_depth_limit(requests_mock, session, caplog):
 
     assert result == set()
     assert "depth limit" in caplog.text
+
+
+@pytest.fixture
+def fetch_sitemap(monkeypatch):
+    """
+    Serves sitemaps from a dict of url -> callable returning bytes, bypassing
+    requests_mock, which only lets one request through at a time.
+    """
+    sitemaps = {}
+    monkeypatch.setattr(
+        "wayback_machine_archiver.sitemaps.open_sitemap",
+        lambda url, session, *args: io.BytesIO(sitemaps[url]()),
+    )
+    return sitemaps
+
+
+def test_iter_sitemap_urls_yields_sitemaps_as_they_finish(fetch_sitemap, session):
+    """Verify a slow sitemap does not hold back the URLs of one that finished first."""
+    release = threading.Event()
+
+    def slow_sitemap():
+        release.wait(5)
+        return VALID_SITEMAP_XML.encode()
+
+    fetch_sitemap["https://example.com/sitemap.xml"] = slow_sitemap
+    fetch_sitemap["https://other.com/sitemap.xml"] = OTHER_SITEMAP_XML.encode
+
+    urls = iter_sitemap_urls(list(fetch_sitemap), session)
+    assert next(urls) == "https://other.com/page3"
+
+    release.set()
+    assert sorted(urls) == ["https://example.com/page1", "https://example.com/page2"]
+
+
+def test_large_sitemap_is_yielded_while_it_is_still_downloading(monkeypatch, session):
+    """Verify a sitemap's pages reach the caller in batches, not once it is whole."""
+    monkeypatch.setattr("wayback_machine_archiver.sitemaps.SITEMAP_PAGE_BATCH", 2)
+    release = threading.Event()
+    locs = "".join(
+        f"<url><loc>https://example.com/page{i}</loc></url>" for i in range(3)
+    )
+
+    class StallingBody(io.RawIOBase):
+        chunks = [
+            f"""<?xml version="1.0" encoding="UTF-8"?>
+            <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}""",
+            "<url><loc>https://example.com/late</loc></url></urlset>",
+        ]
+
+        def readable(self):
+            return True
+
+        def readinto(self, buffer):
+            if not self.chunks:
+                return 0
+            if len(self.chunks) == 1:
+                release.wait(5)
+            data = self.chunks.pop(0).encode()
+            buffer[: len(data)] = data
+            return len(data)
+
+    monkeypatch.setattr(
+        "wayback_machine_archiver.sitemaps.open_sitemap",
+        lambda url, session, *args: StallingBody(),
+    )
+
+    urls = iter_sitemap_urls(["https://example.com/sitemap.xml"], session)
+    assert [next(urls), next(urls)] == [
+        "https://example.com/page0",
+        "https://example.com/page1",
+    ]
+    assert len(StallingBody.chunks) == 1, "The end of the sitemap was not read yet"
+
+    release.set()
+    assert list(urls) == ["https://example.com/page2", "https://example.com/late"]
+
+
+def _index_of(child_urls):
+    locs = "".join(f"<sitemap><loc>{url}</loc></sitemap>" for url in child_urls)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>
+    """.encode()
+
+
+def test_iter_sitemap_urls_fetches_index_children_concurrently(fetch_sitemap, session):
+    """Verify the children of a sitemap index are downloaded at the same time."""
+    index_url = "https://example.com/sitemap_index.xml"
+    child_urls = [f"https://example.com/sitemap{i}.xml" for i in range(3)]
+    all_children_started = threading.Barrier(len(child_urls), timeout=5)
+
+    def child_sitemap():
+        all_children_started.wait()
+        return VALID_SITEMAP_XML.encode()
+
+    fetch_sitemap[index_url] = lambda: _index_of(child_urls)
+    for url in child_urls:
+        fetch_sitemap[url] = child_sitemap
+
+    result = list(iter_sitemap_urls([index_url], session))
+
+    assert len(result) == 6
+
+
+def test_iter_sitemap_urls_limits_fetches_per_host(fetch_sitemap, session):
+    """Verify no more than per_host sitemaps are downloaded from one host at once."""
+    lock = threading.Lock()
+    active = [0]
+    most_active = [0]
+
+    def sitemap():
+        with lock:
+            active[0] += 1
+            most_active[0] = max(most_active[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return VALID_SITEMAP_XML.encode()
+
+    for i in range(4):
+        fetch_sitemap[f"https://example.com/sitemap{i}.xml"] = sitemap
+
+    list(iter_sitemap_urls(list(fetch_sitemap), session, max_workers=4, per_host=2))
+
+    assert most_active[0] <= 2
+
+
+def test_sitemap_referenced_twice_is_fetched_once(requests_mock, session):
+    """Verify a child listed by two indexes, spelled differently, is downloaded once."""
+    child_url = "https://example.com/sitemap1.xml"
+    requests_mock.get("https://example.com/index1.xml", content=_index_of([child_url]))
+    requests_mock.get(
+        "https://example.com/index2.xml",
+        content=_index_of(["HTTPS://Example.com:443/sitemap1.xml#top"]),
+    )
+    # Whichever index finishes first decides which spelling is fetched.
+    requests_mock.get(
+        re.compile(r".*/sitemap1\.xml"), content=VALID_SITEMAP_XML.encode()
+    )
+
+    result = process_sitemaps(
+        ["https://example.com/index1.xml", "https://example.com/index2.xml"], session
+    )
+
+    assert result == {"https://example.com/page1", "https://example.com/page2"}
+    assert requests_mock.call_count == 3
+
+
+def test_self_referencing_index_is_reported_not_followed(
+    requests_mock, session, caplog
+):
+    """Verify an index that lists itself is fetched once and reported as a cycle."""
+    index_url = "https://example.com/sitemap_index.xml"
+    child_url = "https://example.com/sitemap1.xml"
+    requests_mock.get(index_url, content=_index_of([index_url, child_url]))
+    requests_mock.get(child_url, content=VALID_SITEMAP_XML.encode())
+
+    with caplog.at_level(logging.WARNING):
+        result = process_sitemaps([index_url], session)
+
+    assert result == {"https://example.com/page1", "https://example.com/page2"}
+    assert requests_mock.call_count == 2
+    assert "refers back to" in caplog.text
+
+
+def test_sitemap_over_max_bytes_is_skipped(requests_mock, session, caplog):
+    """Verify a body past the limit is abandoned, even if it was small on the wire."""
+    big_url = "https://example.com/big.xml.gz"
+    good_url = "https://other.com/sitemap.xml"
+    requests_mock.get(big_url, content=gzip.compress(VALID_SITEMAP_XML.encode() * 10))
+    requests_mock.get(good_url, content=OTHER_SITEMAP_XML.encode())
+
+    with caplog.at_level(logging.ERROR):
+        result = set(
+            iter_sitemap_urls(
+                [big_url, good_url], session, max_bytes=len(VALID_SITEMAP_XML) * 2
+            )
+        )
+
+    assert result == {"https://other.com/page3"}
+    assert "larger than" in caplog.text
+
+
+def test_sitemap_with_large_content_length_is_not_read(requests_mock, session):
+    """Verify a Content-Length over the limit aborts before the body is parsed."""
+    from wayback_machine_archiver.sitemaps import SitemapTooLargeError, open_sitemap
+
+    url = "https://example.com/sitemap.xml"
+    requests_mock.get(
+        url,
+        content=VALID_SITEMAP_XML.encode(),
+        headers={"Content-Length": str(10**9)},
+    )
+
+    with pytest.raises(SitemapTooLargeError):
+        with open_sitemap(url, session, max_bytes=10**6):
+            pass
+
+
+def _write_sitemaps(directory, count):
+    for i in range(count):
+        xml = f"""<?xml version="1.0" encoding="UTF-8"?>
+        <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+            <url><loc>https://example.com/page{i}</loc></url>
+        </urlset>
+        """.encode()
+        if i % 2:
+            (directory / f"sitemap{i}.xml.gz").write_bytes(gzip.compress(xml))
+        else:
+            (directory / f"sitemap{i}.xml").write_bytes(xml)
+
+
+def test_local_sitemap_directory_is_parsed_in_worker_processes(session, tmp_path):
+    """Verify every *.xml and *.xml.gz file in a local directory is read."""
+    _write_sitemaps(tmp_path, 6)
+    (tmp_path / "empty.xml").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("not a sitemap")
+
+    result = set(
+        iter_sitemap_urls([f"{LOCAL_PREFIX}{tmp_path}"], session, file_workers=2)
+    )
+
+    assert result == {f"https://example.com/page{i}" for i in range(6)}
+
+
+def test_local_sitemap_workers_are_not_forked(monkeypatch, session, tmp_path):
+    """Verify the worker processes are not forked from the threaded caller."""
+    _write_sitemaps(tmp_path, 2)
+    real_pool = sitemaps.ProcessPoolExecutor
+    start_methods = []
+
+    def recording_pool(*args, mp_context=None, **kwargs):
+        start_methods.append(mp_context and mp_context.get_start_method())
+        return real_pool(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(sitemaps, "ProcessPoolExecutor", recording_pool)
+
+    result = set(iter_sitemap_urls([f"{LOCAL_PREFIX}{tmp_path}"], session))
+
+    assert result == {f"https://example.com/page{i}" for i in range(2)}
+    assert start_methods in (["forkserver"], ["spawn"])
+
+
+def test_local_sitemap_glob(session, tmp_path):
+    """Verify a glob pattern selects which local sitemaps are read."""
+    _write_sitemaps(tmp_path, 4)
+
+    result = set(
+        iter_sitemap_urls([f"{LOCAL_PREFIX}{tmp_path}/sitemap[01].xml*"], session)
+    )
+
+    assert result == {"https://example.com/page0", "https://example.com/page1"}
+
+
+def test_local_sitemap_glob_counts_only_files(session, tmp_path, caplog):
+    """Verify directories matched by a glob are neither read nor counted."""
+    _write_sitemaps(tmp_path, 2)
+    (tmp_path / "archive.xml").mkdir()
+
+    with caplog.at_level(logging.INFO):
+        result = set(iter_sitemap_urls([f"{LOCAL_PREFIX}{tmp_path}/*.xml*"], session))
+
+    assert result == {"https://example.com/page0", "https://example.com/page1"}
+    assert "Found 2 local sitemaps" in caplog.text
@@ -0,0 +1,89 @@
+"""Tests for the token-bucket RateLimiter."""
+
+import asyncio
+from unittest import mock
+
+import pytest
+
+from wayback_machine_archiver.ratelimit import RateLimiter
+
+
+def test_first_submission_does_not_wait(clock):
+    """The bucket starts full, so the first submission goes out immediately."""
+    limiter = RateLimiter(9, clock=clock)
+    assert limiter.delay() == 0
+    assert limiter.reserve() == 0
+
+
+def test_wait_only_covers_the_remainder_of_the_interval(clock):
+    """Time already spent since the last submission counts toward the interval."""
+    limiter = RateLimiter(9, clock=clock)
+
+    limiter.reserve()
+    clock.now += 4  # e.g. request latency plus a status poll
+    assert limiter.reserve() == pytest.approx(5)
+
+
+def test_consecutive_reservations_are_spaced_by_interval(clock):
+    """Reservations taken back to back are scheduled one interval apart."""
+    limiter = RateLimiter(9, clock=clock)
+
+    waits = [limiter.reserve() for _ in range(4)]
+
+    assert waits == pytest.approx([0, 9, 18, 27])
+
+
+def test_burst_allows_back_to_back_submissions(clock):
+    """Up to `burst` submissions go out without waiting, then spacing applies."""
+    limiter = RateLimiter(10, burst=3, clock=clock)
+
+    waits = [limiter.reserve() for _ in range(5)]
+
+    assert waits == pytest.approx([0, 0, 0, 10, 20])
+
+
+def test_idle_time_refills_the_bucket_only_up_to_burst(clock):
+    """A long idle period does not bank more than `burst` submissions."""
+    limiter = RateLimiter(10, burst=2, clock=clock)
+    limiter.reserve()
+
+    clock.now += 3600
+    waits = [limiter.reserve() for _ in range(3)]
+
+    assert waits == pytest.approx([0, 0, 10])
+
+
+def test_delay_does_not_consume_a_slot(clock):
+    """delay() reports the wait without taking the slot."""
+    limiter = RateLimiter(9, clock=clock)
+    limiter.reserve()
+    clock.now += 2
+
+    assert limiter.delay() == pytest.approx(7)
+    assert limiter.delay() == pytest.approx(7)
+    assert limiter.reserve() == pytest.approx(7)
+
+
+@mock.patch("wayback_machine_archiver.ratelimit.time.sleep")
+def test_acquire_sleeps_for_the_reserved_wait(mock_sleep, clock):
+    """acquire() blocks only when a wait is needed."""
+    limiter = RateLimiter(9, clock=clock)
+
+    limiter.acquire()
+    limiter.acquire()
+
+    mock_sleep.assert_called_once_with(pytest.approx(9))
+
+
+def test_acquire_async_awaits_the_reserved_wait(clock):
+    """acquire_async() waits on the event loop instead of blocking."""
+    limiter = RateLimiter(9, clock=clock)
+
+    with mock.patch(
+        "wayback_machine_archiver.ratelimit.asyncio.sleep",
+        new_callable=mock.AsyncMock,
+    ) as mock_sleep:
+        asyncio.run(limiter.acquire_async())
+        asyncio.run(limiter.acquire_async())
+
+    mock_sleep.assert_awaited_once_with(pytest.approx(9))
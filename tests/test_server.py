@@ -0,0 +1,224 @@
+"""Tests for the `archiver serve` HTTP endpoint in server.py."""
+
+import asyncio
+import json
+
+import pytest
+
+from wayback_machine_archiver.concurrency import ConcurrencyController
+from wayback_machine_archiver.polling import PollScheduler
+from wayback_machine_archiver.ratelimit import RateLimiter
+from wayback_machine_archiver.server import RETRY_AFTER_SEC, ArchiveServer
+
+
+class FakeAsyncClient:
+    """
+    Stand-in for AsyncSPN2Client whose captures all succeed. While `gate` is
+    set and not yet opened, submissions wait on it.
+    """
+
+    def __init__(self, gate=None):
+        self.gate = gate
+        self.submitted: list[str] = []
+
+    async def submit_capture(self, url, rate_limiter=None, api_params=None):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.submitted.append(url)
+        return f"job-{len(self.submitted)}"
+
+    async def check_status_batch(self, job_ids):
+        await asyncio.sleep(0)
+        return [
+            {"job_id": job_id, "status": "success", "timestamp": "20250101"}
+            for job_id in job_ids
+        ]
+
+
+def _server(client, **kwargs):
+    return ArchiveServer(
+        client,
+        {},
+        rate_limiter=RateLimiter(0),
+        concurrency=ConcurrencyController(kwargs.pop("window", 10)),
+        scheduler=PollScheduler(min_interval=0, max_interval=0),
+        **kwargs,
+    )
+
+
+async def _request(server, method, path, body=b"", unix_socket=None):
+    """Sends one request and returns the status, headers and body of the response."""
+    if unix_socket is not None:
+        reader, writer = await asyncio.open_unix_connection(unix_socket)
+    else:
+        port = server.listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode()
+        + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = dict(line.split(": ", 1) for line in header_lines)
+    return int(status_line.split()[1]), headers, payload
+
+
+def test_posted_urls_stream_back_one_result_each():
+    urls = [f"https://example.com/{n}" for n in range(3)]
+    reported = []
+
+    async def scenario():
+        server = _server(FakeAsyncClient(), on_result=reported.append)
+        await server.start(port=0)
+        status, headers, payload = await _request(
+            server, "POST", "/urls", "\n".join(urls + urls[:1]).encode()
+        )
+        return status, headers, payload, await server.stop()
+
+    status, headers, payload, counts = asyncio.run(scenario())
+
+    assert status == 200
+    assert headers["Content-Type"] == "application/x-ndjson"
+    records = [json.loads(line) for line in payload.splitlines()]
+    assert sorted(r["url"] for r in records) == urls
+    assert {r["status"] for r in records} == {"success"}
+    assert sorted(r.url for r in reported) == urls
+    assert counts == (3, 0)
+
+
+def test_posting_without_waiting_answers_once_queued():
+    async def scenario():
+        server = _server(FakeAsyncClient())
+        await server.start(port=0)
+        response = await _request(
+            server, "POST", "/urls?wait=0", b"https://example.com/a\n"
+        )
+        return response, await server.stop()
+
+    (status, _, payload), counts = asyncio.run(scenario())
+
+    assert status == 202
+    assert json.loads(payload) == {"accepted": 1}
+    assert counts == (1, 0)
+
+
+def test_health_reports_queue_depth_and_in_flight():
+    urls = b"\n".join(f"https://example.com/{n}".encode() for n in range(3))
+
+    async def scenario():
+        gate = asyncio.Event()
+        server = _server(FakeAsyncClient(gate), window=1)
+        await server.start(port=0)
+        await _request(server, "POST", "/urls?wait=0", urls)
+        # Let the submit loop take the first URL and block on the gate.
+        for _ in range(10):
+            await asyncio.sleep(0)
+        status, _, payload = await _request(server, "GET", "/health")
+        gate.set()
+        await server.stop()
+        return status, json.loads(payload)
+
+    status, health = asyncio.run(scenario())
+
+    assert status == 200
+    assert health["status"] == "ok"
+    assert (health["queued"], health["in_flight"]) == (2, 1)
+
+
+def test_full_queue_is_refused_with_retry_after():
+    async def scenario():
+        gate = asyncio.Event()
+        server = _server(FakeAsyncClient(gate), window=1, max_queue=2)
+        await server.start(port=0)
+        first = await _request(
+            server, "POST", "/urls?wait=0", b"https://a.com/1\nhttps://a.com/2"
+        )
+        second = await _request(
+            server, "POST", "/urls?wait=0", b"https://a.com/3\nhttps://a.com/4"
+        )
+        gate.set()
+        return first, second, await server.stop()
+
+    first, second, counts = asyncio.run(scenario())
+
+    assert first[0] == 202
+    assert second[0] == 503
+    assert second[1]["Retry-After"] == str(RETRY_AFTER_SEC)
+    assert counts == (2, 0)
+
+
+@pytest.mark.parametrize(
+    "method,path,body,expected",
+    [
+        ("POST", "/urls", b"example.com/no-scheme", 400),
+        ("POST", "/urls", b"\n", 400),
+        ("GET", "/urls", b"", 405),
+        ("POST", "/health", b"", 405),
+        ("GET", "/elsewhere", b"", 404),
+    ],
+)
+def test_bad_requests_are_refused(method, path, body, expected):
+    async def scenario():
+        server = _server(FakeAsyncClient())
+        await server.start(port=0)
+        status, _, payload = await _request(server, method, path, body)
+        await server.stop()
+        return status, json.loads(payload)
+
+    status, payload = asyncio.run(scenario())
+
+    assert status == expected
+    assert "error" in payload
+
+
+@pytest.mark.skipif(
+    not hasattr(asyncio, "start_unix_server"), reason="needs unix sockets"
+)
+def test_serves_on_a_unix_socket(tmp_path):
+    socket_path = str(tmp_path / "archiver.sock")
+
+    async def scenario():
+        server = _server(FakeAsyncClient())
+        await server.start(unix_socket=socket_path)
+        response = await _request(
+            server, "POST", "/urls", b"https://example.com/", socket_path
+        )
+        await server.stop()
+        return response
+
+    status, _, payload = asyncio.run(scenario())
+
+    assert status == 200
+    assert json.loads(payload)["url"] == "https://example.com/"
+
+
+def test_feed_queues_urls_while_keeping_under_max_queue(monkeypatch):
+    monkeypatch.setattr("wayback_machine_archiver.server.FEED_CHUNK", 5)
+    urls = [f"https://example.com/{n}" for n in range(25)]
+    queued_after_add = []
+
+    async def scenario():
+        client = FakeAsyncClient()
+        server = _server(client, max_queue=5)
+        add_urls = server.run.add_urls
+
+        async def recording_add_urls(chunk, limit=None):
+            added = await add_urls(chunk, limit)
+            queued_after_add.append(len(server.run.work_queue))
+            return added
+
+        server.run.add_urls = recording_add_urls
+        await server.start(port=0)
+        await server.feed(urls)
+        return client, await server.stop()
+
+    client, counts = asyncio.run(scenario())
+
+    assert len(queued_after_add) == 5
+    assert max(queued_after_add) <= 5
+    assert sorted(client.submitted) == sorted(urls)
+    assert counts == (25, 0)
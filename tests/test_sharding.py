@@ -0,0 +1,45 @@
+"""Tests for splitting a URL inventory into deterministic shards."""
+
+import pytest
+
+from wayback_machine_archiver.sharding import in_shard, normalize_url, shard_of
+
+URLS = [f"https://example.com/page{n}" for n in range(200)]
+
+
+@pytest.mark.parametrize(
+    "url,expected",
+    [
+        ("HTTPS://Example.COM", "https://example.com/"),
+        ("https://example.com:443/a?b=1#frag", "https://example.com/a?b=1"),
+        ("http://example.com:8080/A", "http://example.com:8080/A"),
+    ],
+)
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
+
+
+def test_shards_partition_the_inventory():
+    shards = [list(in_shard(URLS, i, 4)) for i in range(4)]
+
+    assert sorted(url for shard in shards for url in shard) == sorted(URLS)
+    assert all(shards), "every shard should get some of 200 URLs"
+
+
+def test_shards_do_not_depend_on_input_order():
+    forward = set(in_shard(URLS, 1, 3))
+    backward = set(in_shard(reversed(URLS), 1, 3))
+
+    assert forward == backward
+
+
+def test_spellings_of_one_url_share_a_shard():
+    assert shard_of("https://Example.com:443/page#top", 7) == shard_of(
+        "https://example.com/page", 7
+    )
+
+
+def test_shard_assignment_is_stable_across_releases():
+    # Changing the hash would reshuffle URLs between nodes mid-rollout.
+    shards = [shard_of(f"https://example.com/{n}", 4) for n in range(8)]
+    assert shards == [2, 0, 1, 3, 2, 1, 1, 0]
@@ -0,0 +1,196 @@
+"""Tests for the lease-based work queue shared between archiver processes."""
+
+import sqlite3
+import time
+
+import pytest
+
+from wayback_machine_archiver.ratelimit import RateLimiter
+from wayback_machine_archiver.shared_queue import (
+    RECHECK_SEC,
+    SQLiteSharedQueue,
+    drain,
+    keeping_leases,
+)
+from wayback_machine_archiver.work_queue import SourceWait
+from wayback_machine_archiver.workflow import run_archive_workflow
+
+URLS = [f"https://example.com/{n}" for n in range(5)]
+
+
+@pytest.fixture
+def open_worker(tmp_path, clock):
+    workers = []
+
+    def _open(worker_id, **kwargs):
+        kwargs.setdefault("clock", clock)
+        worker = SQLiteSharedQueue(str(tmp_path / "queue.db"), worker_id, **kwargs)
+        workers.append(worker)
+        return worker
+
+    yield _open
+    for worker in workers:
+        worker.close()
+
+
+def test_workers_claim_disjoint_urls(open_worker):
+    a, b = open_worker("a"), open_worker("b")
+    assert a.add(URLS) == 5
+
+    assert a.claim(3) == URLS[:3]
+    assert b.claim(3) == URLS[3:]
+    assert a.claim(3) == []
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(open_worker, clock, caplog):
+    a, b = open_worker("a", lease_sec=60), open_worker("b", lease_sec=60)
+    a.add(URLS[:1])
+    a.claim(1)
+
+    clock.advance(59)
+    assert b.claim(1) == []
+    clock.advance(2)
+    assert b.claim(1) == URLS[:1]
+    assert "Reclaimed 1 URLs" in caplog.text
+
+
+def test_renewed_lease_is_kept(open_worker, clock):
+    a, b = open_worker("a", lease_sec=60), open_worker("b", lease_sec=60)
+    a.add(URLS[:1])
+    a.claim(1)
+
+    clock.advance(50)
+    a.renew()
+    clock.advance(50)
+
+    assert b.claim(1) == []
+
+
+def test_completed_urls_are_recorded_and_not_claimed_again(open_worker, tmp_path):
+    a = open_worker("a")
+    a.add(URLS[:2])
+    a.claim(2)
+    a.complete(URLS[0], "success")
+    a.release()
+
+    assert a.add(URLS[:2]) == 0
+    assert a.claim(5) == [URLS[1]]
+    assert a.counts() == {"queued": 0, "leased": 1, "done": 1}
+    with sqlite3.connect(tmp_path / "queue.db") as conn:
+        row = conn.execute(
+            "SELECT status, worker FROM queue WHERE url = ?", (URLS[0],)
+        ).fetchone()
+    assert row == ("success", "a")
+
+
+def test_drain_splits_one_inventory_between_workers(open_worker):
+    a, b = open_worker("a"), open_worker("b")
+    # Both workers are given the same inputs and take turns claiming.
+    drain_a = drain(a, URLS, batch_size=2)
+    drain_b = drain(b, URLS, batch_size=2)
+    claimed = {"a": [], "b": []}
+    for name, urls in [("a", drain_a), ("b", drain_b)] * 4:
+        url = next(urls, None)
+        if url is not None:
+            claimed[name].append(url)
+            (a if name == "a" else b).complete(url, "success")
+
+    assert sorted(claimed["a"] + claimed["b"]) == sorted(URLS)
+    assert claimed["a"] and claimed["b"]
+
+
+def test_drain_waits_for_urls_leased_by_other_workers(open_worker, clock):
+    a, b = open_worker("a", lease_sec=60), open_worker("b", lease_sec=60)
+    a.add(URLS[:2])
+    a.claim(2)
+    claimed, waits = [], []
+
+    for item in drain(b):
+        if isinstance(item, SourceWait):
+            waits.append(item)
+            clock.advance(item)
+            # Worker a finishes one URL and then stops renewing its leases.
+            a.complete(URLS[0], "success")
+        else:
+            claimed.append(item)
+
+    assert claimed == [URLS[1]]
+    assert waits == [RECHECK_SEC, 60 - RECHECK_SEC]
+
+
+def test_drain_finishes_once_nothing_is_queued_or_leased(open_worker):
+    a = open_worker("a")
+    a.add(URLS[:1])
+    a.claim(1)
+
+    # This worker's own leases are not waited for.
+    assert list(drain(a)) == []
+
+
+class StatusAfterClient:
+    """
+    Fake SPN2 client whose jobs report success once `capture_sec` has passed,
+    recording when each status check was made.
+    """
+
+    def __init__(self, clock, capture_sec):
+        self.clock = clock
+        self.capture_sec = capture_sec
+        self.submitted = {}
+        self.polled_at = []
+
+    def submit_capture(self, url, rate_limiter=None, api_params=None):
+        job_id = f"job-{len(self.submitted)}"
+        self.submitted[job_id] = (url, self.clock())
+        return job_id
+
+    def check_status_batch(self, job_ids):
+        self.polled_at.append(self.clock())
+        return [
+            {"job_id": job_id, "status": "success", "timestamp": "20250101"}
+            if self.clock() - self.submitted[job_id][1] >= self.capture_sec
+            else {"job_id": job_id, "status": "pending"}
+            for job_id in job_ids
+        ]
+
+
+def test_workflow_keeps_polling_while_waiting_for_another_worker(
+    open_worker, clock, monkeypatch
+):
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(time, "sleep", clock.advance)
+    a, b = open_worker("a", lease_sec=600), open_worker("b", lease_sec=600)
+    # Worker a claims two URLs and dies without renewing its leases.
+    a.add(URLS)
+    a.claim(2)
+    client = StatusAfterClient(clock, capture_sec=120)
+    finished_at = {}
+
+    def on_result(result):
+        finished_at[result.url] = clock()
+        b.complete(result.url, result.status)
+
+    successes, failures = run_archive_workflow(
+        client, drain(b, URLS), 0, {}, on_result=on_result, rate_limiter=RateLimiter(0)
+    )
+
+    assert (successes, failures) == (5, 0)
+    assert sorted(url for url, _ in client.submitted.values()) == URLS
+    # b finished its own URLs while a's leases were live, then took a's over.
+    lease_expiry = 1000 + 600
+    assert all(finished_at[url] < lease_expiry for url in URLS[2:])
+    assert all(finished_at[url] >= lease_expiry for url in URLS[:2])
+    assert b.counts() == {"queued": 0, "leased": 0, "done": 5}
+
+
+def test_keeping_leases_renews_then_releases(open_worker):
+    a = open_worker("a", lease_sec=0.3, clock=time.time)
+    b = open_worker("b", lease_sec=0.3, clock=time.time)
+    a.add(URLS[:1])
+
+    with keeping_leases(a):
+        a.claim(1)
+        time.sleep(0.6)
+        assert b.claim(1) == []
+
+    assert a.counts()["queued"] == 1
@@ -1,10 +1,16 @@
+import asyncio
 import urllib.parse
 
 import pytest
 import requests
 from requests.adapters import HTTPAdapter
 
-from wayback_machine_archiver.clients import BATCH_STATUS_CHUNK_SIZE, SPN2Client
+from wayback_machine_archiver.clients import (
+    BATCH_STATUS_CHUNK_SIZE,
+    AsyncSPN2Client,
+    CaptureRejectedError,
+    SPN2Client,
+)
 
 
 @pytest.fixture
@@ -38,9 +44,7 @@ def test_spn2_client_submit_capture(requests_mock, session, api_params):
     )
 
     client = SPN2Client(session=session, access_key=access_key, secret_key=secret_key)
-    job_id = client.submit_capture(
-        url_to_archive, rate_limit_wait=0, api_params=api_params
-    )
+    job_id = client.submit_capture(url_to_archive, api_params=api_params)
 
     # Assertions
     assert job_id == expected_job_id
@@ -58,6 +62,31 @@ def test_spn2_client_submit_capture(requests_mock, session, api_params):
     assert request.text == expected_body
 
 
+@pytest.mark.parametrize("status_code", [200, 429])
+def test_submit_capture_raises_when_spn2_refuses_the_capture(
+    requests_mock, session, status_code
+):
+    """
+    Verify that an error response to the capture POST, such as the account's
+    session limit, raises CaptureRejectedError carrying its status_ext.
+    """
+    requests_mock.post(
+        SPN2Client.SAVE_URL,
+        json={
+            "status": "error",
+            "status_ext": "error:user-session-limit",
+            "message": "You have already reached the limit of active sessions.",
+        },
+        status_code=status_code,
+    )
+    client = SPN2Client(session=session, access_key="a", secret_key="s")
+
+    with pytest.raises(CaptureRejectedError) as excinfo:
+        client.submit_capture("https://example.com")
+
+    assert excinfo.value.status_ext == "error:user-session-limit"
+
+
 def test_check_status_batch_chunks_large_requests(requests_mock, session):
     """
     Verify that check_status_batch splits job_ids into chunks of
@@ -88,3 +117,39 @@ def test_check_status_batch_chunks_large_requests(requests_mock, session):
 
     assert len(results) == num_jobs
     assert requests_mock.call_count == 2
+
+
+def test_async_client_posts_status_chunks_and_merges_results(requests_mock, session):
+    """
+    Verify that AsyncSPN2Client splits status checks into chunks and returns
+    the combined results from every chunk.
+    """
+    num_jobs = BATCH_STATUS_CHUNK_SIZE + 3
+    job_ids = [f"job-{i}" for i in range(num_jobs)]
+
+    def status_handler(request, context):
+        requested = urllib.parse.parse_qs(request.text)["job_ids"][0].split(",")
+        return [{"job_id": job_id, "status": "pending"} for job_id in requested]
+
+    requests_mock.post(SPN2Client.STATUS_URL, json=status_handler)
+
+    client = AsyncSPN2Client(
+        SPN2Client(session=session, access_key="a", secret_key="s")
+    )
+    results = asyncio.run(client.check_status_batch(job_ids))
+
+    assert len(requests_mock.request_history) == 2
+    assert sorted(r["job_id"] for r in results) == sorted(job_ids)
+
+
+def test_async_client_submit_capture(requests_mock, session):
+    """Verify that AsyncSPN2Client.submit_capture returns the job_id."""
+    requests_mock.post(SPN2Client.SAVE_URL, json={"job_id": "job-async"})
+
+    client = AsyncSPN2Client(
+        SPN2Client(session=session, access_key="a", secret_key="s")
+    )
+    job_id = asyncio.run(client.submit_capture("https://example.com"))
+
+    assert job_id == "job-async"
+    assert requests_mock.last_request.text == "url=https%3A%2F%2Fexample.com"
@@ -6,17 +6,27 @@ from unittest import mock
 import pytest
 import requests
 
+from wayback_machine_archiver.clients import CaptureRejectedError
+from wayback_machine_archiver.polling import PollScheduler
+from wayback_machine_archiver.ratelimit import RateLimiter
+from wayback_machine_archiver.work_queue import WorkQueue
 from wayback_machine_archiver.workflow import (
     MAX_CONSECUTIVE_POLL_FAILURES,
     MAX_PENDING_JOBS,
     PERMANENT_ERROR_MESSAGES,
+    RETRY_POLICIES,
     TRANSIENT_ERROR_MESSAGES,
     ArchiveResult,
+    RetryPolicy,
     _poll_pending_jobs,
+    _seconds_until_next_event,
     _submit_next_url,
     run_archive_workflow,
 )
 
+# A limiter that never waits, for tests that do not exercise rate limiting.
+NO_WAIT = RateLimiter(0)
+
 # --- Tests for _submit_next_url ---
 
 
@@ -28,29 +38,29 @@ def test_submit_next_url_success():
     mock_client = mock.Mock()
     mock_client.submit_capture.return_value = "job-123"
 
-    urls_to_process = ["http://example.com"]
+    work_queue = WorkQueue(["http://example.com"])
     pending_jobs = {}
     # Simulate a previous failure to ensure the tracker is cleared on success
     submission_attempts = {"http://example.com": 1}
 
     _submit_next_url(
-        urls_to_process,
+        work_queue,
         mock_client,
         pending_jobs,
-        5,
+        NO_WAIT,
         submission_attempts,
         api_params={},
     )
 
     # Assertions
     mock_client.submit_capture.assert_called_once_with(
-        "http://example.com", rate_limit_wait=5, api_params={}
+        "http://example.com", rate_limiter=NO_WAIT, api_params={}
     )
     # --- Check the new data structure ---
     assert "job-123" in pending_jobs
     assert pending_jobs["job-123"]["url"] == "http://example.com"
     assert "submitted_at" in pending_jobs["job-123"]
-    assert not urls_to_process, "URL should have been consumed from the list"
+    assert work_queue.pop() is None, "URL should have been consumed from the queue"
     assert "http://example.com" not in submission_attempts, (
         "Attempts tracker should be cleared on success"
     )
@@ -58,7 +68,7 @@ def test_submit_next_url_success():
 
 def test_submit_next_url_failure_requeues_and_tracks_attempt():
     """
-    Verify that a failed submission re-queues the URL at the end of the list
+    Verify that a failed submission re-queues the URL with a backoff delay
     and increments its attempt count.
     """
     mock_client = mock.Mock()
@@ -66,25 +76,26 @@ def test_submit_next_url_failure_requeues_and_tracks_attempt():
         "API Error"
     )
 
-    urls_to_process = ["http://a.com", "http://b.com"]
+    work_queue = WorkQueue(["http://a.com", "http://b.com"])
     pending_jobs = {}
     submission_attempts = {}
 
     _submit_next_url(
-        urls_to_process,
+        work_queue,
         mock_client,
         pending_jobs,
-        5,
+        NO_WAIT,
         submission_attempts,
         api_params={},
     )
 
     # Assertions
     assert not pending_jobs, "No job should have been added on failure"
-    assert urls_to_process == [
+    assert [work_queue.pop(), work_queue.pop()] == [
         "http://b.com",
-        "http://a.com",
-    ], "Failed URL should be at the end of the list"
+        None,
+    ], "Failed URL should not be retried until its backoff has passed"
+    assert work_queue.seconds_until_ready() > 0
     assert submission_attempts == {"http://a.com": 1}, (
         "Attempt count should be incremented"
     )
@@ -99,21 +110,22 @@ def test_submit_next_url_no_job_id_requeues_with_penalty():
     mock_client = mock.Mock()
     mock_client.submit_capture.return_value = None
 
-    urls_to_process = ["http://example.com"]
+    work_queue = WorkQueue(["http://example.com"])
     pending_jobs = {}
     submission_attempts = {}
 
     _submit_next_url(
-        urls_to_process,
+        work_queue,
         mock_client,
         pending_jobs,
-        5,
+        NO_WAIT,
         submission_attempts,
         api_params={},
     )
 
     assert not pending_jobs
-    assert urls_to_process == ["http://example.com"]
+    assert len(work_queue) == 1, "URL should be waiting in the retry lane"
+    assert work_queue.seconds_until_ready() > 0
     assert submission_attempts["http://example.com"] == 1
 
 
@@ -124,16 +136,16 @@ def test_submit_next_url_gives_up_after_max_retries():
     """
     mock_client = mock.Mock()
 
-    urls_to_process = ["http://will-fail.com"]
+    work_queue = WorkQueue(["http://will-fail.com"])
     pending_jobs = {}
     # Simulate that the URL has already failed 3 times
     submission_attempts = {"http://will-fail.com": 3}
 
     _submit_next_url(
-        urls_to_process,
+        work_queue,
         mock_client,
         pending_jobs,
-        5,
+        NO_WAIT,
         submission_attempts,
         api_params={},
         max_retries=3,
@@ -142,7 +154,7 @@ def test_submit_next_url_gives_up_after_max_retries():
     # Assertions
     mock_client.submit_capture.assert_not_called()
     assert not pending_jobs
-    assert not urls_to_process, "URL should be consumed but not re-queued"
+    assert work_queue.pop() is None, "URL should be consumed but not re-queued"
     assert submission_attempts == {"http://will-fail.com": 4}, (
         "Attempt count is still updated"
     )
@@ -155,22 +167,22 @@ def test_submit_next_url_passes_api_params_to_client():
     """
     mock_client = mock.Mock()
     mock_client.submit_capture.return_value = "job-123"
-    urls_to_process = ["http://example.com"]
+    work_queue = WorkQueue(["http://example.com"])
     pending_jobs = {}
     submission_attempts = {}
     api_params = {"capture_screenshot": "1", "force_get": "1"}
 
     _submit_next_url(
-        urls_to_process,
+        work_queue,
         mock_client,
         pending_jobs,
-        0,
+        NO_WAIT,
         submission_attempts,
         api_params,
     )
 
     mock_client.submit_capture.assert_called_once_with(
-        "http://example.com", rate_limit_wait=0, api_params=api_params
+        "http://example.com", rate_limiter=NO_WAIT, api_params=api_params
     )
 
 
@@ -307,75 +319,148 @@ def test_poll_pending_jobs_handles_errors_intelligently(
     assert expected_log_snippet in log_record.message
 
 
-# --- Corrected test for run_archive_workflow dynamic polling ---
+# --- Tests for run_archive_workflow scheduled polling ---
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-@mock.patch("wayback_machine_archiver.workflow._poll_pending_jobs")
-@mock.patch("wayback_machine_archiver.workflow._submit_next_url")
-def test_run_archive_workflow_dynamic_polling_is_fast_and_correct(
-    mock_submit, mock_poll, mock_sleep
-):
+@pytest.fixture
+def instant_sleep(monkeypatch):
+    """
+    Make time.sleep return immediately while advancing time.time to match.
+    Returns the list of requested sleep durations.
+    """
+    now = [time.time()]
+    sleeps: list[float] = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+    return sleeps
+
+
+def test_run_archive_workflow_consumes_urls_lazily(instant_sleep):
     """
-    Verify that the polling wait time increases exponentially when jobs are pending
-    and the submission queue is empty, and that the test runs quickly.
+    Verify that the first URL is submitted before the source produces the
+    next one, so a slow generator (e.g. sitemap downloads) does not delay it.
     """
+    events = []
+
+    def source():
+        for i in range(3):
+            events.append(f"produced {i}")
+            yield f"http://example.com/{i}"
+
+    def submit_capture(url, **kwargs):
+        events.append(f"submitted {url[-1]}")
+        return f"job-{url[-1]}"
+
     mock_client = mock.Mock()
-    initial_urls = ["http://a.com"]
-    # Use a mutable list for the test to simulate its modification by _submit_next_url
-    urls_to_process_list = list(initial_urls)
-    rate_limit_in_sec = 0
-    api_params = {}
+    mock_client.submit_capture.side_effect = submit_capture
+    mock_client.check_status_batch.side_effect = lambda job_ids: [
+        {"status": "success", "job_id": job_id, "timestamp": "20250101"}
+        for job_id in job_ids
+    ]
 
-    # Configure mock_submit to simulate a successful submission
-    # It needs to modify the urls_to_process_list and pending_jobs_dict passed to it
-    def submit_side_effect(urls_proc, client_arg, pending_jobs_dict, *args, **kwargs):
-        url = urls_proc.pop(0)  # Remove the URL from the list
-        job_id = f"job-{url}"
-        # --- Use the new data structure ---
-        pending_jobs_dict[job_id] = {"url": url, "submitted_at": time.time()}
-        return job_id
+    success, failure = run_archive_workflow(mock_client, source(), 0, {})
 
-    mock_submit.side_effect = submit_side_effect
+    assert (success, failure) == (3, 0)
+    assert events[:3] == ["produced 0", "submitted 0", "produced 1"]
 
-    # Configure mock_poll to simulate jobs staying pending, then succeeding
-    poll_calls = 0
 
-    def poll_side_effect(client_arg, pending_jobs_dict, *args, **kwargs):
-        nonlocal poll_calls
-        poll_calls += 1
-        if poll_calls <= 3:  # Simulate pending for 3 calls
-            return [], [], []  # No success, no failure, no requeue
-        else:  # Simulate success on the 4th call
-            # --- Extract URLs from the new data structure ---
-            successful_urls = [job["url"] for job in pending_jobs_dict.values()]
-            pending_jobs_dict.clear()
-            return successful_urls, [], []
+def test_run_archive_workflow_polls_jobs_only_when_due(instant_sleep):
+    """
+    Verify that the loop sleeps until the scheduler says a pending job is due
+    instead of polling it every iteration, and backs off as the job ages.
+    """
+    mock_client = mock.Mock()
+    mock_client.submit_capture.return_value = "job-1"
+    mock_client.check_status_batch.side_effect = [
+        [{"status": "pending", "job_id": "job-1"}],
+        [{"status": "pending", "job_id": "job-1"}],
+        [{"status": "success", "job_id": "job-1", "timestamp": "20250101"}],
+    ]
 
-    mock_poll.side_effect = poll_side_effect
+    run_archive_workflow(mock_client, ["http://a.com"], 0, {})
 
-    # Call the main workflow function
-    run_archive_workflow(
-        mock_client, urls_to_process_list, rate_limit_in_sec, api_params
+    # The first check waits for the 15 s capture estimate; later checks wait
+    # half the job's age (minus the 0.2 s post-poll pause). The 0.2 s pauses
+    # that follow each status request are filtered out.
+    long_sleeps = [s for s in instant_sleep if s > 1]
+    assert long_sleeps == pytest.approx([15, 7.3, 11.05])
+    assert mock_client.check_status_batch.call_count == 3
+
+
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_poll_with_scheduler_checks_only_due_jobs(mock_sleep):
+    """Verify that only jobs the scheduler reports as due are sent to the API."""
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.return_value = [
+        {"status": "pending", "job_id": "job-due"},
+    ]
+    now = time.time()
+    pending_jobs = {
+        "job-due": {"url": "http://a.com", "submitted_at": now},
+        "job-young": {"url": "http://b.com", "submitted_at": now},
+    }
+    scheduler = mock.Mock()
+    scheduler.pop_due.return_value = ["job-due"]
+
+    _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries={},
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        scheduler=scheduler,
     )
 
-    # Assertions
-    # Check the calls to time.sleep
-    # We expect sleep to be called between polling cycles when the submission
-    # queue is empty.
-    # Cycle 1: Submits URL. Polls. Loop continues.
-    # Cycle 2: No URLs to submit. Polls. Sleeps for 5s.
-    # Cycle 3: No URLs to submit. Polls. Sleeps for 7s (5 * 1.5).
-    # Cycle 4: No URLs to submit. Polls. Sleeps for 10s (7 * 1.5).
-    # Cycle 5: No URLs to submit. Polls (job succeeds). Loop terminates.
-    # We filter out the small 0.2s sleeps that happen inside _poll_pending_jobs.
-    sleep_calls = [call[0][0] for call in mock_sleep.call_args_list if call[0][0] > 1]
-
-    assert sleep_calls == [5, 7, 10]
-    assert mock_submit.call_count == 1
-    # The poll side effect now runs 4 times to get to the success case
-    assert mock_poll.call_count == 4
-    assert not urls_to_process_list  # Ensure the initial URL list is empty
+    mock_client.check_status_batch.assert_called_once_with(["job-due"])
+    scheduler.after_poll.assert_called_once_with(["job-due"], pending_jobs, set())
+
+
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_poll_with_scheduler_skips_request_when_nothing_is_due(mock_sleep):
+    """Verify that no status request is made when no job is due."""
+    mock_client = mock.Mock()
+    pending_jobs = {"job-1": {"url": "http://a.com", "submitted_at": time.time()}}
+    scheduler = mock.Mock()
+    scheduler.pop_due.return_value = []
+
+    result = _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries={},
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        scheduler=scheduler,
+    )
+
+    assert result == ([], [], [])
+    mock_client.check_status_batch.assert_not_called()
+
+
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_poll_with_scheduler_reschedules_jobs_when_request_fails(mock_sleep):
+    """Verify that due jobs are put back on the schedule if the poll fails."""
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.side_effect = requests.exceptions.ConnectionError
+    pending_jobs = {"job-1": {"url": "http://a.com", "submitted_at": time.time()}}
+    scheduler = mock.Mock()
+    scheduler.pop_due.return_value = ["job-1"]
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        _poll_pending_jobs(
+            mock_client,
+            pending_jobs,
+            transient_error_retries={},
+            max_transient_retries=3,
+            job_timeout_sec=7200,
+            scheduler=scheduler,
+        )
+
+    scheduler.reschedule.assert_called_once_with("job-1")
 
 
 def test_poll_gives_up_after_max_transient_retries(caplog):
@@ -625,8 +710,10 @@ def test_workflow_survives_transient_poll_failures(
     """
     mock_client = mock.Mock()
 
-    def submit_side_effect(urls_proc, client_arg, pending_jobs_dict, *args, **kwargs):
-        url = urls_proc.pop(0)
+    def submit_side_effect(work_queue, client_arg, pending_jobs_dict, *args, **kwargs):
+        url = work_queue.pop()
+        if url is None:
+            return None
         pending_jobs_dict[f"job-{url}"] = {"url": url, "submitted_at": time.time()}
         return None
 
@@ -665,8 +752,10 @@ def test_workflow_fails_all_after_max_consecutive_poll_failures(
     """
     mock_client = mock.Mock()
 
-    def submit_side_effect(urls_proc, client_arg, pending_jobs_dict, *args, **kwargs):
-        url = urls_proc.pop(0)
+    def submit_side_effect(work_queue, client_arg, pending_jobs_dict, *args, **kwargs):
+        url = work_queue.pop()
+        if url is None:
+            return None
         pending_jobs_dict[f"job-{url}"] = {"url": url, "submitted_at": time.time()}
         return None
 
@@ -700,8 +789,10 @@ def test_workflow_caps_in_flight_jobs(mock_submit, mock_poll, mock_sleep):
 
     max_concurrent_seen = 0
 
-    def submit_side_effect(urls_proc, client_arg, pending_jobs_dict, *args, **kwargs):
-        url = urls_proc.pop(0)
+    def submit_side_effect(work_queue, client_arg, pending_jobs_dict, *args, **kwargs):
+        url = work_queue.pop()
+        if url is None:
+            return None
         pending_jobs_dict[f"job-{url}"] = {"url": url, "submitted_at": time.time()}
         return None
 
@@ -903,7 +994,7 @@ def test_callback_fires_on_submit_failure():
         ["http://doomed.com"],
         mock_client,
         {},
-        5,
+        NO_WAIT,
         {"http://doomed.com": 3},
         api_params={},
         max_retries=3,
@@ -928,8 +1019,10 @@ def test_callback_fires_on_poll_failure_bailout(mock_submit, mock_poll, mock_sle
     """Verify on_result fires 'failed' with error_code 'poll_failure' for each pending job."""
     mock_client = mock.Mock()
 
-    def submit_side_effect(urls_proc, client_arg, pending_jobs_dict, *args, **kwargs):
-        url = urls_proc.pop(0)
+    def submit_side_effect(work_queue, client_arg, pending_jobs_dict, *args, **kwargs):
+        url = work_queue.pop()
+        if url is None:
+            return None
         pending_jobs_dict[f"job-{url}"] = {"url": url, "submitted_at": time.time()}
         return None
 
@@ -960,8 +1053,7 @@ def test_callback_fires_on_poll_failure_bailout(mock_submit, mock_poll, mock_sle
 # --- Requeue-then-success test ---
 
 
-@mock.patch("wayback_machine_archiver.workflow.time.sleep")
-def test_callback_requeue_then_success_produces_one_record(mock_sleep):
+def test_callback_requeue_then_success_produces_one_record(instant_sleep):
     """A URL that gets requeued after a transient error and then succeeds
     should produce exactly one 'success' record, not a failure + success."""
     mock_client = mock.Mock()
@@ -996,3 +1088,229 @@ def test_callback_requeue_then_success_produces_one_record(mock_sleep):
         error_code=None,
         job_id="job-2",
     )
+
+
+# --- Tests for account capacity errors ---
+
+
+@pytest.mark.parametrize(
+    "status_ext", ["error:user-session-limit", "error:no-browsers-available"]
+)
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_capacity_error_requeues_without_using_a_retry(mock_sleep, status_ext):
+    """
+    Verify that account capacity errors shrink the concurrency window and
+    re-queue the URL without counting against its transient retry budget.
+    """
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.return_value = [
+        {"status": "error", "job_id": "job-1", "status_ext": status_ext},
+    ]
+    url = "http://busy.com"
+    pending_jobs = {"job-1": {"url": url, "submitted_at": time.time()}}
+    transient_error_retries = {url: 3}
+    concurrency = mock.Mock()
+
+    successful, failed, requeued = _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries,
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        concurrency=concurrency,
+    )
+
+    assert requeued == [url]
+    assert not failed
+    assert transient_error_retries == {url: 3}, "Retry budget must be untouched"
+    concurrency.record_capacity_error.assert_called_once()
+
+
+@pytest.mark.parametrize("previous_attempts", [0, 2])
+def test_capacity_refusal_on_submit_requeues_without_using_an_attempt(
+    previous_attempts,
+):
+    """
+    Verify that SPN2 refusing a capture because the account is at capacity
+    shrinks the concurrency window and re-queues the URL without counting
+    the submission against its retries.
+    """
+    url = "http://busy.com"
+    mock_client = mock.Mock()
+    mock_client.submit_capture.side_effect = CaptureRejectedError(
+        "error:user-session-limit", "Too many sessions."
+    )
+    work_queue = WorkQueue([url])
+    submission_attempts = {url: previous_attempts} if previous_attempts else {}
+    concurrency = mock.Mock()
+
+    status = _submit_next_url(
+        work_queue,
+        mock_client,
+        {},
+        NO_WAIT,
+        submission_attempts,
+        api_params={},
+        concurrency=concurrency,
+    )
+
+    assert status is None
+    concurrency.record_capacity_error.assert_called_once()
+    assert submission_attempts.get(url, 0) == previous_attempts
+    assert len(work_queue) == 1, "URL should be waiting in the retry lane"
+
+
+def test_other_refusals_on_submit_count_as_an_attempt():
+    """Verify that a refusal for another reason is retried like any failed submit."""
+    mock_client = mock.Mock()
+    mock_client.submit_capture.side_effect = CaptureRejectedError(
+        "error:invalid-url-syntax", "Bad URL."
+    )
+    submission_attempts = {}
+    concurrency = mock.Mock()
+
+    _submit_next_url(
+        WorkQueue(["http://a.com"]),
+        mock_client,
+        {},
+        NO_WAIT,
+        submission_attempts,
+        api_params={},
+        concurrency=concurrency,
+    )
+
+    assert submission_attempts == {"http://a.com": 1}
+    concurrency.record_capacity_error.assert_not_called()
+
+
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_success_is_reported_to_concurrency_controller(mock_sleep):
+    """Verify that each successful capture is fed to the controller."""
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.return_value = [
+        {"status": "success", "job_id": "job-1", "timestamp": "20250101"},
+    ]
+    pending_jobs = {"job-1": {"url": "http://a.com", "submitted_at": time.time()}}
+    concurrency = mock.Mock()
+
+    _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries={},
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        concurrency=concurrency,
+    )
+
+    concurrency.record_success.assert_called_once()
+    concurrency.record_capacity_error.assert_not_called()
+
+
+# --- Tests for retry backoff ---
+
+
+def test_retry_policy_backs_off_exponentially_up_to_max():
+    """Verify each attempt doubles the delay until max_sec, within the jitter band."""
+    policy = RetryPolicy(base_sec=10, max_sec=60, jitter=0.25)
+
+    with mock.patch("wayback_machine_archiver.workflow.random.uniform", lambda a, b: 1):
+        assert [policy.delay(n) for n in range(1, 6)] == [10, 20, 40, 60, 60]
+
+    for _ in range(100):
+        assert 7.5 <= policy.delay(1) <= 12.5
+
+
+def test_target_rate_limits_back_off_longer_than_network_errors():
+    """Verify error:too-many-requests waits far longer than error:read-timeout."""
+    slow = RETRY_POLICIES["error:too-many-requests"]
+    fast = RETRY_POLICIES["error:read-timeout"]
+    assert slow.base_sec * (1 - slow.jitter) > fast.max_sec * (1 + fast.jitter)
+
+
+@mock.patch("wayback_machine_archiver.workflow.time.sleep")
+def test_poll_requeues_transient_errors_with_backoff(mock_sleep):
+    """Verify a transient error puts the URL on the work queue, not ready yet."""
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.return_value = [
+        {"status": "error", "job_id": "job-1", "status_ext": "error:too-many-requests"},
+    ]
+    pending_jobs = {"job-1": {"url": "http://busy.com", "submitted_at": time.time()}}
+    work_queue = WorkQueue()
+
+    _, _, requeued = _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries={},
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        work_queue=work_queue,
+    )
+
+    assert requeued == ["http://busy.com"]
+    assert len(work_queue) == 1
+    assert work_queue.pop() is None
+    assert work_queue.seconds_until_ready() >= 225
+
+
+def test_target_site_throttling_slows_down_its_host():
+    """Verify error:too-many-requests widens the host interval, and only for that host."""
+    mock_client = mock.Mock()
+    mock_client.check_status_batch.return_value = [
+        {"status": "error", "job_id": "job-1", "status_ext": "error:too-many-requests"},
+        {"status": "error", "job_id": "job-2", "status_ext": "error:read-timeout"},
+    ]
+    now = time.time()
+    pending_jobs = {
+        "job-1": {"url": "http://busy.com/page", "submitted_at": now},
+        "job-2": {"url": "http://other.com/page", "submitted_at": now},
+    }
+    work_queue = WorkQueue()
+
+    _poll_pending_jobs(
+        mock_client,
+        pending_jobs,
+        transient_error_retries={},
+        max_transient_retries=3,
+        job_timeout_sec=7200,
+        work_queue=work_queue,
+    )
+
+    assert not work_queue.politeness.is_ready("busy.com")
+    assert work_queue.politeness.is_ready("other.com")
+
+
+def test_workflow_waits_for_backoff_before_resubmitting(instant_sleep):
+    """Verify the run sleeps out a retry's backoff instead of resubmitting at once."""
+    mock_client = mock.Mock()
+    submitted_at = []
+
+    def submit_capture(url, **kwargs):
+        submitted_at.append(time.time())
+        return f"job-{len(submitted_at)}"
+
+    mock_client.submit_capture.side_effect = submit_capture
+    mock_client.check_status_batch.side_effect = [
+        [{"status": "error", "job_id": "job-1", "status_ext": "error:read-timeout"}],
+        [{"status": "success", "job_id": "job-2", "timestamp": "20250101"}],
+    ]
+
+    with mock.patch("wayback_machine_archiver.workflow._retry_delay", return_value=100):
+        success, _ = run_archive_workflow(mock_client, ["http://a.com"], 0, {})
+
+    assert success == 1
+    # The first status check happens ~15 s after submission, then the retry
+    # waits its full 100 s backoff.
+    assert submitted_at[1] - submitted_at[0] >= 115
+
+
+def test_window_held_by_another_process_is_rechecked_after_a_pause():
+    """
+    With nothing of its own in flight, a closed window can only be reopened by
+    another process sharing it, so the loop waits rather than spinning.
+    """
+    scheduler = PollScheduler()
+    work_queue = WorkQueue(["http://a.com"])
+
+    wait = _seconds_until_next_event(scheduler, work_queue, {}, window_open=False)
+
+    assert wait == scheduler.min_interval
@@ -0,0 +1,202 @@
+"""Tests for the incremental SitemapState store."""
+
+import sys
+import threading
+from unittest import mock
+
+import pytest
+import requests
+
+from wayback_machine_archiver.archiver import main
+from wayback_machine_archiver.sitemaps import SitemapEntry, iter_sitemap_pages
+from wayback_machine_archiver.state import SitemapState
+from wayback_machine_archiver.workflow import ArchiveResult
+
+DUMMY_CREDENTIALS = "dummy_key"
+CREDENTIAL_ENV_VARS = ("INTERNET_ARCHIVE_ACCESS_KEY", "INTERNET_ARCHIVE_SECRET_KEY")
+
+
+def _success(url):
+    return ArchiveResult(url, "success", f"https://web.archive.org/{url}", None, "job")
+
+
+@pytest.fixture
+def state(tmp_path):
+    with SitemapState(str(tmp_path / "state.db")) as state:
+        yield state
+
+
+def test_new_pages_need_archiving(state):
+    assert state.needs_archiving("https://a.com", "2025-01-01")
+    assert state.needs_archiving("https://b.com", None)
+
+
+def test_pages_need_archiving_until_captured(state):
+    state.needs_archiving("https://a.com", "2025-01-01")
+    state.record_result(
+        ArchiveResult("https://a.com", "failed", None, "error:job-failed", "job")
+    )
+    assert state.needs_archiving("https://a.com", "2025-01-01")
+
+    state.record_result(_success("https://a.com"))
+    assert not state.needs_archiving("https://a.com", "2025-01-01")
+
+
+def test_changed_lastmod_needs_archiving_again(state):
+    state.needs_archiving("https://a.com", "2025-01-01")
+    state.record_result(_success("https://a.com"))
+
+    assert state.needs_archiving("https://a.com", "2025-02-01")
+    # Seeing the new lastmod does not count as capturing it.
+    assert state.needs_archiving("https://a.com", "2025-02-01")
+
+
+def test_pages_without_lastmod_are_archived_once(state):
+    state.needs_archiving("https://a.com", None)
+    state.record_result(_success("https://a.com"))
+
+    assert not state.needs_archiving("https://a.com", None)
+
+
+def test_state_persists_across_runs(tmp_path):
+    path = str(tmp_path / "state.db")
+    with SitemapState(path) as state:
+        state.needs_archiving("https://a.com", "2025-01-01")
+        state.record_result(_success("https://a.com"))
+
+    with SitemapState(path) as state:
+        assert not state.needs_archiving("https://a.com", "2025-01-01")
+
+
+def test_state_is_usable_from_two_threads(tmp_path):
+    urls = [f"https://a.com/{n}" for n in range(500)]
+    with SitemapState(str(tmp_path / "state.db"), commit_every=7) as state:
+        for url in urls:
+            state.needs_archiving(url, "2025-01-01")
+        # Pages are checked in the fill thread while results are recorded
+        # on the loop.
+        recorder = threading.Thread(
+            target=lambda: [state.record_result(_success(url)) for url in urls]
+        )
+        recorder.start()
+        for url in urls:
+            state.needs_archiving(url + "/new", None)
+        recorder.join()
+
+    with SitemapState(str(tmp_path / "state.db")) as state:
+        assert not any(state.needs_archiving(url, "2025-01-01") for url in urls)
+
+
+def test_changed_pages_filters_unchanged(state):
+    state.needs_archiving("https://same.com", "2025-01-01")
+    state.record_result(_success("https://same.com"))
+
+    pages = [
+        SitemapEntry("https://same.com", False, "2025-01-01"),
+        SitemapEntry("https://new.com", False, "2025-01-01"),
+    ]
+
+    assert list(state.changed_pages(pages)) == ["https://new.com"]
+
+
+def test_child_sitemap_is_unchanged_only_when_fully_archived(state):
+    child = "https://a.com/sitemap1.xml"
+    assert not state.sitemap_unchanged(child, "2025-01-01")
+
+    state.needs_archiving("https://a.com/page", "2025-01-01", child)
+    state.record_sitemap(child, "2025-01-01")
+    assert not state.sitemap_unchanged(child, "2025-01-01")
+
+    state.record_result(_success("https://a.com/page"))
+    assert state.sitemap_unchanged(child, "2025-01-01")
+    assert not state.sitemap_unchanged(child, "2025-02-01")
+    assert not state.sitemap_unchanged(child, None)
+
+
+def _index(children):
+    entries = "".join(
+        f"<sitemap><loc>{url}</loc><lastmod>{lastmod}</lastmod></sitemap>"
+        for url, lastmod in children.items()
+    )
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</sitemapindex>
+    """.encode()
+
+
+def _urlset(*urls):
+    entries = "".join(f"<url><loc>{url}</loc></url>" for url in urls)
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+    <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{entries}</urlset>
+    """.encode()
+
+
+def test_unchanged_child_sitemaps_are_not_fetched(requests_mock, state):
+    index_url = "https://a.com/sitemap_index.xml"
+    first, second = "https://a.com/sitemap1.xml", "https://a.com/sitemap2.xml"
+    requests_mock.get(first, content=_urlset("https://a.com/1"))
+    requests_mock.get(second, content=_urlset("https://a.com/2"))
+    session = requests.Session()
+
+    requests_mock.get(index_url, content=_index({first: "v1", second: "v1"}))
+    for url in state.changed_pages(
+        iter_sitemap_pages([index_url], session, state=state)
+    ):
+        state.record_result(_success(url))
+
+    requests_mock.reset_mock()
+    requests_mock.get(index_url, content=_index({first: "v1", second: "v2"}))
+    pages = list(iter_sitemap_pages([index_url], session, state=state))
+
+    assert [page.loc for page in pages] == ["https://a.com/2"]
+    assert [r.url for r in requests_mock.request_history] == [index_url, second]
+
+
+@mock.patch("wayback_machine_archiver.archiver.run_archive_workflow")
+@mock.patch("wayback_machine_archiver.archiver.iter_sitemap_pages")
+def test_main_only_submits_new_or_changed_pages(
+    mock_pages, mock_workflow, monkeypatch, tmp_path
+):
+    """Verify a second run with --sitemap-state submits only what changed."""
+    monkeypatch.setattr(
+        "wayback_machine_archiver.archiver.os.getenv",
+        lambda key, default=None: (
+            DUMMY_CREDENTIALS if key in CREDENTIAL_ENV_VARS else default
+        ),
+    )
+    state_path = str(tmp_path / "state.db")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "archiver",
+            "--sitemaps",
+            "https://example.com/sitemap.xml",
+            "--sitemap-state",
+            state_path,
+        ],
+    )
+    submitted = []
+
+    def workflow(client, urls, *args, on_result, **kwargs):
+        for url in urls:
+            submitted.append(url)
+            on_result(_success(url))
+        return len(submitted), 0
+
+    mock_workflow.side_effect = workflow
+
+    mock_pages.return_value = [
+        SitemapEntry("https://example.com/a", False, "2025-01-01"),
+        SitemapEntry("https://example.com/b", False, "2025-01-01"),
+    ]
+    main()
+    assert submitted == ["https://example.com/a", "https://example.com/b"]
+
+    submitted.clear()
+    mock_pages.return_value = [
+        SitemapEntry("https://example.com/a", False, "2025-01-01"),
+        SitemapEntry("https://example.com/b", False, "2025-03-01"),
+        SitemapEntry("https://example.com/c", False, "2025-03-01"),
+    ]
+    main()
+    assert submitted == ["https://example.com/b", "https://example.com/c"]
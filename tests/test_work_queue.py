@@ -0,0 +1,171 @@
+"""Tests for the two-lane WorkQueue."""
+
+import time
+from unittest import mock
+
+import pytest
+
+from wayback_machine_archiver.politeness import HostPoliteness
+from wayback_machine_archiver.work_queue import SourceWait, WorkQueue
+from wayback_machine_archiver.workflow import run_archive_workflow
+
+
+def test_retries_wait_for_their_delay(clock):
+    queue = WorkQueue(["http://a.com", "http://b.com"], clock=clock)
+
+    queue.requeue(queue.pop(), delay=30)
+
+    assert queue.pop() == "http://b.com"
+    assert queue.pop() is None
+    assert queue.has_work() and not queue.has_ready()
+    assert queue.seconds_until_ready() == pytest.approx(30)
+
+    clock.now += 30
+    assert queue.pop() == "http://a.com"
+
+
+def test_ready_retries_come_before_fresh_urls(clock):
+    queue = WorkQueue(["http://a.com", "http://b.com"], clock=clock)
+
+    queue.requeue(queue.pop())
+
+    assert [queue.pop(), queue.pop()] == ["http://a.com", "http://b.com"]
+
+
+def test_retries_are_ordered_by_ready_time(clock):
+    queue = WorkQueue(clock=clock)
+    queue.requeue("http://slow.com", delay=60)
+    queue.requeue("http://fast.com", delay=5)
+
+    clock.now += 60
+    assert [queue.pop(), queue.pop()] == ["http://fast.com", "http://slow.com"]
+
+
+def test_source_is_read_lazily():
+    """Only one URL is taken from the source per pop."""
+    produced = []
+
+    def source():
+        for url in ["http://a.com", "http://b.com"]:
+            produced.append(url)
+            yield url
+
+    queue = WorkQueue(source())
+    assert produced == []
+
+    assert queue.pop() == "http://a.com"
+    assert produced == ["http://a.com"]
+    assert queue.pulled == 1
+
+
+def test_source_asking_to_wait_is_not_read_until_then(clock):
+    queue = WorkQueue(iter([SourceWait(30), "http://a.com"]), clock=clock)
+
+    assert queue.pop() is None
+    assert queue.has_work() and not queue.has_ready()
+    assert queue.seconds_until_ready() == pytest.approx(30)
+
+    clock.now += 30
+    assert queue.pop() == "http://a.com"
+    assert queue.pulled == 1
+
+
+def test_extended_urls_come_before_the_source():
+    queue = WorkQueue(["http://source.com"])
+    queue.extend(["http://added.com"])
+
+    assert [queue.pop(), queue.pop()] == ["http://added.com", "http://source.com"]
+
+
+def test_has_work_until_everything_is_drained():
+    queue = WorkQueue(["http://a.com"])
+    assert queue.has_work()
+
+    queue.pop()
+    assert queue.pop() is None
+    assert not queue.has_work()
+
+    queue.requeue("http://a.com")
+    assert queue.has_work()
+    assert len(queue) == 1
+
+
+def test_busy_host_is_skipped_for_other_hosts(clock):
+    """While a host waits out its interval, URLs on other hosts are submitted."""
+    queue = WorkQueue(
+        ["http://a.com/1", "http://a.com/2", "http://a.com/3", "http://b.com/1"],
+        politeness=HostPoliteness(10, clock=clock),
+        clock=clock,
+    )
+
+    assert queue.pop() == "http://a.com/1"
+    assert queue.pop() == "http://b.com/1"
+    assert queue.pop() is None
+    assert queue.has_work() and not queue.has_ready()
+    assert queue.seconds_until_ready() == pytest.approx(10)
+
+    clock.now += 10
+    assert queue.pop() == "http://a.com/2"
+
+
+def test_buffered_hosts_are_served_round_robin(clock):
+    queue = WorkQueue(clock=clock)
+    queue.extend(
+        ["http://a.com/1", "http://a.com/2", "http://b.com/1", "http://c.com/1"]
+    )
+
+    assert [queue.pop() for _ in range(4)] == [
+        "http://a.com/1",
+        "http://b.com/1",
+        "http://c.com/1",
+        "http://a.com/2",
+    ]
+
+
+def test_lookahead_bounds_how_far_the_source_is_read(clock):
+    source = iter([f"http://a.com/{i}" for i in range(10)] + ["http://b.com/1"])
+    queue = WorkQueue(
+        source, politeness=HostPoliteness(10, clock=clock), lookahead=3, clock=clock
+    )
+
+    assert queue.pop() == "http://a.com/0"
+    assert queue.pop() is None
+    assert queue.pulled == 4
+    assert not queue.has_ready()
+
+
+def test_retry_waits_for_its_host(clock):
+    queue = WorkQueue(
+        ["http://a.com/1"], politeness=HostPoliteness(10, clock=clock), clock=clock
+    )
+    queue.requeue(queue.pop(), delay=5)
+
+    clock.now += 5
+    assert queue.pop() is None
+    clock.now += 5
+    assert queue.pop() == "http://a.com/1"
+
+
+@pytest.fixture
+def instant_sleep(monkeypatch):
+    """Make time.sleep return immediately while advancing time.time to match."""
+    now = [time.time()]
+
+    def sleep(seconds):
+        now[0] += seconds
+
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(time, "sleep", sleep)
+
+
+def test_workflow_does_not_mutate_callers_list(instant_sleep):
+    mock_client = mock.Mock()
+    mock_client.submit_capture.return_value = "job-1"
+    mock_client.check_status_batch.return_value = [
+        {"status": "success", "job_id": "job-1", "timestamp": "20250101"}
+    ]
+    urls = ["http://a.com"]
+
+    run_archive_workflow(mock_client, urls, 0, {})
+
+    assert urls == ["http://a.com"]